@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Benchmark des chemins chauds de l'API
+
+Exécute l'application en processus (client de test Flask, pas de serveur)
+sur une base générée par generate_data.py et mesure, pour chaque
+scénario : latences p50/p95/p99, requêtes par seconde, requêtes SQL par
+requête HTTP (lues dans l'en-tête Server-Timing) et réponses en erreur.
+
+Les résultats peuvent être enregistrés comme référence puis comparés lors
+d'une exécution suivante ; le script sort en erreur si un scénario régresse
+au-delà du seuil. Une référence n'est enregistrée que si aucun scénario
+n'a renvoyé d'erreur. Les latences ne sont comparées que si la machine
+(Python, SQLite, plateforme, nombre de CPU) et le jeu de données sont ceux
+de la référence ; sinon seuls les requêtes SQL par requête HTTP et les
+nouvelles erreurs sont vérifiés.
+
+baselines/example-1cpu.json est un exemple enregistré sur une machine à un
+CPU : il sert de modèle et de contrôle du nombre de requêtes SQL, pas de
+référence de latence. Enregistrer sa propre référence sur la machine de
+mesure (--save-baseline local, non versionnée).
+
+Usage:
+    python benchmarks/bench_api.py                         # génère la base au besoin
+    python benchmarks/bench_api.py --save-baseline local
+    python benchmarks/bench_api.py --compare local --threshold 0.2
+    python benchmarks/bench_api.py --compare example-1cpu  # SQL/req uniquement ailleurs
+    python benchmarks/bench_api.py --only orders_create,cart_patch --requests 500
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+sys.path.insert(0, BACKEND_DIR)
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+SEARCH_TERMS = ('whey', 'creatine', 'vanille', 'samurai protein', 'bcaa', 'chocolat 1kg',
+                'omega', 'pre-workout', 'katana isolate', 'magnesium')
+
+# Taille par défaut du jeu de données : assez grande pour que les plans de requête comptent,
+# assez petite pour être générée en moins d'une minute
+DEFAULT_DATASET = {'users': 20_000, 'products': 2_000, 'orders': 100_000, 'seed': 42}
+
+
+def percentile(sorted_values, fraction):
+    """Percentile par interpolation linéaire sur une liste triée"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Context:
+    """État partagé par les scénarios : client, jetons et identifiants tirés de la base"""
+
+    def __init__(self, client, rng, admin_headers, customers, heavy_customer, product_ids):
+        self.client = client
+        self.rng = rng
+        self.admin_headers = admin_headers
+        self.customers = customers            # en-têtes d'autorisation de clients ordinaires
+        self.heavy_customer = heavy_customer  # client avec beaucoup de commandes (pagination)
+        self.product_ids = product_ids        # produits actifs au stock renfloué
+        self._turn = 0
+
+    def next_customer(self):
+        self._turn += 1
+        return self.customers[self._turn % len(self.customers)]
+
+
+# ==================== SCÉNARIOS ====================
+# Chaque scénario reçoit le contexte et retourne la réponse du client de test
+
+def products_catalog(ctx):
+    return ctx.client.get('/api/products')
+
+
+def products_page(ctx):
+    return ctx.client.get('/api/products?limit=20&sort=price')
+
+
+def products_search(ctx):
+    return ctx.client.get('/api/products/search', query_string={'q': ctx.rng.choice(SEARCH_TERMS)})
+
+
+def cart_add(ctx):
+    return ctx.client.post(f'/api/cart/add/{ctx.rng.choice(ctx.product_ids)}', headers=ctx.next_customer())
+
+
+def cart_patch(ctx):
+    operations = [{'op': 'set', 'product_id': product_id, 'quantity': ctx.rng.randint(0, 3)}
+                  for product_id in ctx.rng.sample(ctx.product_ids, 3)]
+    return ctx.client.patch('/api/cart', json={'operations': operations}, headers=ctx.next_customer())
+
+
+def orders_create(ctx):
+    items = [{'product_id': product_id, 'quantity': ctx.rng.randint(1, 2)}
+             for product_id in ctx.rng.sample(ctx.product_ids, ctx.rng.randint(1, 3))]
+    return ctx.client.post('/api/orders', headers=ctx.next_customer(), json={
+        'items': items,
+        'shipping_address': 'Benchmark\n1 rue du Test\n75001 Paris\nFrance',
+        'billing_address': 'Benchmark\n1 rue du Test\n75001 Paris\nFrance',
+        'payment_method': 'card',
+        'shipping_method': 'standard',
+        'shipping_cost': 4.99
+    })
+
+
+def orders_list(ctx):
+    return ctx.client.get(f'/api/orders?page={ctx.rng.randint(1, 5)}&per_page=10', headers=ctx.heavy_customer)
+
+
+def admin_dashboard_stats(ctx):
+    return ctx.client.get('/api/admin/dashboard/stats?days=30', headers=ctx.admin_headers)
+
+
+def admin_sales_chart(ctx):
+    return ctx.client.get('/api/admin/dashboard/sales-chart?days=30', headers=ctx.admin_headers)
+
+
+SCENARIOS = {
+    'products_catalog': products_catalog,
+    'products_page': products_page,
+    'products_search': products_search,
+    'cart_add': cart_add,
+    'cart_patch': cart_patch,
+    'orders_create': orders_create,
+    'orders_list': orders_list,
+    'admin_dashboard_stats': admin_dashboard_stats,
+    'admin_sales_chart': admin_sales_chart,
+}
+
+
+# ==================== JEU DE DONNÉES ====================
+
+def ensure_dataset(args):
+    """Génère la base si elle n'existe pas (ou si --regenerate) ; retourne ses paramètres"""
+    meta_path = args.database + '.json'
+    dataset = {'users': args.users, 'products': args.products, 'orders': args.orders, 'seed': args.seed}
+
+    if not args.regenerate and os.path.exists(args.database) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('dataset') == dataset:
+            print(f"🗄️ Base existante réutilisée : {args.database}")
+            return meta
+        print("ℹ️  Paramètres différents de la base existante : régénération")
+
+    end = date.today().isoformat()
+    subprocess.run([
+        sys.executable, os.path.join(BACKEND_DIR, 'generate_data.py'),
+        '--database', args.database, '--users', str(args.users), '--products', str(args.products),
+        '--orders', str(args.orders), '--seed', str(args.seed), '--end', end
+    ], check=True, cwd=BACKEND_DIR)
+
+    meta = {'dataset': dataset, 'end': end}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def prepare_database(path, pool_size):
+    """
+    Sélectionne les produits et clients utilisés par les scénarios et
+    renfloue le stock du pool pour que les commandes ne s'épuisent pas
+    """
+    conn = sqlite3.connect(path)
+    try:
+        product_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM products WHERE is_active = 1 ORDER BY id LIMIT ?", (pool_size,))]
+        conn.execute(f"UPDATE products SET stock_quantity = 1000000 "
+                     f"WHERE id IN ({', '.join('?' * len(product_ids))})", product_ids)
+        customer_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM users WHERE role = 'user' ORDER BY id LIMIT 50")]
+        heavy_id = conn.execute(
+            "SELECT user_id FROM orders GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+        admin_id = conn.execute("SELECT id FROM users WHERE role = 'admin' ORDER BY id LIMIT 1").fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    return product_ids, customer_ids, heavy_id[0] if heavy_id else customer_ids[0], admin_id[0]
+
+
+# ==================== MESURE ====================
+
+def run_scenario(ctx, scenario, requests, warmup):
+    for _ in range(warmup):
+        scenario(ctx)
+
+    latencies, sql_counts, errors = [], [], {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = scenario(ctx)
+        latencies.append(time.perf_counter() - request_started)
+
+        match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+        if match:
+            sql_counts.append(int(match.group(1)))
+        if response.status_code >= 400:
+            errors[response.status_code] = errors.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'rps': round(requests / elapsed, 1),
+        'sql_per_request': round(sum(sql_counts) / len(sql_counts), 2) if sql_counts else None,
+        'errors': {str(status): count for status, count in sorted(errors.items())},
+    }
+
+
+def print_results(results):
+    print(f"\n{'scénario':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'SQL/req':>9}  erreurs")
+    print('-' * 84)
+    for name, r in results.items():
+        sql = '-' if r['sql_per_request'] is None else f"{r['sql_per_request']:.1f}"
+        errors = ', '.join(f"{status}×{count}" for status, count in r['errors'].items()) or '-'
+        print(f"{name:<24}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['rps']:>9.0f}{sql:>9}  {errors}")
+
+
+# ==================== RÉFÉRENCES ====================
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def save_baseline(name, meta, results):
+    """Enregistre la référence ; refusé si un scénario a renvoyé des erreurs (latences non significatives)"""
+    failing = {scenario: r['errors'] for scenario, r in results.items() if r['errors']}
+    if failing:
+        print(f"\n❌ Référence {name} non enregistrée : scénarios en erreur")
+        for scenario, errors in failing.items():
+            print(f"   - {scenario}: {errors}")
+        return False
+
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), 'w') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'machine': machine_info(),
+            'dataset': meta['dataset'],
+            'results': results,
+        }, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"\n💾 Référence enregistrée : {baseline_path(name)}")
+    return True
+
+
+def compare_baseline(name, meta, results, threshold):
+    """Compare aux résultats de référence ; retourne la liste des régressions"""
+    with open(baseline_path(name)) as f:
+        baseline = json.load(f)
+    # Latences mesurées ailleurs ou sur d'autres données : seuls SQL/req et les erreurs sont comparables
+    differences = [label for label, same in (
+        ('machine différente', baseline.get('machine') == machine_info()),
+        ('jeu de données différent', baseline['dataset'] == meta['dataset']),
+    ) if not same]
+    compare_latency = not differences
+    if differences:
+        print(f"⚠️  Référence {name} : {', '.join(differences)} ; "
+              f"latences non comparées (SQL/req et erreurs uniquement)")
+
+    regressions = []
+    print(f"\nComparaison avec la référence {name} ({baseline['created_at']}), seuil {threshold:.0%}")
+    print(f"{'scénario':<24}{'p50':>16}{'p95':>16}{'SQL/req':>14}")
+    for scenario, current in results.items():
+        previous = baseline['results'].get(scenario)
+        if not previous:
+            print(f"{scenario:<24}{'(nouveau)':>16}")
+            continue
+        if previous.get('errors'):
+            # Latences de réponses en erreur : rien de comparable
+            print(f"{scenario:<24}{'(référence en erreur)':>32} ⚠️")
+            continue
+
+        def delta(key):
+            before, after = previous[key], current[key]
+            return (after - before) / before if before else 0.0
+
+        problems = []
+        for key in ('p50_ms', 'p95_ms'):
+            if compare_latency and delta(key) > threshold:
+                problems.append(f"{key} {previous[key]:.2f} → {current[key]:.2f} ms")
+        before_sql, after_sql = previous.get('sql_per_request'), current.get('sql_per_request')
+        # Les moyennes varient avec le nombre d'articles tirés : une requête N+1 ajoute au moins 1
+        if before_sql is not None and after_sql is not None and after_sql - before_sql >= 0.5:
+            problems.append(f"SQL/req {before_sql} → {after_sql}")
+        if current['errors'] and not previous.get('errors'):
+            problems.append(f"nouvelles erreurs {current['errors']}")
+
+        marker = '❌' if problems else '✅'
+        sql_column = f"{before_sql}→{after_sql}" if before_sql is not None else '-'
+        if compare_latency:
+            print(f"{scenario:<24}{delta('p50_ms'):>+15.0%} {delta('p95_ms'):>+15.0%} {sql_column:>13} {marker}")
+        else:
+            print(f"{scenario:<24}{'-':>16}{'-':>16}{sql_column:>14} {marker}")
+        regressions.extend(f"{scenario}: {problem}" for problem in problems)
+    return regressions
+
+
+# ==================== PRINCIPAL ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark des chemins chauds de l'API")
+    parser.add_argument('--database', default=os.path.join(tempfile.gettempdir(), 'samurai_benchmark.db'))
+    parser.add_argument('--users', type=int, default=DEFAULT_DATASET['users'])
+    parser.add_argument('--products', type=int, default=DEFAULT_DATASET['products'])
+    parser.add_argument('--orders', type=int, default=DEFAULT_DATASET['orders'])
+    parser.add_argument('--seed', type=int, default=DEFAULT_DATASET['seed'])
+    parser.add_argument('--regenerate', action='store_true', help="régénère la base même si elle existe")
+    parser.add_argument('--requests', type=int, default=200, help="requêtes mesurées par scénario")
+    parser.add_argument('--warmup', type=int, default=20, help="requêtes d'échauffement par scénario")
+    parser.add_argument('--only', default=None, help="scénarios à exécuter, séparés par des virgules")
+    parser.add_argument('--save-baseline', metavar='NOM', default=None)
+    parser.add_argument('--compare', metavar='NOM', default=None)
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="hausse de latence tolérée avant de signaler une régression")
+    args = parser.parse_args()
+    args.database = os.path.abspath(args.database)
+    return args
+
+
+def main():
+    args = parse_args()
+    names = list(SCENARIOS) if not args.only else [n.strip() for n in args.only.split(',')]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Scénarios inconnus : {', '.join(unknown)} (disponibles : {', '.join(SCENARIOS)})")
+        return 2
+
+    meta = ensure_dataset(args)
+    product_ids, customer_ids, heavy_id, admin_id = prepare_database(args.database, pool_size=200)
+
+    # L'application est importée après le choix de la base
+    os.environ['DATABASE_URL'] = f'sqlite:///{args.database}'
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+    from flask_jwt_extended import create_access_token
+    from src.main_fixed import app, db
+    from src.models.user import User
+    from src.services.identity import token_claims
+
+    def headers(user):
+        return {'Authorization': f'Bearer {create_access_token(identity=user.id, additional_claims=token_claims(user))}'}
+
+    with app.app_context():
+        # Tables ajoutées depuis la génération de la base (comme au démarrage de l'application)
+        db.create_all()
+        users = {user.id: user for user in User.query.filter(User.id.in_(customer_ids + [heavy_id, admin_id]))}
+        ctx = Context(
+            client=app.test_client(),
+            rng=random.Random(args.seed),
+            admin_headers=headers(users[admin_id]),
+            customers=[headers(users[user_id]) for user_id in customer_ids],
+            heavy_customer=headers(users[heavy_id]),
+            product_ids=product_ids,
+        )
+
+    # Hors de tout contexte d'application : chaque requête doit avoir le sien (et son propre g)
+    results = {}
+    print(f"🚀 {len(names)} scénarios, {args.requests} requêtes mesurées chacun")
+    for name in names:
+        results[name] = run_scenario(ctx, SCENARIOS[name], args.requests, args.warmup)
+        print(f"   {name}: p95 {results[name]['p95_ms']:.2f} ms")
+
+    print_results(results)
+
+    if args.save_baseline and not save_baseline(args.save_baseline, meta, results):
+        return 1
+    if args.compare:
+        regressions = compare_baseline(args.compare, meta, results, args.threshold)
+        if regressions:
+            print("\n❌ Régressions détectées :")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print("\n✅ Aucune régression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
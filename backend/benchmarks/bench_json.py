@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de la sérialisation JSON du catalogue
+
+Compare, sur N produits (10 000 par défaut) chargés dans une base SQLite
+en mémoire, le chemin historique (to_dict() puis fournisseur JSON par
+défaut de Flask) et FastJSONProvider :
+
+- default  : to_dict() + DefaultJSONProvider (chemin historique)
+- fast     : to_dict() + FastJSONProvider
+- rows     : Row SQLAlchemy encodées directement (Decimal/datetime natifs)
+- fragments: fiches produit pré-encodées (RawJSON), seulement assemblées
+
+Chaque mesure est la médiane de --repeat exécutions ; les documents
+produits par les différents chemins sont vérifiés équivalents.
+
+Usage:
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --products 50000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+# Tous les modèles : les relations de Product sont résolues par nom
+from src.models import bundle, order, stats, user, user_history, wishlist_cart  # noqa: F401
+from src.models.product import Product
+from src.services import json_provider
+from src.services.json_provider import FastJSONProvider, RawJSON
+
+WORDS = ('protéine', 'whey', 'isolat', 'vanille', 'chocolat', 'récupération', 'musculaire', 'acides',
+         'aminés', 'digestion', 'énergie', 'endurance', 'hydratation', 'magnésium', 'zinc', 'shaker')
+
+
+def sentence(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count)).capitalize() + '.'
+
+
+def build_catalog(count, seed=42):
+    """Base SQLite en mémoire contenant `count` produits réalistes (textes longs compris)"""
+    rng = random.Random(seed)
+    engine = create_engine('sqlite://')
+    Product.__table__.create(engine)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        for i in range(1, count + 1):
+            price = Decimal(rng.randint(990, 8990)) / 100
+            session.add(Product(
+                id=i, name=f'Samurai {rng.choice(WORDS).capitalize()} {i}', description=sentence(rng, 80),
+                price=price, original_price=price * Decimal('1.2') if i % 4 == 0 else None,
+                image_url=f'/images/products/{i}.webp', category=rng.choice(('Protéines', 'Vitamines', 'Énergie')),
+                stock_quantity=rng.randint(0, 500), sku=f'SN-{i:07d}', weight=Decimal('1.00'),
+                rating=Decimal(rng.randint(300, 500)) / 100, review_count=rng.randint(0, 900),
+                is_active=True, featured=i % 10 == 0, product_benefits=sentence(rng, 25),
+                directions=sentence(rng, 20), ingredients=sentence(rng, 40),
+                nutrition_facts={'energie_kcal': rng.randint(90, 400), 'proteines_g': rng.randint(5, 30)},
+                created_at=start + timedelta(minutes=i), updated_at=start + timedelta(minutes=2 * i)
+            ))
+        session.commit()
+    return engine
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), output
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de la sérialisation JSON du catalogue")
+    parser.add_argument('--products', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    app = Flask(__name__)
+    default_provider, fast_provider = DefaultJSONProvider(app), FastJSONProvider(app)
+
+    print(f"🏗️  {args.products:,} produits en mémoire...")
+    engine = build_catalog(args.products)
+    with Session(engine) as session:
+        products = session.scalars(select(Product).order_by(Product.id)).all()
+        columns = [getattr(Product, field) for field in Product.PUBLIC_FIELDS]
+        rows = session.execute(select(*columns).order_by(Product.id)).all()
+
+        cards = [fast_provider.dumps_bytes(product.to_dict()) for product in products]
+        scenarios = {
+            'default': lambda: default_provider.dumps([p.to_dict() for p in products]).encode('utf-8'),
+            'fast': lambda: fast_provider.dumps_bytes([p.to_dict() for p in products]),
+            'rows': lambda: fast_provider.dumps_bytes(rows),
+            'fragments': lambda: fast_provider.dumps_bytes([RawJSON(card) for card in cards]),
+        }
+
+        encoder = 'orjson' if json_provider.orjson is not None else 'json (orjson absent)'
+        print(f"🚀 {len(scenarios)} chemins, médiane de {args.repeat} exécutions, encodeur rapide : {encoder}\n")
+        print(f"{'chemin':<12}{'ms':>10}{'Mo':>8}{'Mo/s':>9}{'gain':>8}")
+        print('-' * 47)
+
+        reference = None
+        baseline = None
+        for name, function in scenarios.items():
+            elapsed, output = measure(function, args.repeat)
+            document = json.loads(output)
+            if reference is None:
+                reference, baseline = document, elapsed
+            elif document != reference:
+                print(f"❌ {name} : document différent du chemin historique")
+                return 1
+            size = len(output) / 1e6
+            print(f"{name:<12}{elapsed * 1000:>10.1f}{size:>8.2f}{size / elapsed:>9.0f}{baseline / elapsed:>7.1f}x")
+
+    print("\n✅ Documents identiques sur tous les chemins")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
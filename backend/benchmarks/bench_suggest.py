@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de l'autocomplétion du catalogue (ProductSuggestIndex)
+
+Construit N produits (100 000 par défaut, noms du générateur de données)
+et leurs ventes dans une base SQLite en mémoire, puis mesure :
+
+- la construction de l'index (lecture des produits et des ventes comprise)
+- la latence de suggest() sur des préfixes tirés des noms et des SKU,
+  de 1 à 12 caractères, avec ou sans accents et majuscules
+
+Les résultats de quelques préfixes sont vérifiés contre un parcours
+naïf de tous les produits. Le code de sortie est 1 si le p99 dépasse
+--max-p99 millisecondes (2 par défaut).
+
+Usage:
+    python benchmarks/bench_suggest.py
+    python benchmarks/bench_suggest.py --products 200000 --queries 50000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from flask import Flask
+
+# Tous les modèles : les relations de Product sont résolues par nom
+from src.models import bundle, order, stats, user, user_history, wishlist_cart  # noqa: F401
+from src.extensions import db
+from src.models.product import Product
+from src.models.stats import DailyProductSales
+from src.services.product_suggest import ProductSuggestIndex, fold, word_suffixes
+from generate_data import BRANDS, CATALOG, FLAVORS, SIZES
+
+
+def build_catalog(count, seed=42):
+    """Produits et ventes journalières (popularité en loi de Zipf) dans la base de l'application"""
+    rng = random.Random(seed)
+    products, sales = [], []
+    start = date(2024, 1, 1)
+    for i in range(1, count + 1):
+        category, kinds, _ = rng.choice(CATALOG)
+        name = f"{rng.choice(BRANDS)} {rng.choice(kinds)} {rng.choice(FLAVORS)} {rng.choice(SIZES)}"
+        products.append({'id': i, 'name': name, 'sku': f'SN-{i:07d}', 'category': category,
+                         'price': rng.randint(700, 7900) / 100, 'stock_quantity': 10, 'is_active': True})
+        units = int(count / (rng.randint(1, count) ** 0.8))
+        if units:
+            sales.append({'day': start + timedelta(days=i % 365), 'product_id': i,
+                          'product_name': name, 'units_sold': units})
+    db.session.execute(Product.__table__.insert(), products)
+    if sales:
+        db.session.execute(DailyProductSales.__table__.insert(), sales)
+    db.session.commit()
+    return products
+
+
+def sample_prefixes(products, count, seed=7):
+    """Préfixes réalistes : début d'un mot du nom ou du SKU, parfois accentué ou en majuscules"""
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(count):
+        product = rng.choice(products)
+        source = product['sku'] if rng.random() < 0.1 else rng.choice(word_suffixes(product['name']))
+        prefix = source[:rng.randint(1, 12)]
+        if rng.random() < 0.2:
+            prefix = prefix.upper()
+        prefixes.append(prefix)
+    return prefixes
+
+
+def naive(products, units_sold, prefix, limit):
+    """Référence : parcours de tous les produits"""
+    folded = fold(prefix)
+    matches = []
+    for product in products:
+        sku = fold(product['sku'])
+        keys = word_suffixes(fold(product['name'])) + word_suffixes(sku) + [sku.replace(' ', '')]
+        if any(key.startswith(folded) for key in keys):
+            matches.append(product)
+    matches.sort(key=lambda p: (-units_sold.get(p['id'], 0), p['name'], p['id']))
+    return [p['id'] for p in matches[:limit]]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de l'autocomplétion du catalogue")
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    parser.add_argument('--limit', type=int, default=8)
+    parser.add_argument('--max-p99', type=float, default=2.0, help='p99 maximal accepté (ms)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        print(f"🏗️  {args.products:,} produits en mémoire...")
+        products = build_catalog(args.products)
+
+        started = time.perf_counter()
+        ProductSuggestIndex.rebuild()
+        build = time.perf_counter() - started
+        print(f"📚 Index construit en {build * 1000:.0f} ms "
+              f"({len(ProductSuggestIndex._products):,} clés produits)")
+
+        # Vérification sur quelques préfixes, dont des préfixes très larges
+        units_sold = ProductSuggestIndex._units_sold()
+        for prefix in ('s', 'Ka', 'prot', 'Vitamin D', 'protéine', 'sn-00001', 'sn0000', 'citron 250'):
+            expected = naive(products, units_sold, prefix, args.limit)
+            found = [p['id'] for p in ProductSuggestIndex.suggest(prefix, limit=args.limit)['products']]
+            if found != expected:
+                print(f"❌ '{prefix}' : {found} au lieu de {expected}")
+                return 1
+
+        prefixes = sample_prefixes(products, args.queries)
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            ProductSuggestIndex.suggest(prefix, limit=args.limit)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"🚀 {len(timings):,} suggestions : p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {timings[-1]:.3f} ms")
+
+    if p99 > args.max_p99:
+        print(f"❌ p99 au-dessus de {args.max_p99} ms")
+        return 1
+    print(f"✅ Résultats conformes au parcours naïf, p99 sous {args.max_p99} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Calibration des paramètres de hachage des mots de passe
+
+Mesure le temps d'un hachage sur cette machine et choisit les paramètres
+les plus coûteux qui restent sous la latence cible. Le résultat est à
+placer dans la variable d'environnement PASSWORD_HASH_METHOD ; les hash
+existants sont mis à niveau à la prochaine connexion de chaque utilisateur.
+
+Usage:
+    python calibrate_password_hash.py                   # scrypt, cible 100 ms
+    python calibrate_password_hash.py --target-ms 250
+    python calibrate_password_hash.py --algorithm pbkdf2
+"""
+
+import argparse
+import sys
+import time
+
+from werkzeug.security import generate_password_hash
+
+
+def measure(method, rounds):
+    """Durée médiane d'un hachage en millisecondes"""
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        generate_password_hash('calibration-password', method=method)
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return durations[len(durations) // 2]
+
+
+def scrypt_candidates():
+    # n doit être une puissance de 2 ; r=8, p=1 comme les valeurs par défaut de werkzeug
+    for exponent in range(12, 21):
+        yield f'scrypt:{2 ** exponent}:8:1'
+
+
+def pbkdf2_candidates():
+    for iterations in (100_000, 200_000, 300_000, 400_000, 600_000, 800_000, 1_000_000,
+                       1_500_000, 2_000_000, 3_000_000):
+        yield f'pbkdf2:sha256:{iterations}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration du hachage des mots de passe")
+    parser.add_argument('--algorithm', choices=('scrypt', 'pbkdf2'), default='scrypt')
+    parser.add_argument('--target-ms', type=float, default=100.0, help="latence cible d'un hachage")
+    parser.add_argument('--rounds', type=int, default=3, help="mesures par candidat")
+    args = parser.parse_args()
+
+    candidates = scrypt_candidates() if args.algorithm == 'scrypt' else pbkdf2_candidates()
+    chosen = None
+    print(f"🔐 Calibration {args.algorithm}, cible {args.target_ms:.0f} ms")
+    for method in candidates:
+        try:
+            duration = measure(method, args.rounds)
+        except (ValueError, MemoryError) as e:
+            print(f"   {method:<28} indisponible ({e})")
+            break
+        print(f"   {method:<28} {duration:8.1f} ms")
+        if duration > args.target_ms:
+            break
+        chosen = method
+
+    if chosen is None:
+        print("❌ Aucun paramètre ne respecte la cible sur cette machine")
+        return 1
+
+    print(f"\n✅ Paramètres retenus : {chosen}")
+    print(f"   export PASSWORD_HASH_METHOD='{chosen}'")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
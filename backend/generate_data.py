@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+Générateur de données synthétiques à grande échelle
+
+Remplit la base avec des volumes réalistes (par défaut 1M utilisateurs,
+50k produits, 5M commandes) pour les tests de performance. Le schéma est
+créé par SQLAlchemy, puis les lignes sont insérées par lots avec
+sqlite3.executemany, index secondaires supprimés pendant le chargement
+et recréés à la fin. Le résultat ne dépend que de la graine : deux
+exécutions avec les mêmes paramètres produisent la même base.
+
+Distributions :
+    - inscriptions et commandes en croissance sur la période (plus
+      nombreuses vers la fin) ;
+    - popularité des produits en loi de Zipf ;
+    - commandes réparties sur les comptes déjà inscrits selon une
+      propension d'achat propre à chaque client (loi de Pareto : une
+      minorité de gros clients) ;
+    - statut et historique de statut cohérents avec l'âge de la commande.
+
+ATTENTION : la base cible est entièrement effacée. Elle doit donc être
+désignée explicitement (--database) : la base configurée de l'application
+n'est jamais utilisée par défaut.
+
+Usage:
+    python generate_data.py --database /tmp/bench.db                        # volumes par défaut
+    python generate_data.py --database /tmp/bench.db --users 10000 --products 500 --orders 50000
+    python generate_data.py --database /tmp/bench.db --seed 7
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sqlite3
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+FIRST_NAMES = (
+    'Lucas', 'Emma', 'Hugo', 'Léa', 'Louis', 'Chloé', 'Gabriel', 'Manon', 'Arthur', 'Camille',
+    'Jules', 'Inès', 'Adam', 'Sarah', 'Nathan', 'Jade', 'Léo', 'Louise', 'Raphaël', 'Alice',
+    'Yanis', 'Lina', 'Mohamed', 'Zoé', 'Tom', 'Anna', 'Noah', 'Eva', 'Ethan', 'Rose',
+    'Kenji', 'Yuki', 'Hiroshi', 'Aiko', 'Amine', 'Nour', 'Théo', 'Julia', 'Sacha', 'Mila',
+)
+LAST_NAMES = (
+    'Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+    'Simon', 'Laurent', 'Lefebvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier',
+    'Morel', 'Girard', 'André', 'Mercier', 'Dupont', 'Lambert', 'Bonnet', 'François', 'Martinez', 'Tanaka',
+    'Sato', 'Suzuki', 'Benali', 'Haddad', 'Rousseau', 'Blanc', 'Guerin', 'Muller', 'Henry', 'Roussel',
+)
+CITIES = (
+    ('Paris', '75'), ('Lyon', '69'), ('Marseille', '13'), ('Toulouse', '31'), ('Nice', '06'),
+    ('Nantes', '44'), ('Strasbourg', '67'), ('Montpellier', '34'), ('Bordeaux', '33'), ('Lille', '59'),
+    ('Rennes', '35'), ('Reims', '51'), ('Grenoble', '38'), ('Dijon', '21'), ('Angers', '49'),
+)
+STREETS = ('rue de la Paix', 'avenue Victor Hugo', 'boulevard Voltaire', 'rue Nationale',
+           'rue du Moulin', 'place de la République', 'chemin des Vignes', 'rue Pasteur')
+
+# (catégorie, types de produits, fourchette de prix)
+CATALOG = (
+    ('Protéines', ('Whey Protein', 'Isolate', 'Casein', 'Vegan Protein', 'Protein Bar'), (19.0, 79.0)),
+    ('Pré-entraînement', ('Pre-Workout', 'Pump Formula', 'Caffeine Shot', 'Focus Booster'), (24.0, 54.0)),
+    ('Récupération', ('Recovery Matrix', 'BCAA', 'Glutamine', 'ZMA', 'Electrolytes'), (14.0, 44.0)),
+    ('Performance', ('Creatine', 'Beta-Alanine', 'Citrulline', 'Mass Gainer'), (12.0, 59.0)),
+    ('Vitamines', ('Multivitamin', 'Omega-3', 'Vitamin D3', 'Magnesium', 'Zinc'), (7.0, 29.0)),
+)
+BRANDS = ('Samurai', 'Ronin', 'Shogun', 'Katana', 'Bushido', 'Dojo', 'Sensei', 'Kaizen', 'Zen', 'Ninja')
+FLAVORS = ('Vanille', 'Chocolat', 'Fraise', 'Cookies', 'Neutre', 'Citron', 'Mangue', 'Caramel', 'Matcha')
+SIZES = ('250g', '500g', '1kg', '2kg', '30 doses', '60 gélules', '90 gélules', '120 comprimés')
+
+PAYMENT_METHODS = ('card', 'card', 'card', 'paypal', 'paypal', 'bank_transfer')
+SHIPPING_METHODS = (('standard', 4.99), ('standard', 4.99), ('standard', 4.99), ('express', 9.99), ('pickup', 0.0))
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36',
+)
+
+# Événements d'historique hors achats, avec leur poids relatif
+HISTORY_ACTIONS = (
+    ('login', 'Connexion réussie', 30),
+    ('view_product', 'Consultation du produit {name}', 45),
+    ('add_to_cart', 'Ajout de {name} au panier', 12),
+    ('add_to_wishlist', 'Ajout de {name} à la wishlist', 6),
+    ('remove_from_cart', 'Retrait de {name} du panier', 4),
+    ('logout', 'Déconnexion', 3),
+)
+
+# Chemins de statut d'une commande terminée : (statut final, étapes, poids)
+FINAL_PATHS = (
+    ('delivered', ('pending', 'processing', 'shipped', 'delivered'), 85),
+    ('cancelled', ('pending', 'cancelled'), 8),
+    ('refunded', ('pending', 'processing', 'shipped', 'delivered', 'refunded'), 3),
+    ('shipped', ('pending', 'processing', 'shipped'), 4),
+)
+STATUS_COMMENTS = {
+    'pending': 'Commande créée',
+    'processing': 'Paiement validé, préparation en cours',
+    'shipped': 'Colis remis au transporteur',
+    'delivered': 'Colis livré',
+    'cancelled': 'Commande annulée',
+    'refunded': 'Commande remboursée',
+}
+
+# Tables remplies par le générateur, dans l'ordre des clés étrangères
+TABLES = ('users', 'products', 'bundles', 'orders', 'order_items', 'order_status_history',
+          'user_history', 'carts', 'cart_items', 'wishlists', 'wishlist_items')
+
+
+def ts(value):
+    """Horodatage au format stocké par SQLAlchemy pour les colonnes DateTime"""
+    return value.isoformat(sep=' ', timespec='microseconds')
+
+
+def money(value):
+    return round(value, 2)
+
+
+def growth(rng, index, count):
+    """
+    Position dans la période (0 à 1) du index-ième élément sur count,
+    pour une activité croissant linéairement : les positions sont
+    croissantes, donc les ids suivent l'ordre chronologique.
+    """
+    return math.sqrt((index + rng.random()) / count)
+
+
+class Generator:
+    """Génère et insère les données ; chaque table a son propre tirage aléatoire dérivé de la graine"""
+
+    def __init__(self, conn, args):
+        self.conn = conn
+        self.args = args
+        self.end = datetime(2026, 1, 1) if args.end is None else datetime.fromisoformat(args.end)
+        self.start = self.end - timedelta(days=args.days)
+        self.span = (self.end - self.start).total_seconds()
+
+        # Remplis au fil du chargement, utilisés par les tables suivantes
+        self.user_times = []       # secondes depuis self.start, croissantes
+        self.user_weights = []     # propensités d'achat cumulées (Pareto), 0 pour l'admin
+        self.product_rows = []     # (name, sku, price)
+        self.product_weights = []  # poids cumulés (Zipf)
+
+    # ==================== OUTILS ====================
+
+    def when(self, seconds):
+        return self.start + timedelta(seconds=seconds)
+
+    def insert(self, table, columns, rows):
+        """Insère un itérable de tuples par lots ; retourne le nombre de lignes"""
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        started = time.perf_counter()
+        total = 0
+        rows = iter(rows)
+        self.begin()
+        while True:
+            batch = list(itertools.islice(rows, self.args.batch_size))
+            if not batch:
+                break
+            self.conn.executemany(sql, batch)
+            total += len(batch)
+            if total % (self.args.batch_size * 20) == 0:
+                print(f"   {table}: {total:,} lignes...")
+        self.conn.commit()
+        elapsed = time.perf_counter() - started
+        print(f"✅ {table:<22} {total:>12,} lignes en {elapsed:7.1f} s ({total / max(elapsed, 1e-9):,.0f}/s)")
+        return total
+
+    def begin(self):
+        # Une transaction par table : sans elle, chaque ligne serait validée séparément
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN')
+
+    def pick_product(self, rng):
+        """Id de produit tiré selon la popularité (Zipf)"""
+        return bisect.bisect_left(self.product_weights, rng.random() * self.product_weights[-1]) + 1
+
+    def pick_products(self, rng, count):
+        """count produits distincts tirés selon la popularité"""
+        chosen = []
+        while len(chosen) < count:
+            product_id = self.pick_product(rng)
+            if product_id not in chosen:
+                chosen.append(product_id)
+        return chosen
+
+    def first_customer_time(self):
+        """Instant d'inscription du premier client (l'id 1 est l'admin)"""
+        return self.user_times[1] if len(self.user_times) > 1 else 0.0
+
+    def pick_user(self, rng, seconds):
+        """Id d'un utilisateur inscrit à cet instant, tiré selon sa propension d'achat"""
+        registered = bisect.bisect_right(self.user_times, seconds)
+        if registered <= 1:
+            return 1
+        target = rng.random() * self.user_weights[registered - 1]
+        return bisect.bisect_right(self.user_weights, target) + 1
+
+    # ==================== UTILISATEURS ====================
+
+    def users(self):
+        rng = random.Random(f'{self.args.seed}-users')
+        password_hash = hash_password(self.args.password, self.args.seed)
+        count = self.args.users
+
+        def rows():
+            cumulative = 0.0
+            for index in range(count):
+                seconds = growth(rng, index, count) * self.span
+                self.user_times.append(seconds)
+                # Pareto plafonnée : la plupart commandent peu, quelques-uns beaucoup
+                cumulative += min(rng.paretovariate(1.3), 50.0) if index else 0.0
+                self.user_weights.append(cumulative)
+                created = ts(self.when(seconds))
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                if index == 0:
+                    yield ('admin@samurai-nutrition.com', password_hash, 'Admin', 'Samurai', 'admin', created, created)
+                    continue
+                email = f"{first}.{last}.{index}@example.com".lower()
+                yield (email, password_hash, first, last, 'user', created, created)
+
+        return self.insert('users', ('email', 'password_hash', 'first_name', 'last_name', 'role',
+                                     'created_at', 'updated_at'), rows())
+
+    # ==================== PRODUITS ====================
+
+    def products(self):
+        rng = random.Random(f'{self.args.seed}-products')
+        count = self.args.products
+        # Zipf : le produit de rang r est choisi avec un poids 1 / r^s ; le rang suit l'id
+        cumulative = 0.0
+        for rank in range(1, count + 1):
+            cumulative += 1.0 / rank ** self.args.zipf
+            self.product_weights.append(cumulative)
+
+        def rows():
+            for index in range(count):
+                category, kinds, (low, high) = rng.choice(CATALOG)
+                kind, flavor = rng.choice(kinds), rng.choice(FLAVORS)
+                name = f"{rng.choice(BRANDS)} {kind} {flavor} {rng.choice(SIZES)}"
+                sku = f"SN-{index + 1:07d}"
+                price = money(low + (high - low) * rng.betavariate(2, 3))
+                original = money(price * rng.uniform(1.1, 1.4)) if rng.random() < 0.15 else None
+                self.product_rows.append((name, sku, price))
+                created = ts(self.when(rng.random() * self.span * 0.9))
+                yield (
+                    name, f"{kind} {category.lower()} de la gamme premium, saveur {flavor.lower()}.",
+                    price, original, category, int(rng.expovariate(1 / 120)), 10, sku,
+                    round(rng.uniform(0.2, 2.5), 2), round(rng.uniform(3.0, 5.0), 2), int(rng.expovariate(1 / 40)),
+                    1 if rng.random() < 0.95 else 0, 1 if rng.random() < 0.02 else 0,
+                    f"Ingrédients {kind.lower()}, arômes naturels", created, created
+                )
+
+        return self.insert('products', ('name', 'description', 'price', 'original_price', 'category',
+                                        'stock_quantity', 'low_stock_threshold', 'sku', 'weight',
+                                        'rating', 'review_count', 'is_active', 'featured', 'ingredients',
+                                        'created_at', 'updated_at'), rows())
+
+    def bundles(self):
+        rng = random.Random(f'{self.args.seed}-bundles')
+        now = ts(self.end)
+
+        def rows():
+            for index in range(self.args.bundles):
+                size = rng.randint(2, 4)
+                families = rng.sample(CATALOG, size)
+                items = [{'category': category, 'keyword': rng.choice(kinds).split()[0].lower()}
+                         for category, kinds, _ in families]
+                name = f"Pack {rng.choice(BRANDS)} {' + '.join(c for c, _, _ in families)}"
+                yield (f"pack-{index + 1}", name, f"{name} à prix réduit", rng.choice((5.0, 10.0, 15.0, 20.0)),
+                       None, json.dumps(items, ensure_ascii=False), now, now)
+
+        return self.insert('bundles', ('slug', 'name', 'description', 'discount_percent', 'fixed_price',
+                                       'items', 'created_at', 'updated_at'), rows())
+
+    # ==================== COMMANDES ====================
+
+    def orders(self):
+        """Commandes, lignes et historique de statut générés ensemble, insérés par lots"""
+        rng = random.Random(f'{self.args.seed}-orders')
+        count = self.args.orders
+        recent = self.span - 14 * 86400  # au-delà, les commandes peuvent être encore en cours
+        final_weights = list(itertools.accumulate(weight for _, _, weight in FINAL_PATHS))
+        users_addresses = {}
+
+        order_sql = ("INSERT INTO orders (id, user_id, order_number, total_amount, status, shipping_address, "
+                     "billing_address, payment_method, shipping_method, shipping_cost, tax_amount, "
+                     "discount_amount, payment_status, created_at, updated_at) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+        item_sql = ("INSERT INTO order_items (order_id, product_id, product_name, product_sku, quantity, "
+                    "unit_price, total_price) VALUES (?, ?, ?, ?, ?, ?, ?)")
+        history_sql = ("INSERT INTO order_status_history (order_id, status, comment, created_by, created_at) "
+                       "VALUES (?, ?, ?, ?, ?)")
+        purchase_sql = ("INSERT INTO user_history (user_id, action_type, action_description, order_id, "
+                        "ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+        def address(user_id):
+            # Une adresse stable par client, recalculée à partir de son id
+            cached = users_addresses.get(user_id)
+            if cached is None:
+                local = random.Random(f'{self.args.seed}-address-{user_id}')
+                city, department = local.choice(CITIES)
+                cached = (f"{local.choice(FIRST_NAMES)} {local.choice(LAST_NAMES)}\n"
+                          f"{local.randint(1, 180)} {local.choice(STREETS)}\n"
+                          f"{department}{local.randint(0, 9)}{local.randint(0, 9)}0 {city}\nFrance")
+                if len(users_addresses) > 200_000:
+                    users_addresses.clear()
+                users_addresses[user_id] = cached
+            return cached
+
+        started = time.perf_counter()
+        self.begin()
+        totals = {'orders': 0, 'order_items': 0, 'order_status_history': 0, 'purchases': 0}
+        orders, items, history, purchases = [], [], [], []
+
+        def flush():
+            self.conn.executemany(order_sql, orders)
+            self.conn.executemany(item_sql, items)
+            self.conn.executemany(history_sql, history)
+            self.conn.executemany(purchase_sql, purchases)
+            totals['orders'] += len(orders)
+            totals['order_items'] += len(items)
+            totals['order_status_history'] += len(history)
+            totals['purchases'] += len(purchases)
+            orders.clear(), items.clear(), history.clear(), purchases.clear()
+
+        first_customer = self.first_customer_time()
+        for order_id in range(1, count + 1):
+            seconds = max(growth(rng, order_id - 1, count) * self.span, first_customer)
+            created_at = self.when(seconds)
+            user_id = self.pick_user(rng, seconds)
+
+            # Lignes : 1 article + loi géométrique (moyenne ~2,3 produits distincts)
+            line_count = 1
+            while line_count < 8 and rng.random() < 0.57:
+                line_count += 1
+            subtotal = 0.0
+            for product_id in self.pick_products(rng, min(line_count, self.args.products)):
+                name, sku, price = self.product_rows[product_id - 1]
+                quantity = 1 if rng.random() < 0.7 else rng.randint(2, 4)
+                line_total = money(price * quantity)
+                subtotal += line_total
+                items.append((order_id, product_id, name, sku, quantity, price, line_total))
+
+            shipping_method, shipping_cost = rng.choice(SHIPPING_METHODS)
+            if subtotal >= 60:
+                shipping_cost = 0.0
+            discount = money(subtotal * 0.1) if rng.random() < 0.08 else 0.0
+            total = money(subtotal + shipping_cost - discount)
+
+            if seconds < recent:
+                index = bisect.bisect_left(final_weights, rng.random() * final_weights[-1])
+                status, steps, _ = FINAL_PATHS[index]
+            else:
+                # Commande récente : étape tirée selon l'ancienneté
+                age_days = (self.span - seconds) / 86400
+                steps = ('pending', 'processing', 'shipped', 'delivered')
+                reached = min(len(steps), 1 + int(age_days / 3.5 + rng.random() * 1.5))
+                steps = steps[:reached]
+                status = steps[-1]
+
+            step_time = created_at
+            for step in steps:
+                history.append((order_id, step, STATUS_COMMENTS[step], user_id if step == 'pending' else 1,
+                                ts(step_time)))
+                step_time += timedelta(hours=rng.uniform(2, 60))
+            updated_at = min(step_time, self.end)
+
+            shipping = address(user_id)
+            payment_status = 'pending' if status in ('pending', 'cancelled') else (
+                'refunded' if status == 'refunded' else 'paid')
+            created = ts(created_at)
+            orders.append((order_id, user_id, f"ORD-{int(created_at.timestamp())}-{order_id:07d}", total,
+                           status, shipping, shipping, rng.choice(PAYMENT_METHODS), shipping_method,
+                           shipping_cost, 0.0, discount, payment_status, created, ts(updated_at)))
+            purchases.append((user_id, 'purchase', f"Commande ORD-{order_id:07d} passée", order_id,
+                              f"10.{user_id % 256}.{user_id // 256 % 256}.{rng.randint(1, 254)}",
+                              rng.choice(USER_AGENTS), created))
+
+            if len(orders) >= self.args.batch_size:
+                flush()
+                if totals['orders'] % (self.args.batch_size * 20) == 0:
+                    print(f"   orders: {totals['orders']:,} lignes...")
+        flush()
+        self.conn.commit()
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        print(f"✅ {'orders':<22} {totals['orders']:>12,} commandes, {totals['order_items']:,} lignes, "
+              f"{totals['order_status_history']:,} statuts en {elapsed:7.1f} s ({rows / max(elapsed, 1e-9):,.0f} lignes/s)")
+        return totals['orders']
+
+    # ==================== ACTIVITÉ ====================
+
+    def user_history(self):
+        """Événements de navigation : en moyenne --history-per-user par compte"""
+        rng = random.Random(f'{self.args.seed}-history')
+        weights = list(itertools.accumulate(weight for _, _, weight in HISTORY_ACTIONS))
+        total_events = int(self.args.users * self.args.history_per_user)
+        first_customer = self.first_customer_time()
+
+        def rows():
+            for index in range(total_events):
+                seconds = max(growth(rng, index, total_events) * self.span, first_customer)
+                user_id = self.pick_user(rng, seconds)
+                action, template, _ = HISTORY_ACTIONS[bisect.bisect_left(weights, rng.random() * weights[-1])]
+                product_id = None
+                description = template
+                if '{name}' in template:
+                    product_id = self.pick_product(rng)
+                    description = template.format(name=self.product_rows[product_id - 1][0])
+                yield (user_id, action, description, product_id,
+                       f"10.{user_id % 256}.{user_id // 256 % 256}.{rng.randint(1, 254)}",
+                       rng.choice(USER_AGENTS), ts(self.when(seconds)))
+
+        return self.insert('user_history', ('user_id', 'action_type', 'action_description', 'product_id',
+                                            'ip_address', 'user_agent', 'created_at'), rows())
+
+    def carts_and_wishlists(self):
+        """Paniers et wishlists d'une fraction des comptes, ids des conteneurs alignés sur l'ordre d'insertion"""
+        rng = random.Random(f'{self.args.seed}-carts')
+        for table, item_table, share, max_items in (
+            ('carts', 'cart_items', self.args.cart_share, 4),
+            ('wishlists', 'wishlist_items', self.args.wishlist_share, 8),
+        ):
+            owners = [user_id for user_id in range(1, self.args.users + 1) if rng.random() < share]
+            now = ts(self.end)
+            self.insert(table, ('id', 'user_id', 'created_at', 'updated_at'),
+                        ((container_id, user_id, now, now) for container_id, user_id in enumerate(owners, 1)))
+
+            def items(owners=owners, max_items=max_items, item_table=item_table):
+                for container_id, user_id in enumerate(owners, 1):
+                    added = ts(self.when(self.user_times[user_id - 1] + rng.random() *
+                                         (self.span - self.user_times[user_id - 1])))
+                    for product_id in self.pick_products(rng, min(rng.randint(1, max_items), self.args.products)):
+                        if item_table == 'cart_items':
+                            yield (container_id, product_id, 1 if rng.random() < 0.8 else rng.randint(2, 3), added)
+                        else:
+                            yield (container_id, product_id, added)
+
+            columns = ('cart_id', 'product_id', 'quantity', 'added_at') if item_table == 'cart_items' \
+                else ('wishlist_id', 'product_id', 'added_at')
+            self.insert(item_table, columns, items())
+
+
+def hash_password(password, seed):
+    """
+    Un seul hachage pour tous les comptes générés (le coût scrypt rendrait
+    1M hachages interminables)
+
+    Même format que generate_password_hash (méthode$sel$empreinte), mais
+    le sel est tiré de la graine : deux exécutions avec la même graine
+    produisent la même table users. Une méthode autre que scrypt ou pbkdf2
+    passe par generate_password_hash (sel aléatoire).
+    """
+    import hashlib
+    from src.services.password_hasher import PasswordHasher
+    from werkzeug.security import generate_password_hash
+
+    method = PasswordHasher.method()
+    name, *params = method.split(':')
+    rng = random.Random(f'{seed}-password-salt')
+    salt = ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(16))
+
+    if name == 'scrypt':
+        n, r, p = (int(value) for value in params)
+        hashed = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                                maxmem=132 * n * r * p, dklen=64)
+    elif name == 'pbkdf2':
+        digest, iterations = params
+        hashed = hashlib.pbkdf2_hmac(digest, password.encode(), salt.encode(), int(iterations))
+    else:
+        return generate_password_hash(password, method=method)
+    return f"{method}${salt}${hashed.hex()}"
+
+
+def drop_secondary_indexes(conn):
+    """Supprime les index explicites des tables chargées ; retourne leur DDL pour les recréer"""
+    placeholders = ', '.join('?' * len(TABLES))
+    indexes = conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type='index' AND sql IS NOT NULL "
+        f"AND tbl_name IN ({placeholders})", TABLES
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques pour les tests de charge")
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--products', type=int, default=50_000)
+    parser.add_argument('--orders', type=int, default=5_000_000)
+    parser.add_argument('--bundles', type=int, default=200)
+    parser.add_argument('--history-per-user', type=float, default=5.0,
+                        help="événements de navigation moyens par compte (hors achats)")
+    parser.add_argument('--cart-share', type=float, default=0.10, help="part des comptes avec un panier")
+    parser.add_argument('--wishlist-share', type=float, default=0.15, help="part des comptes avec une wishlist")
+    parser.add_argument('--zipf', type=float, default=1.07, help="exposant de popularité des produits")
+    parser.add_argument('--days', type=int, default=730, help="durée couverte par les données")
+    parser.add_argument('--end', default=None, help="date de fin ISO (défaut 2026-01-01)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--password', default='password123', help="mot de passe de tous les comptes générés")
+    parser.add_argument('--database', required=True,
+                        help="fichier SQLite cible, entièrement effacé (jamais la base de l'application par défaut)")
+    args = parser.parse_args()
+    if args.users < 1 or args.products < 1:
+        parser.error("--users et --products doivent être au moins 1")
+    if args.orders < 0:
+        parser.error("--orders ne peut pas être négatif")
+    return args
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.database)}"
+    # Pas de thread d'écriture d'historique : le générateur écrit directement
+    os.environ.setdefault('HISTORY_WRITER_ENABLED', '0')
+
+    from src.main_fixed import app
+    from src.extensions import db
+    from src.services.product_search import ProductSearchIndex
+    from src.services.admin_search import AdminSearchIndex
+    from src.services.dashboard_rollups import DashboardRollups
+
+    print(f"🚀 Génération : {args.users:,} utilisateurs, {args.products:,} produits, "
+          f"{args.orders:,} commandes (graine {args.seed})")
+    started = time.perf_counter()
+
+    with app.app_context():
+        path = db.engine.url.database
+        if not path or path == ':memory:':
+            print("❌ Le générateur nécessite une base SQLite sur disque")
+            return 1
+        db.drop_all()
+        db.create_all()
+        db.session.remove()
+        db.engine.dispose()
+        print(f"🗄️ Schéma recréé dans {path}")
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        # Chargement en vrac : pas de journal ni de fsync, la base est jetable jusqu'à la fin
+        for pragma in ('journal_mode = OFF', 'synchronous = OFF', 'temp_store = MEMORY',
+                       'cache_size = -262144', 'locking_mode = EXCLUSIVE', 'foreign_keys = OFF'):
+            conn.execute(f'PRAGMA {pragma}')
+        indexes = drop_secondary_indexes(conn)
+
+        generator = Generator(conn, args)
+        for step in (generator.users, generator.products, generator.bundles, generator.orders,
+                     generator.user_history, generator.carts_and_wishlists):
+            step()
+
+        index_started = time.perf_counter()
+        conn.execute('BEGIN')
+        for sql in indexes:
+            conn.execute(sql)
+        conn.execute('COMMIT')
+        conn.execute('ANALYZE')
+        print(f"✅ {len(indexes)} index recréés et statistiques calculées en "
+              f"{time.perf_counter() - index_started:.1f} s")
+    finally:
+        conn.close()
+
+    with app.app_context():
+        derived_started = time.perf_counter()
+        ProductSearchIndex.rebuild()
+        AdminSearchIndex.rebuild()
+        DashboardRollups.rebuild()
+        db.session.commit()
+        print(f"✅ Index de recherche et agrégats reconstruits en {time.perf_counter() - derived_started:.1f} s")
+
+    elapsed = time.perf_counter() - started
+    print("\n" + "=" * 60)
+    print(f"🎉 Base générée en {elapsed / 60:.1f} min : {path}")
+    print(f"   Compte admin : admin@samurai-nutrition.com / {args.password}")
+    print(f"   Autres comptes : <email>@example.com / {args.password}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
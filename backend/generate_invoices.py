@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Génération en masse des factures PDF d'une période (clôture mensuelle)
+
+Rend dans le cache des factures toutes les commandes créées dans la
+période, en parallèle dans INVOICE_RENDER_WORKERS processus. Les factures
+déjà à jour dans le cache sont ignorées : relancer la commande après une
+interruption reprend là où elle s'était arrêtée.
+
+Usage:
+    python generate_invoices.py --month 2026-09
+    python generate_invoices.py --start 2026-09-01 --end 2026-10-01 --workers 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Génération en masse des factures")
+    parser.add_argument('--month', help="mois à traiter (AAAA-MM)")
+    parser.add_argument('--start', help="date de début incluse (AAAA-MM-JJ)")
+    parser.add_argument('--end', help="date de fin exclue (AAAA-MM-JJ)")
+    parser.add_argument('--workers', type=int, default=None, help="processus de rendu (défaut INVOICE_RENDER_WORKERS)")
+    parser.add_argument('--include-cancelled', action='store_true', help="inclure les commandes annulées")
+    args = parser.parse_args()
+
+    if args.month:
+        start = datetime.strptime(args.month, '%Y-%m')
+        end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    elif args.start and args.end:
+        start, end = datetime.fromisoformat(args.start), datetime.fromisoformat(args.end)
+    else:
+        parser.error("indiquez --month ou --start et --end")
+    if end <= start:
+        parser.error("la fin de période doit suivre le début")
+    return args, start, end
+
+
+def main():
+    args, start, end = parse_args()
+    if args.workers is not None:
+        os.environ['INVOICE_RENDER_WORKERS'] = str(args.workers)
+    os.environ.setdefault('HISTORY_WRITER_ENABLED', '0')
+
+    from src.main_fixed import app
+    from src.services.invoices import InvoiceService
+
+    print(f"🧾 Factures du {start:%d/%m/%Y} au {end:%d/%m/%Y} (exclu), "
+          f"{InvoiceService.workers()} processus de rendu")
+    started = time.perf_counter()
+
+    def progress(counts):
+        done = counts['rendered'] + counts['cached'] + counts['failed']
+        elapsed = time.perf_counter() - started
+        print(f"   {done:,} commandes traitées ({counts['rendered']:,} rendues, {counts['cached']:,} en cache, "
+              f"{counts['failed']:,} en échec) - {counts['rendered'] / max(elapsed, 1e-9):,.0f} factures/s")
+
+    with app.app_context():
+        try:
+            counts = InvoiceService.generate_range(start, end, include_cancelled=args.include_cancelled,
+                                                   progress=progress)
+        finally:
+            InvoiceService.shutdown()
+        cache_dir = InvoiceService.cache_dir()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {counts['rendered']:,} factures rendues, {counts['cached']:,} déjà en cache, "
+          f"{counts['failed']:,} en échec en {elapsed:.1f} s")
+    print(f"   Cache : {cache_dir}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
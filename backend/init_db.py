@@ -10,6 +10,9 @@ from src.models.user import User
 from src.models.product import Product
 from src.models.wishlist_cart import Wishlist, WishlistItem, Cart, CartItem
 from src.models.user_history import UserHistory
+from src.services.product_search import ProductSearchIndex
+from src.services.admin_search import AdminSearchIndex
+from src.services.dashboard_rollups import DashboardRollups
 from werkzeug.security import generate_password_hash
 
 def init_database():
@@ -169,6 +172,13 @@ def init_database():
 
         # Commiter l'historique
         db.session.commit()
+        # Reconstruire les index de recherche (produits, admin)
+        ProductSearchIndex.rebuild()
+        AdminSearchIndex.rebuild()
+        # Recalculer les agrégats du tableau de bord
+        DashboardRollups.rebuild()
+        db.session.commit()
+
         print("🛒 Wishlists et paniers créés")
         print("📊 Historique utilisateur créé")
         print("🎉 Base de données initialisée avec succès!")
@@ -17,6 +17,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # from src.main import create_app, db  # Comment out this line
 from src.main_fixed import app, db  # Use this line instead
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.admin_search import AdminSearchIndex
 
 if __name__ == '__main__':
     # Since we're importing the app directly, we don't need to create it
@@ -24,10 +26,22 @@ if __name__ == '__main__':
         # Create the tables
         db.create_all()
         
+        # Index trigrammes des recherches admin (créés au démarrage, jamais pendant une requête)
+        if AdminSearchIndex.ensure_schema():
+            db.session.commit()
+        
+        # Agrégats du tableau de bord (construits s'ils sont absents)
+        DashboardRollups.ensure_built()
+        
         print("🚀 Serveur Samurai Nutrition demarre!")
         print("📊 Dashboard admin: http://localhost:5000/api/admin/dashboard")
         print("👤 Compte admin: admin@samurai-nutrition.com / admin123")
         print("👤 Compte client: john@example.com / password123")
     
+    # Worker des notifications (outbox) : uniquement dans le processus servi par le reloader
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from src.services.outbox_worker import init_outbox_worker
+        init_outbox_worker(app)
+    
     # Démarrer le serveur
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
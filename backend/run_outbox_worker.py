@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Worker des notifications (outbox) dans un processus séparé
+
+Usage:
+    python run_outbox_worker.py          # tourne en continu
+    python run_outbox_worker.py --once   # traite les messages disponibles puis s'arrête
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le répertoire courant au PYTHONPATH
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main_fixed import app, db
+from src.services.outbox_worker import OutboxWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker des notifications (outbox)")
+    parser.add_argument('--once', action='store_true', help="traiter les messages disponibles puis quitter")
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+
+    worker = OutboxWorker(app)
+    if args.once:
+        processed = worker.process_pending()
+        print(f"📬 {processed} message(s) traité(s)")
+        return 0
+
+    print("📬 Worker de l'outbox démarré (Ctrl+C pour arrêter)")
+    worker.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Arrêt du worker...")
+        worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,9 @@ from src.extensions import db
 from src.models.user import User
 from src.models.product import Product
 from src.models.order import Order, OrderItem, OrderStatusHistory, AdminLog
+from src.services.product_search import ProductSearchIndex
+from src.services.admin_search import AdminSearchIndex
+from src.services.dashboard_rollups import DashboardRollups
 
 def backup_database():
     """Crée une sauvegarde de la base de données actuelle"""
@@ -113,6 +116,18 @@ def create_new_tables():
         print(f"❌ Erreur lors de la création des tables: {e}")
         db.session.rollback()
 
+def create_missing_indexes():
+    """Crée les index déclarés sur les modèles mais absents des tables existantes"""
+    print("\n🔄 Création des index manquants...")
+    
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=db.engine, checkfirst=True)
+            except Exception as e:
+                print(f"❌ Erreur lors de la création de l'index {index.name}: {e}")
+    print("✅ Index vérifiés")
+
 def create_admin_user():
     """Crée un utilisateur administrateur par défaut"""
     print("\n🔄 Création de l'utilisateur administrateur...")
@@ -165,6 +180,31 @@ def update_existing_products():
         print(f"❌ Erreur lors de la mise à jour des produits: {e}")
         db.session.rollback()
 
+def rebuild_search_index():
+    """Reconstruit les index de recherche (produits, utilisateurs et commandes admin)"""
+    print("\n🔄 Reconstruction des index de recherche...")
+    
+    try:
+        ProductSearchIndex.rebuild()
+        AdminSearchIndex.rebuild()
+        db.session.commit()
+        print("✅ Index de recherche reconstruits")
+    except Exception as e:
+        print(f"❌ Erreur lors de la reconstruction de l'index: {e}")
+        db.session.rollback()
+
+def rebuild_dashboard_rollups():
+    """Recalcule les agrégats journaliers du tableau de bord"""
+    print("\n🔄 Reconstruction des agrégats du tableau de bord...")
+    
+    try:
+        DashboardRollups.rebuild()
+        db.session.commit()
+        print("✅ Agrégats du tableau de bord reconstruits")
+    except Exception as e:
+        print(f"❌ Erreur lors de la reconstruction des agrégats: {e}")
+        db.session.rollback()
+
 def verify_migration():
     """Vérifie que la migration s'est bien déroulée"""
     print("\n🔍 Vérification de la migration...")
@@ -225,13 +265,21 @@ def main():
             # 3. Création des nouvelles tables
             create_new_tables()
             
+            create_missing_indexes()
+            
             # 4. Création de l'utilisateur admin
             create_admin_user()
             
             # 5. Mise à jour des données existantes
             update_existing_products()
             
-            # 6. Vérification
+            # 6. Index de recherche
+            rebuild_search_index()
+            
+            # 7. Agrégats du tableau de bord
+            rebuild_dashboard_rollups()
+            
+            # 8. Vérification
             verify_migration()
             
             print("\n" + "=" * 60)
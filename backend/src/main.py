@@ -19,10 +19,22 @@ def create_app():
     app.config["JWT_SECRET_KEY"] = "your-secret-key-here"  # Même clé que SECRET_KEY
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
     
+    # Sérialisation JSON (orjson, Decimal/datetime natifs, fragments pré-encodés)
+    from src.services.json_provider import init_json_provider
+    init_json_provider(app)
+    
     # Initialisation des extensions
     db.init_app(app)
     jwt.init_app(app)
     
+    # Métriques par endpoint (latence, SQL, taille) et en-tête Server-Timing
+    from src.services.metrics import init_metrics
+    init_metrics(app)
+    
+    # Compression brotli/gzip des réponses (enregistrée après les métriques : la taille mesurée est celle envoyée)
+    from src.services.compression import init_compression
+    init_compression(app)
+    
     # Configuration CORS
     CORS(app,
           origins=["http://localhost:5173", "http://localhost:3000", "http://127.0.0.1:5173"],
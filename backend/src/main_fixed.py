@@ -10,17 +10,29 @@ app = Flask(__name__)
 # Configuration
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "default-dev-key-do-not-use-in-production")
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", app.config["SECRET_KEY"])
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///nutrition.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///nutrition.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["JWT_SECRET_KEY"] = "jwt-secret-string"
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
 
+# Sérialisation JSON (orjson, Decimal/datetime natifs, fragments pré-encodés)
+from src.services.json_provider import init_json_provider
+init_json_provider(app)
+
 # Initialisation des extensions
 from src.extensions import db
 db.init_app(app)
 # Add these lines after initializing the JWT manager (around line 20)
 jwt = JWTManager(app)
 
+# Métriques par endpoint (latence, SQL, taille) et en-tête Server-Timing
+from src.services.metrics import init_metrics
+init_metrics(app)
+
+# Compression brotli/gzip des réponses (enregistrée après les métriques : la taille mesurée est celle envoyée)
+from src.services.compression import init_compression
+init_compression(app)
+
 # JWT error handlers
 @jwt.unauthorized_loader
 def missing_token_callback(error):
@@ -60,6 +72,11 @@ from src.models.user import User
 from src.models.product import Product
 from src.models.order import Order, OrderItem, OrderStatusHistory, AdminLog
 from src.models.bundle import Bundle
+from src.models.outbox import OutboxMessage
+from src.models.stats import DailySalesRollup, DailyUserRollup, DailyProductSales
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.admin_search import AdminSearchIndex
+from src.services.product_cards import ProductCardCache
 
 # Import des routes
 from src.routes.auth import auth_bp
@@ -82,12 +99,17 @@ app.register_blueprint(admin_bp, url_prefix='/api')
 app.register_blueprint(products_bp, url_prefix='/api')  # Add this line
 app.register_blueprint(bundles_bp, url_prefix='/api')
 
+# Historique utilisateur écrit par lots hors du chemin des requêtes
+if os.environ.get('HISTORY_WRITER_ENABLED', '1') != '0':
+    from src.services.history_writer import init_history_writer
+    init_history_writer(app)
+
 @app.route('/api/products', methods=['GET'])
 def get_products():
     """Récupérer tous les produits actifs"""
     try:
-        products = Product.query.filter_by(is_active=True).all()
-        return jsonify([product.to_dict() for product in products])
+        products = Product.query.filter_by(is_active=True).order_by(Product.id)
+        return jsonify(ProductCardCache.cards(products))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -98,7 +120,7 @@ def get_product(product_id):
         product = Product.query.get_or_404(product_id)
         if not product.is_active:
             return jsonify({'error': 'Produit non disponible'}), 404
-        return jsonify(product.to_dict())
+        return jsonify(ProductCardCache.card(product))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -247,9 +269,21 @@ if __name__ == '__main__':
         # Créer toutes les tables
         db.create_all()
         
+        # Index trigrammes des recherches admin (créés au démarrage, jamais pendant une requête)
+        if AdminSearchIndex.ensure_schema():
+            db.session.commit()
+        
         # Créer les données d'exemple
         create_sample_data()
         
+        # Agrégats du tableau de bord (construits s'ils sont absents)
+        DashboardRollups.ensure_built()
+        
+        # Worker des notifications (outbox), une seule fois avec le reloader
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            from src.services.outbox_worker import init_outbox_worker
+            init_outbox_worker(app)
+        
         print("✅ Base de données initialisée avec succès!")
         print("🌐 Serveur démarré sur http://localhost:5000")
         print("📊 Health check: http://localhost:5000/api/health")
@@ -1,11 +1,17 @@
 from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload, joinedload
 from src.extensions import db
 import decimal
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Commandes d'un client, plus récentes d'abord (listes, statistiques du compte)
+        db.Index('ix_orders_user_created', 'user_id', 'created_at'),
+        # Liste admin paginée par (created_at, id)
+        db.Index('ix_orders_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     order_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -36,6 +42,23 @@ class Order(db.Model):
         random_num = random.randint(1000, 9999)
         return f"ORD-{timestamp}-{random_num}"
 
+    @staticmethod
+    def loader_options(details=True, user=False):
+        """
+        Stratégies de chargement explicites pour les listes et détails de commandes
+
+        Les lignes et l'historique sont chargés par selectinload (une requête
+        IN par relation pour toute la page) et le client par joinedload : le
+        nombre de requêtes ne dépend plus du nombre de commandes.
+        """
+        options = []
+        if details:
+            options.append(selectinload(Order.order_items))
+            options.append(selectinload(Order.status_history))
+        if user:
+            options.append(joinedload(Order.user))
+        return options
+
     def to_dict(self):
         # Convertir les types Decimal en float pour la sérialisation JSON
         result = {
@@ -62,6 +85,9 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -88,6 +114,9 @@ class OrderItem(db.Model):
 
 class OrderStatusHistory(db.Model):
     __tablename__ = 'order_status_history'
+    __table_args__ = (
+        db.Index('ix_order_status_history_order_id', 'order_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
     status = db.Column(db.String(50), nullable=False)
@@ -110,6 +139,10 @@ class OrderStatusHistory(db.Model):
 
 class AdminLog(db.Model):
     __tablename__ = 'admin_logs'
+    __table_args__ = (
+        # Journal paginé par (created_at, id)
+        db.Index('ix_admin_logs_created_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)
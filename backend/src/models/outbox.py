@@ -0,0 +1,46 @@
+from src.extensions import db
+from datetime import datetime
+
+class OutboxMessage(db.Model):
+    """
+    Message à traiter hors requête (notifications email)
+
+    Les messages sont écrits dans la même transaction que l'action qui les
+    produit (création de commande, changement de statut) puis traités par
+    le worker de l'outbox (src/services/outbox_worker.py).
+    """
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_available', 'status', 'available_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # 'order_created', 'order_status_changed', 'email'
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'processing', 'sent', 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # prochaine tentative ou fin du bail
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'available_at': self.available_at.isoformat() if self.available_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
+
+    @classmethod
+    def enqueue(cls, kind, payload):
+        """Ajoute un message à l'outbox dans la transaction courante (sans commit)"""
+        message = cls(kind=kind, payload=payload, status='pending', available_at=datetime.utcnow())
+        db.session.add(message)
+        # Pas de commit ici : le message est validé avec l'écriture qui l'a produit
+        return message
@@ -5,6 +5,16 @@ from src.extensions import db
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Index couvrants pour la pagination par curseur du catalogue
+        db.Index('ix_products_active_id', 'is_active', 'id'),
+        db.Index('ix_products_active_price_id', 'is_active', 'price', 'id'),
+        db.Index('ix_products_active_name_id', 'is_active', 'name', 'id'),
+        db.Index('ix_products_active_created_id', 'is_active', 'created_at', 'id'),
+        db.Index('ix_products_category_active_id', 'category', 'is_active', 'id'),
+        # Liste admin (tous statuts) paginée par (created_at, id)
+        db.Index('ix_products_created_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
@@ -39,31 +49,51 @@ class Product(db.Model):
     def __repr__(self):
         return f'<Product {self.name}>'
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'price': float(self.price) if self.price else 0.0,
-            'original_price': float(self.original_price) if self.original_price else None,
-            'image_url': self.image_url,
-            'category': self.category,
-            'stock_quantity': self.stock_quantity,
-            'low_stock_threshold': self.low_stock_threshold,
-            'sku': self.sku,
-            'weight': float(self.weight) if self.weight else None,
-            'dimensions': self.dimensions,
-            'rating': float(self.rating) if self.rating else 0.0,
-            'review_count': self.review_count,
-            'is_active': self.is_active,
-            'featured': self.featured,
-            'product_benefits': self.product_benefits,
-            'directions': self.directions,
-            'ingredients': self.ingredients,
-            'nutrition_facts': self.nutrition_facts,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    # Champs exposés par l'API, dans l'ordre de sérialisation
+    PUBLIC_FIELDS = (
+        'id', 'name', 'description', 'price', 'original_price', 'image_url', 'category',
+        'stock_quantity', 'low_stock_threshold', 'sku', 'weight', 'dimensions', 'rating',
+        'review_count', 'is_active', 'featured', 'product_benefits', 'directions',
+        'ingredients', 'nutrition_facts', 'created_at', 'updated_at'
+    )
+    # Colonnes volumineuses, jamais lues par les vues liste
+    HEAVY_FIELDS = ('description', 'product_benefits', 'directions', 'ingredients', 'nutrition_facts')
+    LIST_FIELDS = (
+        'id', 'name', 'price', 'original_price', 'image_url', 'category', 'stock_quantity',
+        'low_stock_threshold', 'sku', 'weight', 'dimensions', 'rating', 'review_count',
+        'is_active', 'featured', 'created_at', 'updated_at'
+    )
+    
+    @classmethod
+    def parse_fields(cls, value):
+        """Convertit le paramètre fields=a,b,c en tuple de champs valides (id toujours inclus)"""
+        if not value:
+            return None
+        requested = [f.strip() for f in value.split(',') if f.strip()]
+        unknown = [f for f in requested if f not in cls.PUBLIC_FIELDS]
+        if unknown:
+            raise ValueError(f'Champs inconnus: {", ".join(unknown)}')
+        return tuple(f for f in cls.PUBLIC_FIELDS if f == 'id' or f in requested)
+    
+    @classmethod
+    def load_only_fields(cls, fields):
+        """Option de chargement qui ne lit que les colonnes demandées (les autres restent différées)"""
+        from sqlalchemy.orm import load_only
+        return load_only(*[getattr(cls, f) for f in fields])
+    
+    def to_dict(self, fields=None):
+        fields = fields or self.PUBLIC_FIELDS
+        return {field: self._serialize_field(field) for field in fields}
+    
+    def _serialize_field(self, field):
+        value = getattr(self, field)
+        if field in ('price', 'rating'):
+            return float(value) if value else 0.0
+        if field in ('original_price', 'weight'):
+            return float(value) if value else None
+        if field in ('created_at', 'updated_at'):
+            return value.isoformat() if value else None
+        return value
     
     def is_in_stock(self, quantity=1):
         """Vérifie si le produit est en stock pour la quantité demandée"""
@@ -0,0 +1,29 @@
+from src.extensions import db
+
+
+class DailySalesRollup(db.Model):
+    """Commandes et chiffre d'affaires agrégés par jour et par statut"""
+    __tablename__ = 'daily_sales_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.DECIMAL(12, 2), nullable=False, default=0)
+
+
+class DailyUserRollup(db.Model):
+    """Nombre d'inscriptions par jour"""
+    __tablename__ = 'daily_user_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailyProductSales(db.Model):
+    """Unités vendues par jour et par produit"""
+    __tablename__ = 'daily_product_sales'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    product_name = db.Column(db.String(255), nullable=False)  # Nom au moment de la vente
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Liste admin paginée par (created_at, id)
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -13,6 +17,19 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Permissions accordées à tous les utilisateurs
+    DEFAULT_PERMISSIONS = ('view_own_orders',)
+    
+    # Permissions spécifiques aux administrateurs
+    ADMIN_PERMISSIONS = (
+        'view_all_orders',
+        'update_order_status',
+        'manage_products',
+        'manage_users',
+        'view_dashboard',
+        'view_admin_logs'
+    )
+    
     def __repr__(self):
         return f'<User {self.email}>'
     
@@ -28,14 +45,19 @@ class User(db.Model):
         }
     
     def check_password(self, password):
-        """Vérifie le mot de passe"""
-        from werkzeug.security import check_password_hash
-        return check_password_hash(self.password_hash, password)
+        """Vérifie le mot de passe (calcul dans le pool de hachage)"""
+        from src.services.password_hasher import PasswordHasher
+        return PasswordHasher.verify(self.password_hash, password)
     
     def set_password(self, password):
-        """Définit le mot de passe"""
-        from werkzeug.security import generate_password_hash
-        self.password_hash = generate_password_hash(password)
+        """Définit le mot de passe (calcul dans le pool de hachage)"""
+        from src.services.password_hasher import PasswordHasher
+        self.password_hash = PasswordHasher.hash(password)
+    
+    def password_needs_rehash(self):
+        """Vrai si le hash stocké utilise d'anciens paramètres"""
+        from src.services.password_hasher import PasswordHasher
+        return PasswordHasher.needs_rehash(self.password_hash)
         
     def has_permission(self, permission):
         """Vérifie si l'utilisateur a une permission spécifique
@@ -51,26 +73,14 @@ class User(db.Model):
         - 'manage_users': Gérer les utilisateurs (admin)
         - 'view_own_orders': Voir ses propres commandes (user, admin)
         """
-        # Permissions par défaut pour tous les utilisateurs
-        default_permissions = ['view_own_orders']
-        
-        # Permissions spécifiques aux administrateurs
-        admin_permissions = [
-            'view_all_orders',
-            'update_order_status',
-            'manage_products',
-            'manage_users',
-            'view_dashboard',
-            'view_admin_logs'
-        ]
-        
-        if permission in default_permissions:
-            return True
-            
-        if self.role == 'admin' and permission in admin_permissions:
-            return True
-            
-        return False
+        return permission in self.permissions_for_role(self.role)
+    
+    @classmethod
+    def permissions_for_role(cls, role):
+        """Liste des permissions associées à un rôle"""
+        if role == 'admin':
+            return list(cls.DEFAULT_PERMISSIONS + cls.ADMIN_PERMISSIONS)
+        return list(cls.DEFAULT_PERMISSIONS)
     
     def is_admin(self):
         """Vérifie si l'utilisateur est un administrateur"""
@@ -101,3 +111,19 @@ class User(db.Model):
         except jwt.InvalidTokenError:
             return None  # Token invalide
 
+
+
+class IdentityRevocation(db.Model):
+    """
+    Changement de rôle ou suppression d'un utilisateur
+
+    Les tokens émis avant revoked_at ne font plus foi pour le rôle : chaque
+    processus relit ces lignes périodiquement (IdentityCache), y compris
+    après un redémarrage. Pas de clé étrangère : la ligne survit à la
+    suppression de l'utilisateur.
+    """
+    __tablename__ = 'identity_revocations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
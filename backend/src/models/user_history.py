@@ -1,8 +1,13 @@
+from flask import current_app
 from src.extensions import db
 from datetime import datetime
 
 class UserHistory(db.Model):
     __tablename__ = 'user_history'
+    __table_args__ = (
+        # Historique d'un utilisateur paginé par (created_at, id)
+        db.Index('ix_user_history_user_created_id', 'user_id', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action_type = db.Column(db.String(50), nullable=False)  # 'login', 'logout', 'purchase', 'view_product', etc.
@@ -33,16 +38,27 @@ class UserHistory(db.Model):
 
     @classmethod
     def log_action(cls, user_id, action_type, action_description, product_id=None, order_id=None, ip_address=None, user_agent=None):
-        """Méthode utilitaire pour enregistrer une action dans l'historique"""
-        history_entry = cls(
-            user_id=user_id,
-            action_type=action_type,
-            action_description=action_description,
-            product_id=product_id,
-            order_id=order_id,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        """
+        Méthode utilitaire pour enregistrer une action dans l'historique
+
+        Si l'écrivain d'historique est démarré, l'événement est écrit plus
+        tard par lots (src/services/history_writer.py) et None est retourné.
+        Sinon, ou si sa file est pleine, l'entrée est écrite immédiatement.
+        """
+        values = {
+            'user_id': user_id,
+            'action_type': action_type,
+            'action_description': action_description,
+            'product_id': product_id,
+            'order_id': order_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent
+        }
+        writer = current_app.extensions.get('history_writer')
+        if writer is not None and writer.running and writer.enqueue(values):
+            return None
+
+        history_entry = cls(**values)
         db.session.add(history_entry)
         db.session.commit()
         return history_entry 
\ No newline at end of file
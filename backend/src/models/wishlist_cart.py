@@ -48,6 +48,24 @@ class Cart(db.Model):
 
     items = db.relationship('CartItem', backref='cart', lazy=True, cascade='all, delete-orphan')
 
+    @classmethod
+    def for_user(cls, user_id):
+        """
+        Panier de l'utilisateur avec ses lignes et leurs produits en une seule requête
+
+        Les lignes et les produits sont chargés par la même jointure externe :
+        to_dict() ne déclenche plus de requête par ligne.
+        """
+        from sqlalchemy.orm import contains_eager
+        from src.models.product import Product
+
+        carts = cls.query.outerjoin(cls.items).outerjoin(CartItem.product).options(
+            contains_eager(cls.items).contains_eager(CartItem.product).load_only(
+                Product.name, Product.price, Product.image_url, Product.stock_quantity, Product.is_active
+            )
+        ).filter(cls.user_id == user_id).order_by(CartItem.id).all()
+        return carts[0] if carts else None
+
     def to_dict(self):
         return {
             'id': self.id,
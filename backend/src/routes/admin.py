@@ -1,11 +1,23 @@
 from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
-from sqlalchemy import desc, func, and_, or_
+from sqlalchemy import desc, func, and_, or_, select
+from sqlalchemy.orm import contains_eager
 from src.extensions import db
 from src.models.user import User
 from src.models.product import Product
 from src.models.order import Order, OrderItem, OrderStatusHistory, AdminLog
+from src.services.product_search import ProductSearchIndex
+from src.services.admin_search import AdminSearchIndex
+from src.services.catalog_cache import CatalogSnapshot
+from src.services.product_cards import ProductCardCache
+from src.services.product_facets import ProductFacetIndex
+from src.services.product_suggest import ProductSuggestIndex
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.identity import current_identity, IdentityCache
+from src.services.metrics import RequestMetrics
+from src.services.exports import TabularExport, ExportError
+from src.services.pagination import CountCache, paginate_list
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -15,16 +27,76 @@ def require_admin():
         from functools import wraps
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            user = current_identity()
             
-            if not user or user.role != 'admin':
+            if not user or not user.is_admin():
                 return jsonify({'error': 'Accès administrateur requis'}), 403
             
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def apply_order_filters(query, args, user_joined=False):
+    """
+    Filtres de la liste des commandes admin (search, status, start_date, end_date)
+
+    Partagés par la liste paginée et les exports. Retourne la requête
+    filtrée et un booléen indiquant si la table users est jointe.
+    """
+    search = args.get('search', '')
+    status = args.get('status', '')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    
+    if search:
+        # Index trigrammes ; ILIKE seulement pour les saisies de moins de 3 caractères
+        condition = AdminSearchIndex.order_condition(search)
+        if condition is not None:
+            query = query.filter(condition)
+        else:
+            if not user_joined:
+                query = query.join(User, Order.user_id == User.id)
+                user_joined = True
+            query = query.filter(
+                or_(
+                    Order.order_number.ilike(f'%{search}%'),
+                    User.email.ilike(f'%{search}%'),
+                    User.first_name.ilike(f'%{search}%'),
+                    User.last_name.ilike(f'%{search}%')
+                )
+            )
+    
+    if status:
+        query = query.filter(Order.status == status)
+    
+    if start_date:
+        query = query.filter(Order.created_at >= datetime.fromisoformat(start_date))
+    
+    if end_date:
+        query = query.filter(Order.created_at <= datetime.fromisoformat(end_date))
+    
+    return query, user_joined
+
+def apply_user_filters(query, args):
+    """Filtres de la liste des utilisateurs admin (search, role), partagés avec les exports"""
+    search = args.get('search', '')
+    role = args.get('role', '')
+    
+    if search:
+        condition = AdminSearchIndex.user_condition(search)
+        if condition is None:
+            condition = or_(
+                User.first_name.ilike(f'%{search}%'),
+                User.last_name.ilike(f'%{search}%'),
+                User.email.ilike(f'%{search}%')
+            )
+        query = query.filter(condition)
+    
+    if role:
+        query = query.filter(User.role == role)
+    
+    return query
+
 # ==================== DASHBOARD ====================
 
 @admin_bp.route('/admin/dashboard/stats', methods=['GET'])
@@ -37,46 +109,11 @@ def get_dashboard_stats():
         days = request.args.get('days', 30, type=int)
         start_date = datetime.now() - timedelta(days=days)
         
-        # Statistiques générales
-        total_users = User.query.count()
-        total_products = Product.query.filter_by(is_active=True).count()
-        total_orders = Order.query.count()
+        # Totaux lus dans les agrégats journaliers (O(jours) et non O(commandes))
+        stats = DashboardRollups.dashboard_stats(start_date.date())
+        stats['total_products'] = Product.query.filter_by(is_active=True).count()
         
-        # Nouveaux utilisateurs (période)
-        new_users = User.query.filter(User.created_at >= start_date).count()
-        
-        # Commandes récentes
-        recent_orders = Order.query.filter(Order.created_at >= start_date).count()
-        
-        # Chiffre d'affaires
-        try:
-            revenue_query = db.session.query(func.sum(Order.total_amount)).filter(
-                and_(
-                    Order.created_at >= start_date,
-                    Order.status.in_(['delivered', 'shipped', 'processing'])
-                )
-            )
-            total_revenue = revenue_query.scalar() or 0
-            print(f"Revenue calculation successful: {total_revenue}")
-        except Exception as revenue_error:
-            print(f"Error calculating revenue: {str(revenue_error)}")
-            total_revenue = 0
-        
-        # Commandes par statut
-        status_stats = db.session.query(
-            Order.status,
-            func.count(Order.id).label('count')
-        ).group_by(Order.status).all()
-        
-        return jsonify({
-            'total_users': total_users,
-            'total_products': total_products,
-            'total_orders': total_orders,
-            'new_users': new_users,
-            'recent_orders': recent_orders,
-            'total_revenue': float(total_revenue) if total_revenue else 0,
-            'status_stats': [{'status': s.status, 'count': s.count} for s in status_stats]
-        }), 200
+        return jsonify(stats), 200
         
     except Exception as e:
         print(f"Dashboard stats error: {str(e)}")
@@ -84,6 +121,16 @@ def get_dashboard_stats():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/admin/metrics', methods=['GET'])
+@jwt_required()
+@require_admin()
+def get_metrics():
+    """Métriques des requêtes au format texte Prometheus"""
+    return current_app.response_class(
+        RequestMetrics.render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
 @admin_bp.route('/admin/dashboard/recent-orders', methods=['GET'])
 @jwt_required()
 @require_admin()
@@ -92,7 +139,9 @@ def get_recent_orders():
     try:
         limit = request.args.get('limit', 5, type=int)
         
-        recent_orders = Order.query.order_by(desc(Order.created_at)).limit(limit).all()
+        recent_orders = Order.query.options(*Order.loader_options(details=False, user=True)).order_by(
+            desc(Order.created_at)
+        ).limit(limit).all()
         
         return jsonify([{
             'id': order.id,
@@ -120,33 +169,10 @@ def get_sales_chart():
         days = request.args.get('days', 30, type=int)
         start_date = datetime.now() - timedelta(days=days)
         
-        # Évolution des ventes (par jour)
-        daily_sales = db.session.query(
-            func.date(Order.created_at).label('date'),
-            func.sum(Order.total_amount).label('revenue'),
-            func.count(Order.id).label('orders')
-        ).filter(
-            and_(
-                Order.created_at >= start_date,
-                Order.status != 'cancelled'
-            )
-        ).group_by(func.date(Order.created_at)).order_by(
-            func.date(Order.created_at)
-        ).all()
-        
-        # Produits les plus vendus
-        top_products = db.session.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label('total_sold')
-        ).join(OrderItem).join(Order).filter(
-            Order.created_at >= start_date
-        ).group_by(Product.id, Product.name).order_by(
-            desc('total_sold')
-        ).limit(5).all()
-        
+        # Évolution des ventes (par jour) et produits les plus vendus, depuis les agrégats
         return jsonify({
-            'daily_sales': [{'date': str(d.date), 'revenue': float(d.revenue), 'orders': d.orders} for d in daily_sales],
-            'top_products': [{'name': p.name, 'total_sold': p.total_sold} for p in top_products]
+            'daily_sales': DashboardRollups.daily_sales(start_date.date()),
+            'top_products': DashboardRollups.top_products(start_date.date(), limit=5)
         }), 200
         
     except Exception as e:
@@ -160,48 +186,20 @@ def get_sales_chart():
 def get_users():
     """Récupérer la liste des utilisateurs"""
     try:
-        # Paramètres de pagination et filtres
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        search = request.args.get('search', '')
-        role = request.args.get('role', '')
-        
-        # Base query
-        query = User.query
-        
         # Filtres
-        if search:
-            query = query.filter(
-                or_(
-                    User.first_name.ilike(f'%{search}%'),
-                    User.last_name.ilike(f'%{search}%'),
-                    User.email.ilike(f'%{search}%')
-                )
-            )
+        query = apply_user_filters(User.query, request.args)
         
-        if role:
-            query = query.filter(User.role == role)
-        
-        # Tri par date de création (plus récent en premier)
-        query = query.order_by(desc(User.created_at))
-        
-        # Pagination
-        users = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Pagination par page ou par curseur, plus récents en premier
+        try:
+            users, pagination = paginate_list(
+                query, User.created_at, User.id, request.args, 'admin_users'
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': users.total,
-                'pages': users.pages,
-                'has_next': users.has_next,
-                'has_prev': users.has_prev
-            }
+            'users': [user.to_dict() for user in users],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -264,6 +262,9 @@ def update_user(user_id):
             request=request
         )
         
+        # Les tokens émis avant la modification ne font plus foi pour le rôle (même transaction)
+        IdentityCache.invalidate(user_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -283,9 +284,7 @@ def update_user(user_id):
 def get_admin_products():
     """Récupérer la liste des produits pour l'admin"""
     try:
-        # Paramètres de pagination et filtres
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        # Filtres
         search = request.args.get('search', '')
         category = request.args.get('category', '')
         is_active = request.args.get('is_active', '')
@@ -312,26 +311,17 @@ def get_admin_products():
         if low_stock and low_stock.lower() == 'true':
             query = query.filter(Product.stock_quantity <= Product.low_stock_threshold)
         
-        # Tri par date de création (plus récent en premier)
-        query = query.order_by(desc(Product.created_at))
-        
-        # Pagination
-        products = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Pagination par page ou par curseur, plus récents en premier
+        try:
+            products, pagination = paginate_list(
+                query, Product.created_at, Product.id, request.args, 'admin_products'
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': products.total,
-                'pages': products.pages,
-                'has_next': products.has_next,
-                'has_prev': products.has_prev
-            }
+            'products': [ProductCardCache.card(product) for product in products],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -385,6 +375,9 @@ def create_product():
         db.session.add(product)
         db.session.flush()  # Pour obtenir l'ID
         
+        # Indexer le produit pour la recherche (même transaction)
+        ProductSearchIndex.index_product(product)
+        
         # Logger l'action
         AdminLog.log_action(
             admin_id=current_user_id,
@@ -396,6 +389,10 @@ def create_product():
         )
         
         db.session.commit()
+        CatalogSnapshot.bump()
+        CountCache.invalidate('admin_products')
+        ProductFacetIndex.refresh(product.id)
+        ProductSuggestIndex.invalidate()
         
         return jsonify({
             'message': 'Produit créé avec succès',
@@ -428,6 +425,9 @@ def update_product(product_id):
         
         product.updated_at = datetime.utcnow()
         
+        # Mettre à jour l'index de recherche (même transaction)
+        ProductSearchIndex.index_product(product)
+        
         # Logger l'action
         AdminLog.log_action(
             admin_id=current_user_id,
@@ -439,6 +439,10 @@ def update_product(product_id):
         )
         
         db.session.commit()
+        CatalogSnapshot.bump()
+        ProductCardCache.invalidate(product_id)
+        ProductFacetIndex.refresh(product_id)
+        ProductSuggestIndex.invalidate()
         
         return jsonify({
             'message': 'Produit mis à jour avec succès',
@@ -479,6 +483,9 @@ def update_product_stock(product_id):
         )
         
         db.session.commit()
+        CatalogSnapshot.bump()
+        ProductCardCache.invalidate(product_id)
+        ProductFacetIndex.refresh(product_id)
         
         return jsonify({
             'message': 'Stock mis à jour avec succès',
@@ -503,6 +510,7 @@ def delete_product(product_id):
         
         # Delete the product
         db.session.delete(product)
+        ProductSearchIndex.remove_product(product_id)
         
         # Logger l'action
         AdminLog.log_action(
@@ -515,6 +523,11 @@ def delete_product(product_id):
         )
         
         db.session.commit()
+        CatalogSnapshot.bump()
+        ProductCardCache.invalidate(product_id)
+        ProductFacetIndex.refresh(product_id)
+        ProductSuggestIndex.invalidate()
+        CountCache.invalidate('admin_products')
         
         return jsonify({
             'message': 'Produit supprimé avec succès'
@@ -532,9 +545,7 @@ def delete_product(product_id):
 def get_admin_logs():
     """Récupérer les logs d'administration"""
     try:
-        # Paramètres de pagination et filtres
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        # Filtres
         action = request.args.get('action', '')
         admin_id = request.args.get('admin_id', type=int)
         start_date = request.args.get('start_date')
@@ -558,26 +569,17 @@ def get_admin_logs():
             end_dt = datetime.fromisoformat(end_date)
             query = query.filter(AdminLog.created_at <= end_dt)
         
-        # Tri par date (plus récent en premier)
-        query = query.order_by(desc(AdminLog.created_at))
-        
-        # Pagination
-        logs = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Pagination par page ou par curseur, plus récents en premier
+        try:
+            logs, pagination = paginate_list(
+                query, AdminLog.created_at, AdminLog.id, request.args, 'admin_logs', per_page=50
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'logs': [log.to_dict() for log in logs.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': logs.total,
-                'pages': logs.pages,
-                'has_next': logs.has_next,
-                'has_prev': logs.has_prev
-            }
+            'logs': [log.to_dict() for log in logs],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -591,48 +593,22 @@ def get_admin_logs():
 def get_admin_orders():
     """Récupérer la liste des commandes pour l'admin"""
     try:
-        # Paramètres de pagination et filtres
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        search = request.args.get('search', '')
-        status = request.args.get('status', '')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        # Base query
-        query = Order.query
-        
         # Filtres
-        if search:
-            query = query.join(User).filter(
-                or_(
-                    Order.order_number.ilike(f'%{search}%'),
-                    User.email.ilike(f'%{search}%'),
-                    User.first_name.ilike(f'%{search}%'),
-                    User.last_name.ilike(f'%{search}%')
-                )
-            )
-        
-        if status:
-            query = query.filter(Order.status == status)
+        query, user_joined = apply_order_filters(Order.query, request.args)
         
-        if start_date:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Order.created_at >= start_dt)
-        
-        if end_date:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Order.created_at <= end_dt)
-        
-        # Tri par date de création (plus récent en premier)
-        query = query.order_by(desc(Order.created_at))
+        # Client chargé avec la commande (la jointure de recherche est réutilisée si présente)
+        if user_joined:
+            options = (contains_eager(Order.user),)
+        else:
+            options = Order.loader_options(details=False, user=True)
         
-        # Pagination
-        orders = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Pagination par page ou par curseur, plus récentes en premier
+        try:
+            orders, pagination = paginate_list(
+                query, Order.created_at, Order.id, request.args, 'admin_orders', options=options
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'orders': [{
@@ -649,15 +625,8 @@ def get_admin_orders():
                 'status': order.status,
                 'created_at': order.created_at.isoformat(),
                 'updated_at': order.updated_at.isoformat() if order.updated_at else None
-            } for order in orders.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': orders.total,
-                'pages': orders.pages,
-                'has_next': orders.has_next,
-                'has_prev': orders.has_prev
-            }
+            } for order in orders],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -669,7 +638,7 @@ def get_admin_orders():
 def get_admin_order(order_id):
     """Récupérer les détails d'une commande spécifique"""
     try:
-        order = Order.query.get_or_404(order_id)
+        order = Order.query.options(*Order.loader_options(user=True)).filter(Order.id == order_id).first_or_404()
         
         # Récupérer les articles de la commande
         order_items = [{
@@ -761,6 +730,8 @@ def update_order_status(order_id):
         )
         db.session.add(history)
         
+        DashboardRollups.record_status_change(order, old_status, new_status)
+        
         # Logger l'action
         AdminLog.log_action(
             admin_id=current_user_id,
@@ -786,3 +757,72 @@ def update_order_status(order_id):
         db.session.rollback()
         return jsonify({'error': f'Erreur lors de la mise à jour du statut: {str(e)}'}), 500
 
+# ==================== EXPORTS ====================
+
+def _orders_export(args):
+    statement, _ = apply_order_filters(
+        select(
+            Order.id, Order.order_number, Order.created_at, Order.status, Order.payment_status,
+            User.id, User.email, User.first_name, User.last_name,
+            Order.total_amount, Order.shipping_cost, Order.tax_amount, Order.discount_amount,
+            Order.payment_method, Order.shipping_method, Order.shipping_address
+        ).join(User, Order.user_id == User.id),
+        args, user_joined=True
+    )
+    return TabularExport('commandes', [
+        'id', 'numero', 'date', 'statut', 'statut_paiement',
+        'client_id', 'email', 'prenom', 'nom',
+        'total', 'frais_port', 'taxes', 'remise',
+        'paiement', 'livraison', 'adresse_livraison'
+    ], statement.order_by(desc(Order.id)))
+
+def _order_items_export(args):
+    statement, _ = apply_order_filters(
+        select(
+            Order.id, Order.order_number, Order.created_at, Order.status, User.email,
+            OrderItem.product_id, OrderItem.product_sku, OrderItem.product_name,
+            OrderItem.quantity, OrderItem.unit_price, OrderItem.total_price
+        ).join(User, Order.user_id == User.id).join(OrderItem, OrderItem.order_id == Order.id),
+        args, user_joined=True
+    )
+    return TabularExport('lignes_commandes', [
+        'commande_id', 'numero', 'date', 'statut', 'email',
+        'produit_id', 'sku', 'produit', 'quantite', 'prix_unitaire', 'total'
+    ], statement.order_by(desc(Order.id), OrderItem.id))
+
+def _users_export(args):
+    statement = apply_user_filters(
+        select(User.id, User.email, User.first_name, User.last_name, User.role, User.created_at),
+        args
+    )
+    return TabularExport('clients', [
+        'id', 'email', 'prenom', 'nom', 'role', 'date_inscription'
+    ], statement.order_by(desc(User.id)))
+
+EXPORTS = {
+    'orders': _orders_export,
+    'order-items': _order_items_export,
+    'users': _users_export,
+}
+
+@admin_bp.route('/admin/exports/<dataset>', methods=['GET'])
+@jwt_required()
+@require_admin()
+def export_dataset(dataset):
+    """
+    Exporter les commandes, les lignes de commande ou les clients (CSV ou XLSX)
+
+    Accepte les mêmes filtres que la liste correspondante et ?format=csv|xlsx.
+    La réponse est envoyée en flux : la mémoire ne dépend pas du volume.
+    """
+    try:
+        builder = EXPORTS.get(dataset)
+        if not builder:
+            return jsonify({'error': f'Export inconnu: {dataset} (valeurs acceptées: {", ".join(EXPORTS)})'}), 404
+        
+        return builder(request.args).response(request.args.get('format', 'csv'))
+        
+    except (ExportError, ValueError) as e:
+        return jsonify({'error': f"Paramètres d'export invalides: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({'error': f"Erreur lors de l'export: {str(e)}"}), 500
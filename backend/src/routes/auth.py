@@ -3,6 +3,9 @@ from flask_jwt_extended import create_access_token, decode_token
 from src.models.user import User
 from src.models.user_history import UserHistory
 from src.extensions import db
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.identity import current_identity, token_claims, CurrentUser, UserNotFound
+from src.services.password_hasher import HasherBusy
 from functools import wraps
 
 auth_bp = Blueprint("auth_bp", __name__)
@@ -10,15 +13,27 @@ auth_bp = Blueprint("auth_bp", __name__)
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        from flask_jwt_extended import verify_jwt_in_request
         verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
-        if not current_user:
+        # Identité lue dans les claims du token : l'utilisateur n'est chargé que si la route en a besoin
+        identity = current_identity()
+        if not identity:
+            return jsonify({'message': 'Utilisateur non trouvé'}), 401
+        try:
+            return f(CurrentUser(identity), *args, **kwargs)
+        except UserNotFound:
+            # Utilisateur supprimé après l'émission du token, découvert au chargement de l'enregistrement
+            db.session.rollback()
             return jsonify({'message': 'Utilisateur non trouvé'}), 401
-        return f(current_user, *args, **kwargs)
     return decorated
 
+@auth_bp.errorhandler(HasherBusy)
+def hasher_busy(e):
+    """Pool de hachage saturé : refus immédiat plutôt qu'une file d'attente"""
+    response = jsonify({'message': str(e)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/auth/register', methods=['POST'])
 def register():
     data = request.get_json()
@@ -42,6 +57,7 @@ def register():
     user.set_password(password)
     
     db.session.add(user)
+    DashboardRollups.record_new_user(user)
     db.session.commit()
 
     # Enregistrer l'action dans l'historique
@@ -53,7 +69,7 @@ def register():
         user_agent=request.headers.get('User-Agent')
     )
 
-    token = create_access_token(identity=user.id)
+    token = create_access_token(identity=user.id, additional_claims=token_claims(user))
     return jsonify({
         'token': token,
         'user': {
@@ -77,7 +93,16 @@ def login():
     user = User.query.filter_by(email=email).first()
 
     if user and user.check_password(password):
-        token = create_access_token(identity=user.id)
+        # Mettre à niveau le hash si les paramètres de hachage ont changé
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except HasherBusy:
+                # Mise à niveau facultative : le mot de passe est vérifié, nouvel essai à la prochaine connexion
+                pass
+        
+        token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         
         # Enregistrer l'action dans l'historique
         UserHistory.log_action(
@@ -3,15 +3,23 @@ from flask_jwt_extended import jwt_required
 from src.extensions import db
 from src.models.bundle import Bundle
 from src.routes.admin import require_admin
+from src.services.catalog_cache import CatalogSnapshot
+from src.services.bundle_resolver import resolve_all_bundles
 
 bundles_bp = Blueprint('bundles', __name__)
 
 @bundles_bp.route('/bundles', methods=['GET'])
 def list_bundles():
     try:
-        db.create_all()
-        bundles = Bundle.query.order_by(Bundle.created_at.asc()).all()
-        return jsonify([b.to_dict() for b in bundles]), 200
+        if request.args.get('resolved') in ('1', 'true'):
+            # Bundles résolus en produits concrets, recalculés à chaque changement du catalogue
+            return CatalogSnapshot.respond('bundles:resolved', resolve_all_bundles)
+
+        def build_bundles():
+            db.create_all()
+            bundles = Bundle.query.order_by(Bundle.created_at.asc()).all()
+            return [b.to_dict() for b in bundles]
+        return CatalogSnapshot.respond('bundles', build_bundles)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -40,6 +48,7 @@ def create_bundle():
         )
         db.session.add(bundle)
         db.session.commit()
+        CatalogSnapshot.bump()
         return jsonify(bundle.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -66,6 +75,7 @@ def update_bundle(slug):
         if 'items' in data:
             bundle.items = data.get('items') or []
         db.session.commit()
+        CatalogSnapshot.bump()
         return jsonify(bundle.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -81,6 +91,7 @@ def delete_bundle(slug):
             return jsonify({'error': 'Bundle not found'}), 404
         db.session.delete(bundle)
         db.session.commit()
+        CatalogSnapshot.bump()
         return jsonify({'message': 'Bundle deleted'}), 200
     except Exception as e:
         db.session.rollback()
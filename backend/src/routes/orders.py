@@ -1,13 +1,19 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from sqlalchemy import desc, and_, or_
+from sqlalchemy.orm import selectinload, joinedload
 import json
 from src.models.user import User
 from src.models.product import Product
 from src.models.order import Order, OrderItem, OrderStatusHistory, AdminLog
+from src.models.outbox import OutboxMessage
 from src.extensions import db
-from src.services.email_service import EmailService
+from src.services.catalog_cache import CatalogSnapshot
+from src.services.checkout import CheckoutService, CheckoutError
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.identity import current_identity
+from src.services.invoices import InvoiceService, InvoiceBusy
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -17,8 +23,7 @@ def require_permission(permission):
         from functools import wraps
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
+            user = current_identity()
             
             if not user or not user.has_permission(permission):
                 return jsonify({'error': 'Permission insuffisante'}), 403
@@ -33,113 +38,16 @@ def create_order():
     """Créer une nouvelle commande"""
     try:
         current_user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Validation des données
-        required_fields = ['items', 'shipping_address', 'billing_address', 'payment_method']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Champ requis manquant: {field}'}), 400
-        
-        if not data['items']:
-            return jsonify({'error': 'La commande doit contenir au moins un article'}), 400
-        
-        # Vérifier la disponibilité des produits
-        total_amount = 0
-        order_items_data = []
-        
-        for item_data in data['items']:
-            product = Product.query.get(item_data['product_id'])
-            if not product:
-                return jsonify({'error': f'Produit {item_data["product_id"]} introuvable'}), 404
-            
-            if not product.is_in_stock(item_data['quantity']):
-                return jsonify({'error': f'Stock insuffisant pour {product.name}'}), 400
-            
-            # Converting product.price to float before multiplication
-            item_total = float(product.price) * item_data['quantity']
-            total_amount += item_total
-            
-            order_items_data.append({
-                'product': product,
-                'quantity': item_data['quantity'],
-                'unit_price': product.price,
-                'total_price': item_total
-            })
-        
-        # Ajouter les frais de port et taxes
-        shipping_cost = float(data.get('shipping_cost', 0))
-        tax_amount = float(data.get('tax_amount', 0))
-        discount_amount = float(data.get('discount_amount', 0))
-        
-        # Convert total_amount to float before adding
-        final_total = float(total_amount) + shipping_cost + tax_amount - discount_amount
-        
-        # Créer la commande
-        order = Order(
-            user_id=current_user_id,
-            order_number=Order.generate_order_number(),
-            total_amount=final_total,
-            shipping_address=data['shipping_address'],
-            billing_address=data['billing_address'],
-            payment_method=data.get('payment_method'),
-            shipping_method=data.get('shipping_method'),
-            shipping_cost=shipping_cost,
-            tax_amount=tax_amount,
-            discount_amount=discount_amount,
-            notes=data.get('notes')
-        )
         
-        db.session.add(order)
-        db.session.flush()  # Pour obtenir l'ID de la commande
-        
-        # Créer les articles de commande et réserver le stock
-        for item_data in order_items_data:
-            product = item_data['product']
-            
-            # Réserver le stock
-            if not product.reserve_stock(item_data['quantity']):
-                db.session.rollback()
-                return jsonify({'error': f'Impossible de réserver le stock pour {product.name}'}), 400
-            
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=product.id,
-                quantity=item_data['quantity'],
-                unit_price=item_data['unit_price'],
-                total_price=item_data['total_price'],
-                product_name=product.name,
-                product_sku=product.sku
-            )
-            db.session.add(order_item)
-        
-        # Créer l'historique initial
-        history = OrderStatusHistory(
-            order_id=order.id,
-            status='pending',
-            comment='Commande créée',
-            created_by=current_user_id
-        )
-        db.session.add(history)
+        try:
+            order = CheckoutService.place_order(current_user_id, request.get_json())
+        except CheckoutError as e:
+            return jsonify({'error': e.message}), e.status_code
         
-        db.session.commit()
+        # Le stock des produits a changé : invalider le cache du catalogue
+        CatalogSnapshot.bump()
         
-        # Envoyer une notification aux administrateurs
-        try:
-            # Récupérer tous les administrateurs
-            admins = User.query.filter_by(role='admin').all()
-            
-            # Envoyer un email à chaque administrateur
-            for admin in admins:
-                EmailService.send_new_order_notification(
-                    admin_email=admin.email,
-                    order=order
-                )
-                
-            print(f"Notifications envoyées aux administrateurs pour la commande #{order.order_number}")
-        except Exception as e:
-            # Ne pas bloquer la création de commande si l'envoi de notification échoue
-            print(f"Erreur lors de l'envoi des notifications: {str(e)}")
+        # Les administrateurs sont notifiés par le worker de l'outbox
         
         return jsonify({
             'message': 'Commande créée avec succès',
@@ -156,16 +64,18 @@ def get_all_orders():
     print("=== ROUTE REACHED: /orders-all (JWT protected) ===")
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             print(f"User not found: {current_user_id}")
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
             
-        print(f"User found: {user.email}, role: {user.role}")
+        print(f"User found: {user.id}, role: {user.role}")
         
         # Récupérer uniquement les commandes de l'utilisateur authentifié
-        orders = Order.query.filter(Order.user_id == current_user_id).order_by(desc(Order.created_at)).all()
+        orders = Order.query.options(*Order.loader_options()).filter(
+            Order.user_id == current_user_id
+        ).order_by(desc(Order.created_at)).all()
         
         # Convertir les commandes en dictionnaires pour la sérialisation JSON
         orders_data = [order.to_dict() for order in orders]
@@ -195,13 +105,13 @@ def get_orders():
         print(f"JWT identity: {current_user_id}")
         
         # Vérifier si l'utilisateur existe
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             print(f"User not found: {current_user_id}")
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
             
-        print(f"User found: {user.email}, role: {user.role}")
+        print(f"User found: {user.id}, role: {user.role}")
         
         # Paramètres de pagination
         page = request.args.get('page', 1, type=int)
@@ -253,6 +163,9 @@ def get_orders():
         # Tri par date de création (plus récent en premier)
         query = query.order_by(desc(Order.created_at))
         
+        # Lignes et historique chargés en une requête par relation pour toute la page
+        query = query.options(*Order.loader_options())
+        
         # Pagination
         try:
             print("Applying pagination...")
@@ -349,10 +262,10 @@ def get_order_history(order_id):
     """Récupérer l'historique des statuts d'une commande"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         # Récupérer la commande
-        order = Order.query.get(order_id)
+        order = db.session.get(Order, order_id, options=[selectinload(Order.status_history)])
         if not order:
             return jsonify({'error': 'Commande introuvable'}), 404
             
@@ -377,10 +290,10 @@ def get_order(order_id):
     """Récupérer les détails d'une commande spécifique"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        # Récupérer la commande
-        order = Order.query.get(order_id)
+        # Récupérer la commande avec ses lignes et son historique
+        order = db.session.get(Order, order_id, options=Order.loader_options())
         if not order:
             return jsonify({'error': 'Commande introuvable'}), 404
             
@@ -388,15 +301,9 @@ def get_order(order_id):
         if order.user_id != current_user_id and not user.has_permission('view_all_orders'):
             return jsonify({'error': 'Permission insuffisante'}), 403
             
-        # Récupérer les détails complets
+        # Détails complets (articles et historique inclus par to_dict)
         order_data = order.to_dict()
         
-        # Ajouter les articles de la commande
-        order_data['items'] = [item.to_dict() for item in order.order_items]
-        
-        # Ajouter l'historique des statuts
-        order_data['status_history'] = [history.to_dict() for history in order.status_history]
-        
         return jsonify({
             'order': order_data
         }), 200
@@ -404,6 +311,50 @@ def get_order(order_id):
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération des détails de la commande: {str(e)}'}), 500
 
+@orders_bp.route('/orders/<int:order_id>/invoice', methods=['GET'])
+@jwt_required()
+def get_order_invoice(order_id):
+    """
+    Télécharger la facture PDF d'une commande
+
+    Servie depuis le cache disque (rendue au premier accès) avec ETag et
+    prise en charge des requêtes Range. ?download=1 force le téléchargement.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        user = current_identity()
+        
+        order = db.session.get(Order, order_id, options=[selectinload(Order.order_items), joinedload(Order.user)])
+        if not order:
+            return jsonify({'error': 'Commande introuvable'}), 404
+        
+        # Vérifier les permissions
+        if order.user_id != current_user_id and not user.has_permission('view_all_orders'):
+            return jsonify({'error': 'Permission insuffisante'}), 403
+        
+        if order.status == 'cancelled':
+            return jsonify({'error': 'Aucune facture pour une commande annulée'}), 409
+        
+        path, key = InvoiceService.get_path(order)
+        response = send_file(
+            path,
+            mimetype='application/pdf',
+            as_attachment=request.args.get('download') == '1',
+            download_name=f'facture-{order.order_number}.pdf',
+            conditional=True,
+            etag=key,
+            max_age=0
+        )
+        response.cache_control.private = True
+        return response
+        
+    except InvoiceBusy as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la génération de la facture: {str(e)}'}), 500
+
 @orders_bp.route('/orders/<int:order_id>/status', methods=['PUT'])
 @jwt_required()
 @require_permission('update_order_status')
@@ -438,9 +389,6 @@ def update_order_status(order_id):
         if order.status == new_status:
             return jsonify({'message': 'Aucun changement de statut nécessaire'}), 200
             
-        # Récupérer l'utilisateur admin
-        admin = User.query.get(current_user_id)
-        
         # Mettre à jour le statut
         old_status = order.status
         print(f"[DEBUG] Ancien statut: {old_status}, Nouveau statut: {new_status}")
@@ -466,31 +414,22 @@ def update_order_status(order_id):
         )
         db.session.add(admin_log)
         
+        DashboardRollups.record_status_change(order, old_status, new_status)
+        
+        # Notification du client, écrite dans la même transaction
+        OutboxMessage.enqueue('order_status_changed', {
+            'order_id': order.id,
+            'old_status': old_status,
+            'new_status': new_status,
+            'comment': comment
+        })
+        
         # Enregistrer les modifications
         print(f"[DEBUG] Commit des modifications dans la base de données")
         db.session.commit()
         print(f"[DEBUG] Commit réussi")
         
-        # Envoyer une notification au client
-        try:
-            # Récupérer l'utilisateur client
-            print(f"[DEBUG] Récupération des informations du client pour l'email")
-            client = User.query.get(order.user_id)
-            
-            # Envoyer un email de notification
-            print(f"[DEBUG] Envoi d'email à {client.email}")
-            EmailService.send_order_status_change_notification(
-                client_email=client.email,
-                order=order,
-                old_status=old_status,
-                new_status=new_status,
-                comment=comment
-            )
-            
-            print(f"[DEBUG] Notification envoyée au client pour la commande #{order.order_number} (changement de statut)")
-        except Exception as e:
-            # Ne pas bloquer la mise à jour si l'envoi de notification échoue
-            print(f"[DEBUG] Erreur lors de l'envoi de la notification: {str(e)}")
+        # Le client est notifié par le worker de l'outbox
         
         print(f"[DEBUG] Préparation de la réponse JSON")
         response = jsonify({
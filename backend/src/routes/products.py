@@ -1,18 +1,153 @@
 from flask import Blueprint, request, jsonify
 from src.models.product import Product
 from src.extensions import db
+from src.services.product_search import ProductSearchIndex
+from src.services.pagination import keyset_page
+from src.services.catalog_cache import CatalogSnapshot
+from src.services.product_cards import ProductCardCache
+from src.services.product_facets import FILTER_ARGS, FacetFilters, ProductFacetIndex
+from src.services.product_suggest import ProductSuggestIndex
 
 products_bp = Blueprint('products', __name__)
 
+# Clés de tri autorisées pour la pagination par curseur (préfixe '-' = décroissant)
+SORT_COLUMNS = {
+    'id': Product.id,
+    'price': Product.price,
+    'name': Product.name,
+    'created_at': Product.created_at
+}
+
+PAGINATION_ARGS = ('limit', 'cursor', 'sort', 'fields')
+
+def list_products(query):
+    """
+    Sérialiser une requête de produits
+
+    Sans paramètre de pagination, renvoie la liste complète (comportement
+    historique). Avec limit/cursor/sort/fields, renvoie une page par curseur
+    sur (clé de tri, id) et ne lit que les colonnes demandées : les colonnes
+    volumineuses restent différées.
+    """
+    if not any(arg in request.args for arg in PAGINATION_ARGS):
+        return jsonify(ProductCardCache.cards(query.order_by(Product.id))), 200
+
+    try:
+        fields = Product.parse_fields(request.args.get('fields')) or Product.LIST_FIELDS
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in SORT_COLUMNS:
+        return jsonify({'error': f'Tri invalide. Valeurs acceptées: {", ".join(SORT_COLUMNS)}'}), 400
+
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    loaded_fields = fields if sort_key in fields else fields + (sort_key,)
+    query = query.options(Product.load_only_fields(loaded_fields))
+
+    try:
+        products, next_cursor = keyset_page(
+            query, SORT_COLUMNS[sort_key], Product.id,
+            cursor=request.args.get('cursor'), limit=limit, descending=descending
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Champs par défaut (ou tous) : fiches en cache ; sélection libre : encodage direct
+    variant = ProductCardCache.variant_for(fields)
+    return jsonify({
+        'products': [
+            ProductCardCache.card(product, variant) if variant else product.to_dict(fields)
+            for product in products
+        ],
+        'pagination': {
+            'limit': limit,
+            'sort': sort,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+    }), 200
+
 @products_bp.route('/products', methods=['GET'])
 def get_products():
     """Récupérer tous les produits"""
     try:
-        products = Product.query.filter_by(is_active=True).all()
-        return jsonify([product.to_dict() for product in products]), 200
+        if not any(arg in request.args for arg in PAGINATION_ARGS + FILTER_ARGS):
+            # Catalogue complet : servi depuis le cache versionné, assemblé à partir des fiches en cache
+            return CatalogSnapshot.respond('products', lambda: ProductCardCache.cards(
+                Product.query.filter_by(is_active=True).order_by(Product.id)
+            ))
+        
+        # Filtres à facettes (category, price, in_stock, featured, min_rating)
+        try:
+            filters = FacetFilters.from_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return list_products(filters.apply(Product.query.filter_by(is_active=True)))
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération des produits: {str(e)}'}), 500
 
+@products_bp.route('/products/facets', methods=['GET'])
+def get_product_facets():
+    """Comptes des facettes du catalogue pour les filtres donnés (index en mémoire, sans SQL)"""
+    try:
+        try:
+            filters = FacetFilters.from_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(ProductFacetIndex.counts(filters)), 200
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors du calcul des facettes: {str(e)}'}), 500
+
+@products_bp.route('/products/suggest', methods=['GET'])
+def suggest_products():
+    """Autocomplétion : produits et catégories commençant par un préfixe (index en mémoire, sans SQL)"""
+    try:
+        prefix = request.args.get('prefix', '').strip()
+        if not prefix:
+            return jsonify({'error': 'Préfixe requis'}), 400
+        if len(prefix) > 100:
+            return jsonify({'error': 'Préfixe trop long (100 caractères maximum)'}), 400
+
+        limit = request.args.get('limit', 8, type=int)
+        return jsonify({'prefix': prefix, **ProductSuggestIndex.suggest(prefix, limit=limit)}), 200
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la recherche des suggestions: {str(e)}'}), 500
+
+@products_bp.route('/products/search', methods=['GET'])
+def search_products():
+    """Rechercher des produits (plein texte, triés par pertinence)"""
+    try:
+        query = request.args.get('q', '').strip()
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+        product_ids, total = ProductSearchIndex.search(query, page=page, per_page=per_page)
+
+        products_by_id = {}
+        if product_ids:
+            products_by_id = {
+                product.id: product
+                for product in Product.query.filter(Product.id.in_(product_ids)).all()
+            }
+
+        return jsonify({
+            'query': query,
+            'products': [ProductCardCache.card(products_by_id[pid]) for pid in product_ids if pid in products_by_id],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': (total + per_page - 1) // per_page,
+                'has_next': page * per_page < total,
+                'has_prev': page > 1
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la recherche des produits: {str(e)}'}), 500
+
 @products_bp.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     """Récupérer un produit spécifique"""
@@ -21,7 +156,7 @@ def get_product(product_id):
         if not product:
             return jsonify({'error': 'Produit non trouvé'}), 404
         
-        return jsonify(product.to_dict()), 200
+        return jsonify(ProductCardCache.card(product)), 200
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération du produit: {str(e)}'}), 500
 
@@ -29,11 +164,8 @@ def get_product(product_id):
 def get_categories():
     """Récupérer toutes les catégories de produits"""
     try:
-        # Récupérer toutes les catégories uniques depuis la base de données
-        categories = db.session.query(Product.category).distinct().all()
-        category_list = [category[0] for category in categories if category[0]]
-        
-        return jsonify(category_list), 200
+        # Catégories de tous les produits, lues dans l'index des facettes
+        return CatalogSnapshot.respond('categories', ProductFacetIndex.categories)
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération des catégories: {str(e)}'}), 500
 
@@ -41,8 +173,7 @@ def get_categories():
 def get_products_by_category(category):
     """Récupérer les produits par catégorie"""
     try:
-        products = Product.query.filter_by(category=category, is_active=True).all()
-        return jsonify([product.to_dict() for product in products]), 200
+        return list_products(Product.query.filter_by(category=category, is_active=True))
     except Exception as e:
         return jsonify({'error': f'Erreur lors de la récupération des produits: {str(e)}'}), 500
 
@@ -3,7 +3,10 @@ from ..models.user import User, db
 from ..models.order import Order, OrderItem
 from ..models.product import Product
 from ..routes.auth import token_required
-from sqlalchemy import desc
+from ..services.dashboard_rollups import DashboardRollups
+from ..services.identity import IdentityCache, UserNotFound
+from sqlalchemy import desc, func
+from sqlalchemy.orm import selectinload
 
 user_bp = Blueprint('user', __name__)
 
@@ -39,6 +42,9 @@ def update_user(user_id):
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
+    DashboardRollups.record_new_user(user, delta=-1)
+    # Les tokens émis avant la suppression ne font plus foi (enregistré dans la même transaction)
+    IdentityCache.invalidate(user_id)
     db.session.commit()
     return '', 204
 
@@ -76,10 +82,33 @@ def update_profile(current_user):
             'user': current_user.to_dict()
         }), 200
         
+    except UserNotFound:
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erreur lors de la mise à jour du profil'}), 500
 
+def _products_by_id(items, *columns):
+    """Colonnes complémentaires des produits des lignes, en une seule requête"""
+    product_ids = {item.product_id for item in items}
+    if not product_ids:
+        return {}
+    return {row.id: row for row in db.session.query(Product.id, *columns).filter(Product.id.in_(product_ids))}
+
+def _item_dict(item, product):
+    """Ligne de commande depuis ses colonnes figées (nom, prix) et le produit actuel (image, etc.)"""
+    return {
+        'id': item.id,
+        'product_id': item.product_id,
+        'product_name': item.product_name,
+        'product_sku': item.product_sku,
+        'product_image': product.image_url if product else None,
+        'product_available': bool(product and product.is_active),
+        'quantity': item.quantity,
+        'price': float(item.unit_price or 0),
+        'total': float(item.total_price or 0)
+    }
+
 @user_bp.route('/orders', methods=['GET'])
 @token_required
 def get_user_orders(current_user):
@@ -89,35 +118,29 @@ def get_user_orders(current_user):
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')
         
-        # Build query for user's orders
+        # Build query for user's orders (index user_id, created_at)
         query = Order.query.filter_by(user_id=current_user.id)
         
         if status:
             query = query.filter_by(status=status)
         
-        orders = query.order_by(desc(Order.created_at)).paginate(
+        orders = query.options(selectinload(Order.order_items)).order_by(desc(Order.created_at)).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
+        # Nom et prix viennent des lignes ; image et disponibilité d'une seule requête produits
+        products = _products_by_id(
+            [item for order in orders.items for item in order.order_items],
+            Product.image_url, Product.is_active
+        )
+        
         orders_data = []
         for order in orders.items:
-            # Get order items with product details
-            order_items = []
-            for item in order.order_items:
-                product = Product.query.get(item.product_id)
-                order_items.append({
-                    'id': item.id,
-                    'product_id': item.product_id,
-                    'product_name': product.name if product else 'Produit supprimé',
-                    'product_image': product.image_url if product else None,
-                    'quantity': item.quantity,
-                    'price': item.price,
-                    'total': item.quantity * item.price
-                })
-            
+            order_items = [_item_dict(item, products.get(item.product_id)) for item in order.order_items]
             orders_data.append({
                 'id': order.id,
-                'total_amount': order.total_amount,
+                'order_number': order.order_number,
+                'total_amount': float(order.total_amount or 0),
                 'status': order.status,
                 'created_at': order.created_at.strftime('%Y-%m-%d %H:%M'),
                 'updated_at': order.updated_at.strftime('%Y-%m-%d %H:%M') if order.updated_at else None,
@@ -143,30 +166,30 @@ def get_user_order_detail(current_user, order_id):
     """Get detailed information about a specific order"""
     try:
         # Make sure the order belongs to the current user
-        order = Order.query.filter_by(id=order_id, user_id=current_user.id).first()
+        order = Order.query.options(selectinload(Order.order_items)).filter_by(
+            id=order_id, user_id=current_user.id
+        ).first()
         
         if not order:
             return jsonify({'message': 'Commande non trouvée'}), 404
         
-        # Get order items with product details
+        products = _products_by_id(
+            order.order_items,
+            Product.image_url, Product.is_active, Product.description, Product.category
+        )
+        
         order_items = []
         for item in order.order_items:
-            product = Product.query.get(item.product_id)
-            order_items.append({
-                'id': item.id,
-                'product_id': item.product_id,
-                'product_name': product.name if product else 'Produit supprimé',
-                'product_description': product.description if product else None,
-                'product_image': product.image_url if product else None,
-                'product_category': product.category if product else None,
-                'quantity': item.quantity,
-                'price': item.price,
-                'total': item.quantity * item.price
-            })
+            product = products.get(item.product_id)
+            item_data = _item_dict(item, product)
+            item_data['product_description'] = product.description if product else None
+            item_data['product_category'] = product.category if product else None
+            order_items.append(item_data)
         
         order_data = {
             'id': order.id,
-            'total_amount': order.total_amount,
+            'order_number': order.order_number,
+            'total_amount': float(order.total_amount or 0),
             'status': order.status,
             'created_at': order.created_at.strftime('%Y-%m-%d %H:%M'),
             'updated_at': order.updated_at.strftime('%Y-%m-%d %H:%M') if order.updated_at else None,
@@ -186,26 +209,23 @@ def get_user_order_detail(current_user, order_id):
 def get_user_order_stats(current_user):
     """Get user's order statistics"""
     try:
-        # Get all user orders
-        user_orders = Order.query.filter_by(user_id=current_user.id).all()
-        
-        # Calculate statistics
-        total_orders = len(user_orders)
-        total_spent = sum(order.total_amount for order in user_orders)
-        
-        # Count orders by status
-        status_counts = {}
-        for order in user_orders:
-            status_counts[order.status] = status_counts.get(order.status, 0) + 1
-        
-        # Get most recent order
-        recent_order = Order.query.filter_by(user_id=current_user.id).order_by(desc(Order.created_at)).first()
+        # Un seul agrégat groupé par statut, servi par l'index (user_id, created_at)
+        rows = db.session.query(
+            Order.status,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.total_amount), 0),
+            func.max(Order.created_at)
+        ).filter(Order.user_id == current_user.id).group_by(Order.status).all()
+        
+        status_counts = {status: count for status, count, _, _ in rows}
+        total_spent = sum(float(amount) for _, _, amount, _ in rows)
+        last_order = max((last for _, _, _, last in rows if last), default=None)
         
         stats = {
-            'total_orders': total_orders,
+            'total_orders': sum(status_counts.values()),
             'total_spent': round(total_spent, 2),
             'status_counts': status_counts,
-            'recent_order_date': recent_order.created_at.strftime('%Y-%m-%d') if recent_order else None
+            'recent_order_date': last_order.strftime('%Y-%m-%d') if last_order else None
         }
         
         return jsonify(stats), 200
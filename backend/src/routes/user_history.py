@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from src.models.user_history import UserHistory
 from src.routes.auth import token_required
 from src.extensions import db
+from src.services.pagination import paginate_list
 
 user_history_bp = Blueprint("user_history_bp", __name__)
 
@@ -10,8 +11,6 @@ user_history_bp = Blueprint("user_history_bp", __name__)
 def get_user_history(current_user):
     """Récupérer l'historique d'un utilisateur"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         action_type = request.args.get('action_type', None)
         
         query = UserHistory.query.filter_by(user_id=current_user.id)
@@ -19,16 +18,23 @@ def get_user_history(current_user):
         if action_type:
             query = query.filter_by(action_type=action_type)
         
-        history = query.order_by(UserHistory.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Pagination par page ou par curseur, index (user_id, created_at, id)
+        try:
+            history, pagination = paginate_list(
+                query, UserHistory.created_at, UserHistory.id, request.args,
+                f'user_history:{current_user.id}'
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'history': [item.to_dict() for item in history.items],
-            'total': history.total,
-            'pages': history.pages,
-            'current_page': page,
-            'per_page': per_page
+            'history': [item.to_dict() for item in history],
+            'total': pagination['total'],
+            'pages': pagination.get('pages'),
+            'current_page': pagination.get('page'),
+            'per_page': pagination.get('per_page', pagination.get('limit')),
+            'has_next': pagination['has_next'],
+            'next_cursor': pagination['next_cursor']
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -4,6 +4,7 @@ from src.models.product import Product
 from src.models.wishlist_cart import Wishlist, WishlistItem, Cart, CartItem
 from src.models.user_history import UserHistory
 from src.routes.auth import token_required
+from src.services.cart import CartService, CartError
 
 wishlist_cart_bp = Blueprint("wishlist_cart_bp", __name__)
 
@@ -22,7 +23,7 @@ def add_to_wishlist(current_user, product_id):
     if not wishlist:
         wishlist = Wishlist(user_id=current_user.id)
         db.session.add(wishlist)
-        db.session.commit()
+        db.session.flush()  # Validé avec l'ajout de l'article
 
     product = Product.query.get(product_id)
     if not product:
@@ -79,7 +80,7 @@ def remove_from_wishlist(current_user, product_id):
 @wishlist_cart_bp.route("/cart", methods=["GET"])
 @token_required
 def get_cart(current_user):
-    cart = Cart.query.filter_by(user_id=current_user.id).first()
+    cart = Cart.for_user(current_user.id)
     if not cart:
         return jsonify({"message": "Cart not found"}), 404
     return jsonify(cart.to_dict()), 200
@@ -91,7 +92,7 @@ def add_to_cart(current_user, product_id):
     if not cart:
         cart = Cart(user_id=current_user.id)
         db.session.add(cart)
-        db.session.commit()
+        db.session.flush()  # Validé avec l'ajout de l'article
 
     product = Product.query.get(product_id)
     if not product:
@@ -128,7 +129,7 @@ def add_to_cart(current_user, product_id):
         user_agent=request.headers.get('User-Agent')
     )
     
-    return jsonify({"message": "Product added to cart", "cart": cart.to_dict()}), 201
+    return jsonify({"message": "Product added to cart", "cart": Cart.for_user(current_user.id).to_dict()}), 201
 
 @wishlist_cart_bp.route("/cart/remove/<int:product_id>", methods=["DELETE"])
 @token_required
@@ -191,7 +192,39 @@ def update_cart_quantity(current_user, product_id):
             user_agent=request.headers.get('User-Agent')
         )
     
-    return jsonify({"message": "Cart quantity updated", "cart": cart.to_dict()}), 200
+    return jsonify({"message": "Cart quantity updated", "cart": Cart.for_user(current_user.id).to_dict()}), 200
+
+@wishlist_cart_bp.route("/cart", methods=["PATCH"])
+@token_required
+def patch_cart(current_user):
+    """Applique une liste d'opérations add / set / remove en une seule transaction"""
+    data = request.get_json(silent=True) or {}
+    try:
+        cart, changes = CartService.apply_operations(current_user.id, data.get('operations'))
+    except CartError as e:
+        return jsonify({"message": e.message, "errors": e.details}), e.status_code
+    except Exception as e:
+        return jsonify({"message": f"Erreur lors de la mise à jour du panier: {str(e)}"}), 500
+
+    # Enregistrer les actions dans l'historique
+    for product_id, old_quantity, new_quantity, product_name in changes:
+        if old_quantity == 0:
+            action_type, description = 'add_to_cart', f'Ajouté {product_name} au panier'
+        elif new_quantity == 0:
+            action_type, description = 'remove_from_cart', f'Retiré {product_name} du panier'
+        else:
+            action_type = 'update_cart_quantity'
+            description = f'Modifié quantité de {product_name} de {old_quantity} à {new_quantity}'
+        UserHistory.log_action(
+            user_id=current_user.id,
+            action_type=action_type,
+            action_description=description,
+            product_id=product_id,
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+
+    return jsonify({"message": "Cart updated", "cart": Cart.for_user(current_user.id).to_dict()}), 200
 
 @wishlist_cart_bp.route("/cart/empty", methods=["DELETE"])
 @token_required
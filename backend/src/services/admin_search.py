@@ -0,0 +1,170 @@
+from sqlalchemy import Integer, column, or_, text
+from src.extensions import db
+from src.models.order import Order
+from src.models.user import User
+
+
+class AdminSearchIndex:
+    """
+    Index trigrammes des recherches d'administration (utilisateurs, commandes)
+
+    Deux tables FTS5 à contenu externe (tokenizer trigram) indexent les
+    colonnes cherchées par l'admin : users_search (prénom, nom, email) et
+    orders_search (numéro de commande). Le rowid est l'id de la ligne
+    source et le texte n'est pas dupliqué. Des triggers SQLite maintiennent
+    les index à chaque écriture sur users et orders, quel que soit le code
+    qui écrit (routes, checkout, scripts).
+
+    Un terme de recherche est une sous-chaîne quelconque d'au moins trois
+    caractères, insensible à la casse. Les saisies plus courtes ne
+    produisent pas de trigramme : les routes gardent alors leur filtre
+    ILIKE.
+    """
+
+    MIN_TERM_LENGTH = 3
+
+    # table FTS -> (table source, colonnes indexées)
+    INDEXES = {
+        'users_search': ('users', ('first_name', 'last_name', 'email')),
+        'orders_search': ('orders', ('order_number',)),
+    }
+
+    _ready = False
+
+    # ==================== SCHÉMA ====================
+
+    @classmethod
+    def _schema_names(cls):
+        names = []
+        for table in cls.INDEXES:
+            names += [table, f'{table}_ai', f'{table}_ad', f'{table}_au']
+        return names
+
+    @classmethod
+    def _existing_count(cls):
+        names = cls._schema_names()
+        return db.session.execute(text(
+            f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(f':n{i}' for i in range(len(names)))})"
+        ), {f'n{i}': name for i, name in enumerate(names)}).scalar()
+
+    @classmethod
+    def ensure_schema(cls):
+        """
+        Crée les tables FTS5 et leurs triggers s'ils manquent, puis les remplit
+
+        À appeler au démarrage ou depuis les scripts d'initialisation et de
+        migration, jamais pendant une requête. Retourne True si le schéma
+        vient d'être créé : l'appelant doit alors valider la transaction
+        pour le rendre persistant.
+        """
+        if cls._ready:
+            return False
+
+        if cls._existing_count() == len(cls._schema_names()):
+            cls._ready = True
+            return False
+
+        cls._drop()
+        cls._create()
+        cls._ready = True
+        return True
+
+    @classmethod
+    def is_available(cls):
+        """
+        Indique si le schéma FTS5 est en place (lecture seule, mémorisée une fois vrai)
+
+        Les routes n'écrivent jamais le schéma : tant qu'il manque, les
+        recherches gardent leur filtre ILIKE.
+        """
+        if not cls._ready and cls._existing_count() == len(cls._schema_names()):
+            cls._ready = True
+        return cls._ready
+
+    @classmethod
+    def rebuild(cls):
+        """Recrée les tables et les triggers, puis réindexe users et orders"""
+        cls._drop()
+        cls._create()
+        cls._ready = True
+
+    @classmethod
+    def _drop(cls):
+        for table in cls.INDEXES:
+            for suffix in ('ai', 'ad', 'au'):
+                db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_{suffix}"))
+            db.session.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+    @classmethod
+    def _create(cls):
+        for table, (source, columns) in cls.INDEXES.items():
+            names = ', '.join(columns)
+            new_values = ', '.join(f'new.{c}' for c in columns)
+            old_values = ', '.join(f'old.{c}' for c in columns)
+            insert = f"INSERT INTO {table}(rowid, {names}) VALUES (new.id, {new_values});"
+            delete = f"INSERT INTO {table}({table}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+
+            db.session.execute(text(
+                f"CREATE VIRTUAL TABLE {table} USING fts5("
+                f"{names}, content='{source}', content_rowid='id', tokenize='trigram')"
+            ))
+            db.session.execute(text(f"CREATE TRIGGER {table}_ai AFTER INSERT ON {source} BEGIN {insert} END"))
+            db.session.execute(text(f"CREATE TRIGGER {table}_ad AFTER DELETE ON {source} BEGIN {delete} END"))
+            db.session.execute(text(
+                f"CREATE TRIGGER {table}_au AFTER UPDATE OF {names} ON {source} BEGIN {delete} {insert} END"
+            ))
+            # Remplissage depuis la table source (contenu externe)
+            db.session.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+
+    # ==================== RECHERCHE ====================
+
+    @classmethod
+    def build_match_query(cls, search):
+        """
+        Transforme une saisie admin en requête FTS5 trigrammes
+
+        Chaque mot devient une sous-chaîne entre guillemets (pas d'injection
+        de syntaxe FTS5) et tous les mots doivent être présents, dans
+        n'importe quelle colonne. Retourne None si un mot est trop court
+        pour l'index.
+        """
+        terms = (search or '').split()
+        if not terms or any(len(term) < cls.MIN_TERM_LENGTH for term in terms):
+            return None
+        return ' AND '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    @classmethod
+    def _matching_ids(cls, table, match):
+        return text(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH :match_{table}"
+        ).bindparams(**{f'match_{table}': match}).columns(column('rowid', Integer))
+
+    @classmethod
+    def _prepare(cls, search):
+        match = cls.build_match_query(search)
+        if match and not cls.is_available():
+            return None
+        return match
+
+    @classmethod
+    def user_condition(cls, search):
+        """Condition SQLAlchemy sur User.id, ou None si la saisie n'est pas indexable"""
+        match = cls._prepare(search)
+        if not match:
+            return None
+        return User.id.in_(cls._matching_ids('users_search', match))
+
+    @classmethod
+    def order_condition(cls, search):
+        """
+        Condition SQLAlchemy sur Order : numéro de commande ou client correspondant
+
+        Retourne None si la saisie n'est pas indexable.
+        """
+        match = cls._prepare(search)
+        if not match:
+            return None
+        return or_(
+            Order.id.in_(cls._matching_ids('orders_search', match)),
+            Order.user_id.in_(cls._matching_ids('users_search', match))
+        )
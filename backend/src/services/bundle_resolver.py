@@ -0,0 +1,125 @@
+from src.extensions import db
+from src.models.bundle import Bundle
+from src.models.product import Product
+
+
+def normalize_category(category):
+    """Ramène une catégorie libre à l'une des familles utilisées par les bundles"""
+    c = (category or '').lower()
+    if 'protein' in c or 'protéine' in c or 'whey' in c:
+        return 'Protein'
+    if 'pre' in c:
+        return 'Pre-Workout'
+    if 'recover' in c or 'récup' in c or 'bcaa' in c:
+        return 'Recovery'
+    if 'strength' in c or 'creatin' in c or 'créatin' in c:
+        return 'Strength'
+    if 'vitamin' in c:
+        return 'Vitamines'
+    return 'Performance'
+
+
+class _Candidate:
+    __slots__ = ('id', 'name', 'name_lower', 'category', 'raw_category', 'price', 'image_url', 'stock')
+
+    def __init__(self, product):
+        self.id = product.id
+        self.name = product.name
+        self.name_lower = (product.name or '').lower()
+        self.raw_category = product.category
+        self.category = normalize_category(product.category)
+        self.price = float(product.price) if product.price else 0.0
+        self.image_url = product.image_url
+        self.stock = product.stock_quantity or 0
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'category': self.category,
+            'price': self.price,
+            'imageUrl': self.image_url,
+            'stock_quantity': self.stock
+        }
+
+
+class BundleResolver:
+    """
+    Résout les règles d'un bundle ({category, keyword, productId?}) en produits
+
+    Reprend la logique de sélection du composant ProductBundles côté client
+    (productId, puis mot-clé dans le nom, puis catégorie, puis n'importe quel
+    produit) en ne retenant que des produits actifs et en stock. Les index
+    par nom et par catégorie sont construits une fois pour tous les bundles.
+    """
+
+    def __init__(self, products):
+        self.candidates = [_Candidate(p) for p in products if (p.stock_quantity or 0) > 0]
+        self.by_id = {c.id: c for c in self.candidates}
+        self.by_category = {}
+        for candidate in self.candidates:
+            self.by_category.setdefault(candidate.category, []).append(candidate)
+
+    @classmethod
+    def from_database(cls):
+        products = Product.query.options(Product.load_only_fields(
+            ('id', 'name', 'category', 'price', 'image_url', 'stock_quantity')
+        )).filter_by(is_active=True).order_by(Product.id).all()
+        return cls(products)
+
+    def _pick_by_keyword(self, keyword, used):
+        k = (keyword or '').lower()
+        if not k:
+            return None
+        return next((c for c in self.candidates if c.id not in used and k in c.name_lower), None)
+
+    def _pick_by_category(self, category, used):
+        family = normalize_category(category)
+        chosen = next((c for c in self.by_category.get(family, []) if c.id not in used), None)
+        if chosen:
+            return chosen
+        family_lower = family.lower()
+        return next((c for c in self.candidates if c.id not in used and family_lower in c.name_lower), None)
+
+    def _pick_any(self, used):
+        return next((c for c in self.candidates if c.id not in used), None)
+
+    def resolve(self, bundle):
+        """Retourne le bundle sérialisé avec ses produits et ses prix calculés"""
+        used = set()
+        resolved = []
+        for rule in bundle.items or []:
+            chosen = None
+            product_id = rule.get('productId')
+            if product_id is not None:
+                direct = self.by_id.get(product_id)
+                if direct and direct.id not in used:
+                    chosen = direct
+            if not chosen:
+                chosen = (self._pick_by_keyword(rule.get('keyword'), used)
+                          or self._pick_by_category(rule.get('category'), used)
+                          or self._pick_any(used))
+            if chosen:
+                used.add(chosen.id)
+                resolved.append(chosen)
+
+        total = sum(c.price for c in resolved)
+        discounted = round(total * (1 - (bundle.discount_percent or 0) / 100), 2)
+        has_fixed = bundle.fixed_price is not None and bundle.fixed_price > 0
+
+        data = bundle.to_dict()
+        data.update({
+            'resolvedItems': [c.to_dict() for c in resolved],
+            'totalPrice': round(total, 2),
+            'bundlePrice': bundle.fixed_price if has_fixed else discounted,
+            'available': len(resolved) == len(bundle.items or []) and len(resolved) > 0,
+            'maxQuantity': min((c.stock for c in resolved), default=0)
+        })
+        return data
+
+
+def resolve_all_bundles():
+    """Résout tous les bundles en deux requêtes (produits légers, bundles)"""
+    resolver = BundleResolver.from_database()
+    bundles = Bundle.query.order_by(Bundle.created_at.asc()).all()
+    return [resolver.resolve(bundle) for bundle in bundles]
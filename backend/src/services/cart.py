@@ -0,0 +1,129 @@
+from src.extensions import db
+from src.models.product import Product
+from src.models.wishlist_cart import Cart, CartItem
+
+
+class CartError(Exception):
+    """Opération de panier invalide ou stock insuffisant"""
+
+    def __init__(self, message, status_code=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details or []
+
+
+class CartService:
+    """
+    Application atomique d'une liste d'opérations sur le panier
+
+    Opérations acceptées (dans l'ordre de la liste) :
+        {'op': 'add', 'product_id': 1, 'quantity': 2}   # quantity par défaut : 1
+        {'op': 'set', 'product_id': 1, 'quantity': 5}   # 0 retire la ligne
+        {'op': 'remove', 'product_id': 1}
+
+    Les quantités finales sont calculées en mémoire, vérifiées contre le
+    stock par une seule requête, puis appliquées en un seul commit. Si une
+    opération est invalide, aucune n'est appliquée.
+    """
+
+    OPERATIONS = ('add', 'set', 'remove')
+
+    @classmethod
+    def _parse(cls, operations):
+        if not isinstance(operations, list) or not operations:
+            raise CartError('Le champ operations doit être une liste non vide')
+        parsed = []
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in cls.OPERATIONS:
+                raise CartError(f'Opération {index} invalide: op doit valoir add, set ou remove')
+            try:
+                product_id = int(operation['product_id'])
+                quantity = int(operation.get('quantity', 1))
+            except (KeyError, TypeError, ValueError):
+                raise CartError(f'Opération {index} invalide: product_id et quantity doivent être des entiers')
+            op = operation['op']
+            if (op == 'add' and quantity <= 0) or (op == 'set' and quantity < 0):
+                raise CartError(f'Opération {index} invalide: quantité {quantity}')
+            parsed.append((op, product_id, quantity))
+        return parsed
+
+    @classmethod
+    def apply_operations(cls, user_id, operations):
+        """
+        Applique les opérations au panier de l'utilisateur
+
+        Retourne (panier, changements) où changements est une liste de
+        (product_id, ancienne quantité, nouvelle quantité, nom du produit)
+        pour l'historique.
+        """
+        parsed = cls._parse(operations)
+
+        cart = Cart.for_user(user_id)
+        if not cart:
+            cart = Cart(user_id=user_id)
+            db.session.add(cart)
+            db.session.flush()
+        items = {item.product_id: item for item in cart.items}
+
+        # Quantités finales calculées en mémoire, dans l'ordre des opérations
+        quantities = {product_id: item.quantity for product_id, item in items.items()}
+        for op, product_id, quantity in parsed:
+            if op == 'add':
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+            elif op == 'set':
+                quantities[product_id] = quantity
+            else:
+                quantities[product_id] = 0
+
+        touched = list(dict.fromkeys(product_id for _, product_id, _ in parsed))
+        wanted = {product_id: quantities[product_id] for product_id in touched if quantities[product_id] > 0}
+
+        # Une seule requête de stock pour tous les produits conservés ou ajoutés
+        stock = {}
+        if wanted:
+            stock = {row.id: row for row in db.session.query(
+                Product.id, Product.name, Product.stock_quantity, Product.is_active
+            ).filter(Product.id.in_(list(wanted))).all()}
+
+        errors = []
+        for product_id, quantity in wanted.items():
+            product = stock.get(product_id)
+            if not product:
+                errors.append({'product_id': product_id, 'error': 'Produit introuvable'})
+            elif not product.is_active or quantity > (product.stock_quantity or 0):
+                errors.append({
+                    'product_id': product_id,
+                    'error': f'Quantité demandée non disponible en stock pour {product.name}',
+                    'available': product.stock_quantity or 0
+                })
+        if errors:
+            db.session.rollback()
+            raise CartError('Stock insuffisant ou produit introuvable', 400, errors)
+
+        changes = []
+        for product_id in touched:
+            item = items.get(product_id)
+            old_quantity = item.quantity if item else 0
+            new_quantity = wanted.get(product_id, 0)
+            if old_quantity == new_quantity:
+                continue
+            if new_quantity == 0:
+                cart.items.remove(item)
+            elif item:
+                item.quantity = new_quantity
+            else:
+                cart.items.append(CartItem(product_id=product_id, quantity=new_quantity))
+            if product_id in stock:
+                name = stock[product_id].name
+            else:
+                name = item.product.name if item and item.product else None
+            changes.append((product_id, old_quantity, new_quantity, name))
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return cart, changes
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+import time
+from flask import current_app, request, Response
+
+
+class _SnapshotEntry:
+    __slots__ = ('version', 'body', 'etag', 'built_at')
+
+    def __init__(self, version, body, etag):
+        self.version = version
+        self.body = body
+        self.etag = etag
+        self.built_at = time.monotonic()
+
+
+class CatalogSnapshot:
+    """
+    Cache en mémoire des réponses du catalogue (produits, catégories, bundles)
+
+    Chaque réponse est stockée déjà encodée en JSON, sous la version
+    courante du catalogue. La compression est laissée à
+    ResponseCompression, qui garde les corps compressés par ETag : chaque
+    contenu distinct est donc compressé une seule fois. Toute écriture sur le catalogue
+    (routes d'administration des produits et des bundles, réservation de
+    stock au checkout) doit appeler bump() après son commit : la version
+    augmente et les réponses sont reconstruites à la demande suivante.
+
+    L'ETag est une empreinte du corps encodé : il reste valable après un
+    redémarrage et d'un worker à l'autre, et change dès que le contenu
+    change (la version locale ne sert qu'à invalider le cache). Un
+    If-None-Match valide (fort, ou faible tel que renvoyé avec une réponse
+    compressée) est servi en 304 sans toucher à la base tant que la
+    réponse est en cache.
+
+    Le cache est propre au processus : bump() n'invalide que le worker qui a
+    traité l'écriture. Les autres ne la voient pas ; chaque réponse est donc
+    aussi reconstruite au plus tard CATALOG_SNAPSHOT_MAX_AGE secondes (10
+    par défaut) après sa construction, ce qui borne la durée pendant
+    laquelle un worker sert un catalogue (stocks compris) périmé. Les
+    fiches produit restent en cache (ProductCardCache, par updated_at) :
+    une reconstruction lit (id, updated_at) de chaque produit et ne
+    recharge que les produits modifiés depuis.
+    """
+
+    _lock = threading.Lock()
+    _version = 1
+    _entries = {}
+
+    @classmethod
+    def version(cls):
+        return cls._version
+
+    @classmethod
+    def bump(cls):
+        """Invalide toutes les réponses en cache (à appeler après chaque écriture du catalogue)"""
+        with cls._lock:
+            cls._version += 1
+            cls._entries = {}
+        return cls._version
+
+    @staticmethod
+    def make_etag(body):
+        return f'catalog-{hashlib.blake2b(body, digest_size=12).hexdigest()}'
+
+    @classmethod
+    def respond(cls, key, builder):
+        """
+        Sert la réponse `key` depuis le cache, en la construisant avec
+        builder() (qui retourne des données sérialisables) si nécessaire
+        """
+        version = cls._version
+        max_age = current_app.config.get('CATALOG_SNAPSHOT_MAX_AGE', 10)
+        entry = cls._entries.get(key)
+        if entry is None or entry.version != version or time.monotonic() - entry.built_at > max_age:
+            body = current_app.json.dumps_bytes(builder())
+            entry = _SnapshotEntry(version, body, cls.make_etag(body))
+            with cls._lock:
+                if cls._version == version:
+                    cls._entries[key] = entry
+
+        if request.if_none_match.contains_weak(entry.etag):
+            response = Response(status=304)
+            response.set_etag(entry.etag)
+            return response
+
+        response = Response(entry.body, mimetype='application/json')
+        response.set_etag(entry.etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,163 @@
+from datetime import datetime
+from sqlalchemy import insert, update
+from src.extensions import db
+from src.models.product import Product
+from src.models.order import Order, OrderItem, OrderStatusHistory
+from src.models.outbox import OutboxMessage
+from src.services.dashboard_rollups import DashboardRollups
+from src.services.product_cards import ProductCardCache
+from src.services.product_facets import ProductFacetIndex
+
+
+class CheckoutError(Exception):
+    """Erreur de validation ou de stock pendant le passage de commande"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class CheckoutService:
+    """
+    Passage de commande sans survente et avec une transaction d'écriture courte
+
+    1. Lecture de tous les produits demandés en une seule requête IN, hors
+       verrou d'écriture, et calcul des montants.
+    2. Réservation du stock par des UPDATE conditionnels atomiques
+       (stock_quantity >= quantité) : deux commandes concurrentes ne peuvent
+       pas consommer la même unité, quel que soit l'état lu à l'étape 1.
+    3. Insertion de la commande puis insertion groupée (executemany) des
+       lignes et de l'historique, mise à jour des agrégats du tableau de bord,
+       message d'outbox pour la notification des administrateurs, et commit.
+
+    Le verrou d'écriture SQLite n'est pris qu'à la première réservation et
+    n'est tenu que le temps des étapes 2 et 3.
+    """
+
+    REQUIRED_FIELDS = ('items', 'shipping_address', 'billing_address', 'payment_method')
+
+    @staticmethod
+    def _merge_items(items):
+        """Regroupe les lignes par produit en conservant l'ordre de première apparition"""
+        quantities = {}
+        for item in items:
+            try:
+                product_id = int(item['product_id'])
+                quantity = int(item['quantity'])
+            except (KeyError, TypeError, ValueError):
+                raise CheckoutError('Article invalide: product_id et quantity sont requis')
+            if quantity <= 0:
+                raise CheckoutError(f'Quantité invalide pour le produit {product_id}')
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return quantities
+
+    @classmethod
+    def place_order(cls, user_id, data):
+        """Crée la commande de l'utilisateur et retourne l'objet Order validé"""
+        if not data:
+            raise CheckoutError('Données de commande manquantes')
+        for field in cls.REQUIRED_FIELDS:
+            if field not in data:
+                raise CheckoutError(f'Champ requis manquant: {field}')
+        if not data['items']:
+            raise CheckoutError('La commande doit contenir au moins un article')
+
+        quantities = cls._merge_items(data['items'])
+
+        # 1. Une seule requête pour tous les produits (colonnes utiles uniquement)
+        rows = db.session.query(
+            Product.id, Product.name, Product.sku, Product.price,
+            Product.is_active, Product.stock_quantity
+        ).filter(Product.id.in_(list(quantities))).all()
+        products = {row.id: row for row in rows}
+
+        lines = []
+        subtotal = 0.0
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product:
+                raise CheckoutError(f'Produit {product_id} introuvable', 404)
+            # Vérification optimiste : échoue vite sans prendre le verrou d'écriture
+            if not product.is_active or (product.stock_quantity or 0) < quantity:
+                raise CheckoutError(f'Stock insuffisant pour {product.name}')
+
+            line_total = float(product.price) * quantity
+            subtotal += line_total
+            lines.append((product, quantity, line_total))
+
+        shipping_cost = float(data.get('shipping_cost', 0))
+        tax_amount = float(data.get('tax_amount', 0))
+        discount_amount = float(data.get('discount_amount', 0))
+        final_total = subtotal + shipping_cost + tax_amount - discount_amount
+
+        now = datetime.utcnow()
+        try:
+            # 2. Réservation atomique : l'UPDATE n'affecte aucune ligne si le stock a changé entre-temps
+            for product, quantity, _ in lines:
+                result = db.session.execute(
+                    update(Product)
+                    .where(Product.id == product.id)
+                    .where(Product.is_active.is_(True))
+                    .where(Product.stock_quantity >= quantity)
+                    .values(stock_quantity=Product.stock_quantity - quantity, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount != 1:
+                    raise CheckoutError(f'Impossible de réserver le stock pour {product.name}')
+
+            # 3. Commande, lignes et historique
+            order = Order(
+                user_id=user_id,
+                order_number=Order.generate_order_number(),
+                total_amount=final_total,
+                shipping_address=data['shipping_address'],
+                billing_address=data['billing_address'],
+                payment_method=data.get('payment_method'),
+                shipping_method=data.get('shipping_method'),
+                shipping_cost=shipping_cost,
+                tax_amount=tax_amount,
+                discount_amount=discount_amount,
+                notes=data.get('notes'),
+                created_at=now,
+                updated_at=now
+            )
+            db.session.add(order)
+            db.session.flush()  # Pour obtenir l'ID de la commande
+
+            db.session.execute(insert(OrderItem), [{
+                'order_id': order.id,
+                'product_id': product.id,
+                'product_name': product.name,
+                'product_sku': product.sku or '',
+                'quantity': quantity,
+                'unit_price': product.price,
+                'total_price': line_total
+            } for product, quantity, line_total in lines])
+
+            db.session.execute(insert(OrderStatusHistory), [{
+                'order_id': order.id,
+                'status': 'pending',
+                'comment': 'Commande créée',
+                'created_by': user_id,
+                'created_at': now
+            }])
+
+            # Agrégats du tableau de bord
+            DashboardRollups.record_order(now, 'pending', final_total, [
+                (product.id, product.name, quantity) for product, quantity, _ in lines
+            ])
+
+            # Notification des administrateurs, envoyée par le worker de l'outbox
+            OutboxMessage.enqueue('order_created', {'order_id': order.id})
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # Stock réservé : fiches en cache périmées, disponibilité à recalculer dans les facettes
+        product_ids = [product.id for product, _, _ in lines]
+        ProductCardCache.invalidate(*product_ids)
+        ProductFacetIndex.refresh(*product_ids)
+        return order
@@ -0,0 +1,173 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel : gzip seul est alors proposé
+    brotli = None
+
+
+class ResponseCompression:
+    """
+    Compression des réponses (brotli ou gzip) négociée sur Accept-Encoding
+
+    Enregistrée comme after_request : les routes renvoient leur corps en
+    clair et la compression est appliquée ici, une seule fois pour toute
+    l'application. Sont laissées telles quelles les réponses déjà encodées,
+    les fichiers servis en passthrough (PDF des factures), les types déjà
+    compressés (xlsx, images), les réponses partielles et les corps de
+    moins de COMPRESSION_MIN_SIZE octets.
+
+    Les réponses en flux (exports CSV) sont compressées au fil de l'eau,
+    bloc par bloc, sans être mises en mémoire. Les réponses portant un ETag
+    (catalogue, catégories, bundles) sont compressées au niveau maximal une
+    fois par ETag et par encodage, puis resservies depuis un cache LRU
+    borné à COMPRESSION_CACHE_BYTES octets.
+    """
+
+    COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml',
+                          'image/svg+xml')
+
+    _cache = OrderedDict()   # (etag, encodage) -> corps compressé
+    _cache_bytes = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def init_app(cls, app):
+        app.config.setdefault('COMPRESSION_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESSION_CACHE_BYTES', 32 * 1024 * 1024)
+        # Réponses dynamiques : niveaux rapides ; réponses en cache : niveaux élevés
+        app.config.setdefault('COMPRESSION_BROTLI_LEVEL', 4)
+        app.config.setdefault('COMPRESSION_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESSION_CACHED_BROTLI_LEVEL', 9)
+        app.config.setdefault('COMPRESSION_CACHED_GZIP_LEVEL', 9)
+        app.after_request(cls._after_request)
+
+    @classmethod
+    def encodings(cls):
+        """Encodages proposés, par ordre de préférence du serveur"""
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    # ==================== NÉGOCIATION ====================
+
+    @classmethod
+    def _should_compress(cls, response):
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+            return False
+        mimetype = response.mimetype or ''
+        return mimetype.startswith(cls.COMPRESSIBLE_TYPES)
+
+    @classmethod
+    def _after_request(cls, response):
+        if not cls._should_compress(response):
+            return response
+
+        # La représentation dépend d'Accept-Encoding, même quand elle n'est pas compressée
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(cls.encodings())
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = cls._compress_stream(response.response, encoding, cls._level(encoding))
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+                return response
+            etag, weak = response.get_etag()
+            if etag and not weak:
+                response.set_data(cls._cached(etag, encoding, body))
+            else:
+                response.set_data(cls.compress(body, encoding, cached=False))
+
+        response.headers['Content-Encoding'] = encoding
+        # Même ETag pour les représentations compressée et en clair : ETag faible (comme nginx)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    # ==================== COMPRESSION ====================
+
+    @staticmethod
+    def _level(encoding, cached=False):
+        name = 'BROTLI' if encoding == 'br' else 'GZIP'
+        return current_app.config[f"COMPRESSION_{'CACHED_' if cached else ''}{name}_LEVEL"]
+
+    @classmethod
+    def compress(cls, body, encoding, cached=False):
+        level = cls._level(encoding, cached)
+        if encoding == 'br':
+            return brotli.compress(body, quality=level)
+        return gzip.compress(body, compresslevel=level)
+
+    @classmethod
+    def _cached(cls, etag, encoding, body):
+        key = (etag, encoding)
+        with cls._lock:
+            compressed = cls._cache.get(key)
+            if compressed is not None:
+                cls._cache.move_to_end(key)
+                return compressed
+
+        compressed = cls.compress(body, encoding, cached=True)
+        limit = current_app.config['COMPRESSION_CACHE_BYTES']
+        if len(compressed) > limit:
+            return compressed
+        with cls._lock:
+            if key not in cls._cache:
+                cls._cache[key] = compressed
+                cls._cache_bytes += len(compressed)
+                while cls._cache_bytes > limit:
+                    _, evicted = cls._cache.popitem(last=False)
+                    cls._cache_bytes -= len(evicted)
+        return compressed
+
+    @staticmethod
+    def _compress_stream(chunks, encoding, level):
+        """
+        Compresse un corps en flux ; chaque bloc est vidé aussitôt vers le client
+
+        Exécuté hors du contexte de requête : le niveau est résolu à l'avance.
+        """
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=level)
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            process, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if chunk:
+                    yield process(chunk) + flush()
+            yield finish()
+        finally:
+            # Ferme le générateur d'origine (contexte de stream_with_context, curseur SQL)
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._cache.clear()
+            cls._cache_bytes = 0
+
+
+def init_compression(app):
+    """Active la compression des réponses pour l'application"""
+    ResponseCompression.init_app(app)
+    app.extensions['response_compression'] = ResponseCompression
+    return ResponseCompression
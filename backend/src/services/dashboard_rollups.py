@@ -0,0 +1,172 @@
+from datetime import datetime
+from sqlalchemy import text, func, desc
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.extensions import db
+from src.models.stats import DailySalesRollup, DailyUserRollup, DailyProductSales
+
+
+class DashboardRollups:
+    """
+    Agrégats journaliers du tableau de bord, maintenus de façon incrémentale
+
+    Les écritures (création de commande, changement de statut, inscription)
+    appliquent un UPSERT additif dans la transaction de la route qui les
+    déclenche. Les endpoints du tableau de bord lisent ces tables en
+    O(jours) au lieu de parcourir orders et users. rebuild() recalcule
+    tout à partir des tables sources.
+    """
+
+    # Statuts comptés dans le chiffre d'affaires du tableau de bord
+    REVENUE_STATUSES = ('delivered', 'shipped', 'processing')
+
+    _ready = False
+
+    @staticmethod
+    def _day(value):
+        return (value or datetime.utcnow()).date()
+
+    @staticmethod
+    def _increment(model, keys, rows, columns):
+        """UPSERT additif : ajoute les colonnes de chaque ligne aux valeurs existantes"""
+        if not rows:
+            return
+        stmt = sqlite_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in columns}
+        )
+        db.session.execute(stmt, rows)
+
+    # ==================== ÉCRITURES ====================
+
+    @classmethod
+    def record_order(cls, created_at, status, amount, items):
+        """
+        Comptabilise une nouvelle commande
+
+        items: itérable de (product_id, product_name, quantity)
+        """
+        day = cls._day(created_at)
+        cls._increment(DailySalesRollup, ('day', 'status'), [{
+            'day': day, 'status': status or 'pending', 'orders_count': 1, 'revenue': amount or 0
+        }], ('orders_count', 'revenue'))
+        cls._increment(DailyProductSales, ('day', 'product_id'), [{
+            'day': day, 'product_id': product_id, 'product_name': product_name, 'units_sold': quantity
+        } for product_id, product_name, quantity in items], ('units_sold',))
+
+    @classmethod
+    def record_status_change(cls, order, old_status, new_status):
+        """Déplace une commande d'un statut à l'autre dans son jour de création"""
+        day = cls._day(order.created_at)
+        amount = order.total_amount or 0
+        cls._increment(DailySalesRollup, ('day', 'status'), [
+            {'day': day, 'status': old_status or 'pending', 'orders_count': -1, 'revenue': -amount},
+            {'day': day, 'status': new_status, 'orders_count': 1, 'revenue': amount}
+        ], ('orders_count', 'revenue'))
+
+    @classmethod
+    def record_new_user(cls, user, delta=1):
+        """Comptabilise une inscription (delta=-1 pour une suppression)"""
+        cls._increment(DailyUserRollup, ('day',), [{
+            'day': cls._day(user.created_at), 'new_users': delta
+        }], ('new_users',))
+
+    # ==================== RECONSTRUCTION ====================
+
+    @classmethod
+    def rebuild(cls):
+        """Recalcule tous les agrégats à partir de orders, order_items et users"""
+        for model in (DailySalesRollup, DailyUserRollup, DailyProductSales):
+            db.session.execute(text(f"DELETE FROM {model.__tablename__}"))
+
+        db.session.execute(text(
+            "INSERT INTO daily_sales_rollup (day, status, orders_count, revenue) "
+            "SELECT COALESCE(date(created_at), date('now')), COALESCE(status, 'pending'), "
+            "COUNT(*), COALESCE(SUM(total_amount), 0) "
+            "FROM orders GROUP BY 1, 2"
+        ))
+        db.session.execute(text(
+            "INSERT INTO daily_user_rollup (day, new_users) "
+            "SELECT COALESCE(date(created_at), date('now')), COUNT(*) FROM users GROUP BY 1"
+        ))
+        db.session.execute(text(
+            "INSERT INTO daily_product_sales (day, product_id, product_name, units_sold) "
+            "SELECT COALESCE(date(o.created_at), date('now')), oi.product_id, MAX(oi.product_name), "
+            "SUM(oi.quantity) "
+            "FROM order_items oi JOIN orders o ON o.id = oi.order_id GROUP BY 1, 2"
+        ))
+        cls._ready = True
+
+    @classmethod
+    def ensure_built(cls):
+        """
+        Construit les agrégats au premier accès si les tables sont vides
+        alors que des données existent (base antérieure aux agrégats)
+        """
+        if cls._ready:
+            return
+        empty = db.session.execute(text(
+            "SELECT NOT EXISTS (SELECT 1 FROM daily_user_rollup) "
+            "AND EXISTS (SELECT 1 FROM users)"
+        )).scalar()
+        if empty:
+            cls.rebuild()
+            db.session.commit()
+        cls._ready = True
+
+    # ==================== LECTURES ====================
+
+    @classmethod
+    def dashboard_stats(cls, start_day):
+        """Totaux du tableau de bord depuis start_day (inclus)"""
+        cls.ensure_built()
+
+        users = db.session.query(
+            func.coalesce(func.sum(DailyUserRollup.new_users), 0).label('total'),
+            func.coalesce(func.sum(DailyUserRollup.new_users).filter(DailyUserRollup.day >= start_day), 0).label('new')
+        ).one()
+
+        by_status = db.session.query(
+            DailySalesRollup.status,
+            func.sum(DailySalesRollup.orders_count).label('count'),
+            func.sum(DailySalesRollup.orders_count).filter(DailySalesRollup.day >= start_day).label('recent_count'),
+            func.sum(DailySalesRollup.revenue).filter(DailySalesRollup.day >= start_day).label('recent_revenue')
+        ).group_by(DailySalesRollup.status).all()
+
+        return {
+            'total_users': int(users.total),
+            'new_users': int(users.new),
+            'total_orders': sum(int(s.count or 0) for s in by_status),
+            'recent_orders': sum(int(s.recent_count or 0) for s in by_status),
+            'total_revenue': sum(float(s.recent_revenue or 0) for s in by_status if s.status in cls.REVENUE_STATUSES),
+            'status_stats': [{'status': s.status, 'count': int(s.count)} for s in by_status if s.count]
+        }
+
+    @classmethod
+    def daily_sales(cls, start_day, excluded_statuses=('cancelled',)):
+        """Chiffre d'affaires et nombre de commandes par jour depuis start_day"""
+        cls.ensure_built()
+        rows = db.session.query(
+            DailySalesRollup.day,
+            func.sum(DailySalesRollup.revenue).label('revenue'),
+            func.sum(DailySalesRollup.orders_count).label('orders')
+        ).filter(
+            DailySalesRollup.day >= start_day,
+            DailySalesRollup.status.notin_(excluded_statuses)
+        ).group_by(DailySalesRollup.day).having(
+            func.sum(DailySalesRollup.orders_count) > 0
+        ).order_by(DailySalesRollup.day).all()
+        return [{'date': str(r.day), 'revenue': float(r.revenue or 0), 'orders': int(r.orders)} for r in rows]
+
+    @classmethod
+    def top_products(cls, start_day, limit=5):
+        """Produits les plus vendus depuis start_day"""
+        cls.ensure_built()
+        total_sold = func.sum(DailyProductSales.units_sold).label('total_sold')
+        rows = db.session.query(
+            func.max(DailyProductSales.product_name).label('name'),
+            total_sold
+        ).filter(
+            DailyProductSales.day >= start_day
+        ).group_by(DailyProductSales.product_id).order_by(desc(total_sold)).limit(limit).all()
+        return [{'name': r.name, 'total_sold': int(r.total_sold)} for r in rows]
@@ -6,50 +6,51 @@ from datetime import datetime
 
 class EmailService:
     @staticmethod
-    def send_email(to_email, subject, body, is_html=False):
+    def send_email(to_email, subject, body, is_html=False, raise_errors=False):
         """
         Envoie un email en utilisant SMTP
         
-        Pour le développement, cette fonction simule l'envoi d'email
-        en imprimant les détails dans la console.
-        En production, elle devrait être configurée avec un vrai serveur SMTP.
+        Si MAIL_SERVER est configuré (par exemple un serveur aiosmtpd local
+        pour les tests), l'email est réellement envoyé. Sinon, pour le
+        développement, l'envoi est simulé en imprimant les détails dans la
+        console. Avec raise_errors=True, les erreurs SMTP sont propagées
+        (utilisé par le worker de l'outbox pour planifier une nouvelle tentative).
         """
         try:
-            # En mode développement, on simule l'envoi d'email
-            print(f"\n===== SIMULATION D'ENVOI D'EMAIL =====")
-            print(f"À: {to_email}")
-            print(f"Sujet: {subject}")
-            print(f"Corps: {body}")
-            print(f"Format HTML: {is_html}")
-            print(f"Date: {datetime.now()}")
-            print("===== FIN DE LA SIMULATION =====\n")
+            config = current_app.config if current_app else {}
+            mail_server = config.get('MAIL_SERVER')
             
-            return True
+            if not mail_server:
+                # En mode développement, on simule l'envoi d'email
+                print(f"\n===== SIMULATION D'ENVOI D'EMAIL =====")
+                print(f"À: {to_email}")
+                print(f"Sujet: {subject}")
+                print(f"Corps: {body}")
+                print(f"Format HTML: {is_html}")
+                print(f"Date: {datetime.now()}")
+                print("===== FIN DE LA SIMULATION =====\n")
+                return True
             
-            # En production, décommentez le code ci-dessous et configurez-le
-            # avec les paramètres de votre serveur SMTP
-            """
             msg = MIMEMultipart('alternative')
             msg['Subject'] = subject
-            msg['From'] = 'noreply@samurainutrition.com'
+            msg['From'] = config.get('MAIL_DEFAULT_SENDER', 'noreply@samurainutrition.com')
             msg['To'] = to_email
+            msg.attach(MIMEText(body, 'html' if is_html else 'plain'))
             
-            if is_html:
-                part = MIMEText(body, 'html')
-            else:
-                part = MIMEText(body, 'plain')
-                
-            msg.attach(part)
-            
-            server = smtplib.SMTP('smtp.example.com', 587)
-            server.starttls()
-            server.login('username', 'password')
-            server.send_message(msg)
-            server.quit()
+            server = smtplib.SMTP(mail_server, config.get('MAIL_PORT', 25), timeout=config.get('MAIL_TIMEOUT', 10))
+            try:
+                if config.get('MAIL_USE_TLS'):
+                    server.starttls()
+                if config.get('MAIL_USERNAME'):
+                    server.login(config['MAIL_USERNAME'], config.get('MAIL_PASSWORD', ''))
+                server.send_message(msg)
+            finally:
+                server.quit()
             
             return True
-            """
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Erreur lors de l'envoi de l'email: {str(e)}")
             return False
     
@@ -70,6 +71,18 @@ class EmailService:
         """
         Envoie une notification pour une nouvelle commande
         """
+        subject, body = EmailService.build_new_order_notification(order)
+        return EmailService.send_admin_notification(
+            admin_email=admin_email,
+            subject=subject,
+            message=body
+        )
+    
+    @staticmethod
+    def build_new_order_notification(order):
+        """
+        Construit le sujet et le corps HTML de la notification de nouvelle commande
+        """
         subject = f"Nouvelle commande #{order.order_number}"
         
         # Création du corps du message en HTML
@@ -97,6 +110,14 @@ class EmailService:
         </html>
         """
         
+        return subject, body
+    
+    @staticmethod
+    def send_order_status_change_notification(admin_email, order, old_status, new_status, comment):
+        """
+        Envoie une notification pour un changement de statut de commande
+        """
+        subject, body = EmailService.build_order_status_change_notification(order, old_status, new_status, comment)
         return EmailService.send_admin_notification(
             admin_email=admin_email,
             subject=subject,
@@ -104,9 +125,9 @@ class EmailService:
         )
     
     @staticmethod
-    def send_order_status_change_notification(admin_email, order, old_status, new_status, comment):
+    def build_order_status_change_notification(order, old_status, new_status, comment):
         """
-        Envoie une notification pour un changement de statut de commande
+        Construit le sujet et le corps HTML de la notification de changement de statut
         """
         subject = f"Statut commande #{order.order_number} modifié: {old_status} → {new_status}"
         
@@ -126,8 +147,4 @@ class EmailService:
         </html>
         """
         
-        return EmailService.send_admin_notification(
-            admin_email=admin_email,
-            subject=subject,
-            message=body
-        )
\ No newline at end of file
+        return subject, body
\ No newline at end of file
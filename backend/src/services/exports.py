@@ -0,0 +1,139 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from flask import Response, stream_with_context
+from src.extensions import db
+
+
+class ExportError(Exception):
+    """Paramètre d'export invalide (format inconnu, filtre mal formé)"""
+
+
+# Nombre maximal de lignes d'une feuille Excel, en-tête compris
+XLSX_MAX_ROWS = 1_048_576
+
+# Caractères qui font interpréter une cellule comme une formule par les tableurs
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _chunk_size():
+    return int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _xlsx_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class TabularExport:
+    """
+    Export en flux d'une requête SQL vers CSV ou XLSX
+
+    La requête est un select de colonnes (pas d'entités ORM) exécuté avec
+    yield_per : les lignes sont lues par paquets de EXPORT_CHUNK_SIZE sur
+    le curseur, sans passer par l'identity map. La mémoire utilisée ne
+    dépend donc pas du nombre de lignes exportées.
+
+    CSV : chaque paquet de lignes est encodé et envoyé aussitôt.
+    XLSX : le classeur openpyxl en mode write-only écrit ses feuilles dans
+    un fichier temporaire, envoyé par blocs une fois complet (une nouvelle
+    feuille est ouverte tous les 1 048 575 lignes).
+    """
+
+    FORMATS = {
+        'csv': 'text/csv; charset=utf-8',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    }
+
+    def __init__(self, name, columns, statement):
+        """
+        name: préfixe du nom de fichier et titre de la feuille
+        columns: en-têtes, dans l'ordre des colonnes du select
+        """
+        self.name = name
+        self.columns = columns
+        self.statement = statement
+
+    def iter_chunks(self):
+        """Lignes de la requête, par listes de EXPORT_CHUNK_SIZE tuples"""
+        chunk_size = _chunk_size()
+        result = db.session.execute(self.statement, execution_options={'yield_per': chunk_size})
+        try:
+            for partition in result.partitions(chunk_size):
+                yield partition
+        finally:
+            result.close()
+
+    # ==================== FORMATS ====================
+
+    def iter_csv(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        # BOM : Excel ouvre alors le fichier en UTF-8 (accents des noms et des produits)
+        buffer.write('\ufeff')
+        writer.writerow(self.columns)
+        for rows in self.iter_chunks():
+            writer.writerows([[_csv_value(value) for value in row] for row in rows])
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    def iter_xlsx(self, block_size=64 * 1024):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet, sheet_rows, sheet_count = None, XLSX_MAX_ROWS, 0
+        for rows in self.iter_chunks():
+            for row in rows:
+                if sheet_rows >= XLSX_MAX_ROWS:
+                    sheet_count += 1
+                    sheet = workbook.create_sheet(self.name if sheet_count == 1 else f'{self.name} ({sheet_count})')
+                    sheet.append(self.columns)
+                    sheet_rows = 1
+                sheet.append([_xlsx_value(value) for value in row])
+                sheet_rows += 1
+        if sheet is None:
+            workbook.create_sheet(self.name).append(self.columns)
+
+        with tempfile.TemporaryFile() as output:
+            workbook.save(output)
+            output.seek(0)
+            while True:
+                block = output.read(block_size)
+                if not block:
+                    break
+                yield block
+
+    # ==================== RÉPONSE ====================
+
+    def response(self, export_format):
+        """Réponse HTTP en flux dans le format demandé ('csv' ou 'xlsx')"""
+        if export_format not in self.FORMATS:
+            raise ExportError(f"Format d'export invalide: {export_format} (valeurs acceptées: csv, xlsx)")
+
+        body = self.iter_csv() if export_format == 'csv' else self.iter_xlsx()
+        filename = f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        # stream_with_context : la session et le contexte restent ouverts jusqu'à la dernière ligne
+        return Response(stream_with_context(body), content_type=self.FORMATS[export_format], headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        })
@@ -0,0 +1,174 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from src.extensions import db
+
+
+class HistoryWriter:
+    """
+    Écriture différée et groupée des événements UserHistory
+
+    UserHistory.log_action dépose l'événement dans une file bornée au lieu
+    de faire son propre commit. Un thread de vidage insère les événements
+    par lots (executemany) dès que HISTORY_FLUSH_SIZE événements sont en
+    attente ou au plus tard toutes les HISTORY_FLUSH_INTERVAL secondes.
+
+    File pleine : l'appelant attend jusqu'à HISTORY_ENQUEUE_TIMEOUT
+    secondes, puis l'événement est écrit de façon synchrone (aucune perte).
+    Échec d'écriture : le lot est réessayé (HISTORY_WRITE_RETRIES fois, délai
+    croissant à partir de HISTORY_RETRY_BACKOFF secondes), puis écrit ligne
+    par ligne ; seuls les événements refusés par la base sont abandonnés,
+    avec une erreur dans le journal de l'application.
+
+    Arrêt : stop() (appelé aussi par atexit) vide la file avant de rendre
+    la main.
+    """
+
+    _STOP = object()
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.queue_size = config.get('HISTORY_QUEUE_SIZE', 10000)
+        self.flush_size = config.get('HISTORY_FLUSH_SIZE', 200)
+        self.flush_interval = config.get('HISTORY_FLUSH_INTERVAL', 0.5)
+        self.enqueue_timeout = config.get('HISTORY_ENQUEUE_TIMEOUT', 0.5)
+        self.write_retries = config.get('HISTORY_WRITE_RETRIES', 3)
+        self.retry_backoff = config.get('HISTORY_RETRY_BACKOFF', 0.2)
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, event):
+        """Dépose un événement (dict de colonnes UserHistory) ; retourne False si la file est pleine"""
+        event.setdefault('created_at', datetime.utcnow())
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def _insert(self, events):
+        from src.models.user_history import UserHistory
+
+        try:
+            db.session.execute(insert(UserHistory), events)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _write(self, events):
+        """
+        Écrit un lot ; en cas d'erreur, réessaie avec un délai croissant
+        (base verrouillée, connexion perdue), puis ligne par ligne pour
+        n'écarter que les événements invalides, qui sont journalisés
+        """
+        logger = self.app.logger
+        with self.app.app_context():
+            for attempt in range(self.write_retries + 1):
+                try:
+                    self._insert(events)
+                    return
+                except Exception as e:
+                    error = e
+                if attempt < self.write_retries:
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+
+            logger.warning(f"Historique: échec de l'écriture groupée de {len(events)} événement(s) "
+                           f"après {self.write_retries + 1} tentative(s), écriture ligne par ligne: {error}")
+            for event in events:
+                try:
+                    self._insert([event])
+                except Exception as e:
+                    logger.error(f"Historique: événement abandonné ({event.get('action_type')}, "
+                                 f"utilisateur {event.get('user_id')}): {e}")
+
+    def _collect(self, first):
+        """Complète un lot jusqu'à flush_size ou jusqu'à l'échéance de l'intervalle"""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is self._STOP:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is self._STOP:
+                break
+            batch, stop = self._collect(event)
+            self._write(batch)
+            if stop:
+                break
+        self._drain()
+
+    def _drain(self):
+        """Écrit tout ce qui reste dans la file"""
+        batch = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not self._STOP:
+                batch.append(event)
+            if len(batch) >= self.flush_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def start(self):
+        """Démarre le thread de vidage"""
+        with self._lock:
+            if self.running:
+                return self
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Vide la file puis arrête le thread"""
+        with self._lock:
+            if not self.running:
+                # Thread mort : les événements restants sont écrits depuis l'appelant
+                self._thread = None
+                self._drain()
+                return
+            try:
+                self._queue.put(self._STOP, timeout=timeout)
+            except queue.Full:
+                self.app.logger.error("Historique: file pleine et thread d'écriture bloqué, arrêt sans vidage")
+                return
+            self._thread.join(timeout)
+            self._thread = None
+
+    def flush(self, timeout=10):
+        """Force l'écriture de tous les événements en attente (tests, scripts)"""
+        self.stop(timeout)
+        self.start()
+
+
+def init_history_writer(app):
+    """Crée et démarre l'écrivain d'historique de l'application"""
+    worker = HistoryWriter(app)
+    app.extensions['history_writer'] = worker
+    return worker.start()
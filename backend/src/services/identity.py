@@ -0,0 +1,197 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import g, current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy.exc import SQLAlchemyError
+from src.extensions import db
+from src.models.user import User, IdentityRevocation
+
+
+class UserNotFound(LookupError):
+    """L'utilisateur du token n'existe plus (supprimé depuis l'émission du token)"""
+
+
+def token_claims(user):
+    """Claims ajoutés au token d'accès : rôle et permissions de l'utilisateur"""
+    return {'role': user.role, 'perms': User.permissions_for_role(user.role)}
+
+
+class Identity:
+    """Utilisateur authentifié tel que décrit par le token (sans accès à la base)"""
+
+    __slots__ = ('id', 'role', 'permissions')
+
+    def __init__(self, user_id, role, permissions=None):
+        self.id = user_id
+        self.role = role
+        self.permissions = frozenset(permissions if permissions is not None else User.permissions_for_role(role))
+
+    def has_permission(self, permission):
+        return permission in self.permissions
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+
+class IdentityCache:
+    """
+    Cache par processus des identités lues en base
+
+    Utilisé pour les tokens sans claims (émis avant leur ajout) et pour les
+    utilisateurs modifiés depuis l'émission de leur token : invalidate()
+    rend les tokens antérieurs au changement obsolètes, leur identité est
+    alors relue en base (une fois par IDENTITY_CACHE_TTL secondes).
+
+    Les changements sont enregistrés dans identity_revocations, dans la
+    transaction de la route qui les fait : chaque processus relit les
+    changements récents toutes les IDENTITY_REVOCATION_SYNC secondes (30
+    par défaut). Un rôle retiré n'est donc plus honoré par les autres
+    workers ni après un redémarrage, au plus tard après ce délai.
+    """
+
+    _entries = {}   # user_id -> (Identity ou None, expiration)
+    _changed = {}   # user_id -> date du dernier changement (epoch)
+    _synced_at = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, user_id):
+        now = time.monotonic()
+        entry = cls._entries.get(user_id)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        row = db.session.query(User.id, User.role).filter(User.id == user_id).first()
+        identity = Identity(row.id, row.role) if row else None
+        ttl = current_app.config.get('IDENTITY_CACHE_TTL', 60)
+        with cls._lock:
+            cls._entries[user_id] = (identity, now + ttl)
+        return identity
+
+    @staticmethod
+    def _token_lifetime():
+        return current_app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+
+    @classmethod
+    def _sync(cls):
+        """Relit les changements enregistrés par les autres processus (au plus une fois par intervalle)"""
+        now = time.monotonic()
+        interval = current_app.config.get('IDENTITY_REVOCATION_SYNC', 30)
+        if cls._synced_at is not None and now - cls._synced_at < interval:
+            return
+
+        since = datetime.utcnow() - timedelta(seconds=cls._token_lifetime())
+        try:
+            rows = db.session.query(IdentityRevocation.user_id, IdentityRevocation.revoked_at).filter(
+                IdentityRevocation.revoked_at >= since
+            ).all()
+        except SQLAlchemyError as e:
+            # Table absente (base non migrée) : on garde les changements connus localement
+            db.session.rollback()
+            current_app.logger.warning(f"Lecture des révocations d'identité impossible: {e}")
+            rows = []
+
+        with cls._lock:
+            for user_id, revoked_at in rows:
+                changed_at = revoked_at.replace(tzinfo=timezone.utc).timestamp()
+                if changed_at > cls._changed.get(user_id, 0):
+                    cls._changed[user_id] = changed_at
+                    # Identité relue en base : l'entrée en cache peut dater d'avant le changement
+                    cls._entries.pop(user_id, None)
+            cls._synced_at = now
+
+    @classmethod
+    def is_stale(cls, user_id, issued_at):
+        """Vrai si l'utilisateur a été modifié après l'émission du token"""
+        cls._sync()
+        changed_at = cls._changed.get(user_id)
+        return changed_at is not None and issued_at <= changed_at
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """
+        À appeler après un changement de rôle ou une suppression d'utilisateur,
+        avant le commit : le changement est enregistré dans la même transaction
+        """
+        revoked_at = datetime.utcnow()
+        db.session.add(IdentityRevocation(user_id=user_id, revoked_at=revoked_at))
+        # Les lignes plus anciennes que la durée de vie des tokens ne concernent plus aucun token
+        expired = revoked_at - timedelta(seconds=cls._token_lifetime())
+        IdentityRevocation.query.filter(IdentityRevocation.revoked_at < expired).delete(synchronize_session=False)
+
+        now = revoked_at.replace(tzinfo=timezone.utc).timestamp()
+        with cls._lock:
+            cls._entries.pop(user_id, None)
+            cls._changed[user_id] = now
+            for key in [k for k, t in cls._changed.items() if t < now - cls._token_lifetime()]:
+                del cls._changed[key]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._changed.clear()
+            cls._synced_at = None
+
+
+def current_identity():
+    """
+    Identité de l'utilisateur du token de la requête (None s'il n'existe plus)
+
+    Sans accès à la base quand le token porte les claims de rôle et que
+    l'utilisateur n'a pas été modifié depuis son émission.
+    """
+    if 'identity' in g:
+        return g.identity
+
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+    if 'role' in claims and not IdentityCache.is_stale(user_id, claims.get('iat', 0)):
+        identity = Identity(user_id, claims['role'], claims.get('perms'))
+    else:
+        identity = IdentityCache.get(user_id)
+    g.identity = identity
+    return identity
+
+
+class CurrentUser:
+    """
+    Utilisateur courant passé aux routes protégées par token_required
+
+    id, role et les permissions viennent du token ; l'enregistrement User
+    n'est chargé qu'au premier accès à un autre attribut (UserNotFound s'il
+    a été supprimé depuis l'émission du token).
+    """
+
+    def __init__(self, identity):
+        object.__setattr__(self, '_identity', identity)
+        object.__setattr__(self, '_user', None)
+
+    @property
+    def id(self):
+        return self._identity.id
+
+    @property
+    def role(self):
+        return self._identity.role
+
+    def has_permission(self, permission):
+        return self._identity.has_permission(permission)
+
+    def is_admin(self):
+        return self._identity.is_admin()
+
+    def _load(self):
+        if self._user is None:
+            user = db.session.get(User, self._identity.id)
+            if user is None:
+                raise UserNotFound(self._identity.id)
+            object.__setattr__(self, '_user', user)
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
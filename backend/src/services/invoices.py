@@ -0,0 +1,350 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm import selectinload, joinedload
+from src.extensions import db
+from src.models.order import Order
+
+
+class InvoiceBusy(Exception):
+    """Trop de factures en cours de rendu : la requête doit être refusée (503)"""
+
+
+# À incrémenter quand la mise en page change : les factures en cache sont alors régénérées
+TEMPLATE_VERSION = 1
+
+SELLER = {
+    'name': 'Samurai Nutrition',
+    'address': ['12 rue des Arts Martiaux', '75011 Paris', 'France'],
+    'email': 'contact@samurai-nutrition.com',
+    'siret': 'SIRET 000 000 000 00000',
+}
+
+STATUS_LABELS = {
+    'pending': 'En attente',
+    'processing': 'En préparation',
+    'shipped': 'Expédiée',
+    'delivered': 'Livrée',
+    'cancelled': 'Annulée',
+    'refunded': 'Remboursée',
+}
+
+
+def _money(value):
+    return f"{float(value or 0):,.2f} €".replace(',', ' ').replace('.', ',')
+
+
+def invoice_payload(order):
+    """
+    Données d'une facture sous forme de types simples
+
+    Le rendu s'exécute dans un autre processus, sans accès à la base : tout
+    ce qu'il affiche doit figurer ici.
+    """
+    user = order.user
+    items = [{
+        'sku': item.product_sku,
+        'name': item.product_name,
+        'quantity': item.quantity,
+        'unit_price': float(item.unit_price or 0),
+        'total_price': float(item.total_price or 0),
+    } for item in order.order_items]
+    return {
+        'number': f"FAC-{order.order_number}",
+        'order_number': order.order_number,
+        'date': (order.created_at or datetime.utcnow()).strftime('%d/%m/%Y'),
+        'status': STATUS_LABELS.get(order.status, order.status),
+        'customer': f"{user.first_name} {user.last_name}" if user else '',
+        'email': user.email if user else '',
+        'billing_address': (order.billing_address or '').splitlines(),
+        'shipping_address': (order.shipping_address or '').splitlines(),
+        'payment_method': order.payment_method or '',
+        'items': items,
+        'subtotal': sum(item['total_price'] for item in items),
+        'shipping_cost': float(order.shipping_cost or 0),
+        'discount_amount': float(order.discount_amount or 0),
+        'tax_amount': float(order.tax_amount or 0),
+        'total_amount': float(order.total_amount or 0),
+    }
+
+
+def render_invoice(payload, path):
+    """
+    Dessine la facture avec reportlab et l'écrit atomiquement dans path
+
+    Exécutée dans les processus du pool. Le canvas est « invariant » (pas
+    de date de création ni d'identifiant aléatoire) : un même contenu donne
+    toujours le même fichier.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+
+    try:
+        _draw_invoice(canvas.Canvas(tmp_path, pagesize=A4, invariant=1), payload, A4, mm)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def _draw_invoice(pdf, payload, pagesize, mm):
+    width, height = pagesize
+    pdf.setTitle(f"Facture {payload['number']}")
+    pdf.setAuthor(SELLER['name'])
+
+    def header():
+        pdf.setFont('Helvetica-Bold', 18)
+        pdf.drawString(20 * mm, height - 25 * mm, SELLER['name'])
+        pdf.setFont('Helvetica', 9)
+        y = height - 31 * mm
+        for line in SELLER['address'] + [SELLER['email'], SELLER['siret']]:
+            pdf.drawString(20 * mm, y, line)
+            y -= 4.5 * mm
+
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawRightString(width - 20 * mm, height - 25 * mm, 'FACTURE')
+        pdf.setFont('Helvetica', 9)
+        pdf.drawRightString(width - 20 * mm, height - 31 * mm, f"N° {payload['number']}")
+        pdf.drawRightString(width - 20 * mm, height - 35.5 * mm, f"Date : {payload['date']}")
+        pdf.drawRightString(width - 20 * mm, height - 40 * mm, f"Commande : {payload['order_number']}")
+        pdf.drawRightString(width - 20 * mm, height - 44.5 * mm, f"Statut : {payload['status']}")
+
+    def table_header(y):
+        pdf.setFont('Helvetica-Bold', 9)
+        pdf.drawString(20 * mm, y, 'Référence')
+        pdf.drawString(50 * mm, y, 'Désignation')
+        pdf.drawRightString(140 * mm, y, 'Qté')
+        pdf.drawRightString(165 * mm, y, 'Prix unitaire')
+        pdf.drawRightString(width - 20 * mm, y, 'Total')
+        pdf.line(20 * mm, y - 2 * mm, width - 20 * mm, y - 2 * mm)
+        pdf.setFont('Helvetica', 9)
+        return y - 7 * mm
+
+    header()
+
+    # Adresses
+    y = height - 62 * mm
+    for x, title, lines in ((20 * mm, 'Facturé à', [payload['customer'], payload['email']] + payload['billing_address']),
+                            (110 * mm, 'Livré à', payload['shipping_address'])):
+        pdf.setFont('Helvetica-Bold', 10)
+        pdf.drawString(x, y, title)
+        pdf.setFont('Helvetica', 9)
+        line_y = y - 5 * mm
+        for line in lines:
+            if line:
+                pdf.drawString(x, line_y, line[:60])
+                line_y -= 4.5 * mm
+
+    # Lignes de commande, sur plusieurs pages si nécessaire
+    y = table_header(height - 105 * mm)
+    for item in payload['items']:
+        if y < 45 * mm:
+            pdf.showPage()
+            header()
+            y = table_header(height - 62 * mm)
+        pdf.drawString(20 * mm, y, (item['sku'] or '')[:16])
+        pdf.drawString(50 * mm, y, (item['name'] or '')[:52])
+        pdf.drawRightString(140 * mm, y, str(item['quantity']))
+        pdf.drawRightString(165 * mm, y, _money(item['unit_price']))
+        pdf.drawRightString(width - 20 * mm, y, _money(item['total_price']))
+        y -= 6 * mm
+
+    # Totaux
+    y -= 4 * mm
+    pdf.line(120 * mm, y + 3 * mm, width - 20 * mm, y + 3 * mm)
+    rows = [('Sous-total', payload['subtotal']), ('Livraison', payload['shipping_cost'])]
+    if payload['discount_amount']:
+        rows.append(('Remise', -payload['discount_amount']))
+    rows.append(('TVA', payload['tax_amount']))
+    for label, amount in rows:
+        pdf.drawString(120 * mm, y, label)
+        pdf.drawRightString(width - 20 * mm, y, _money(amount))
+        y -= 5 * mm
+    pdf.setFont('Helvetica-Bold', 11)
+    pdf.drawString(120 * mm, y - 1 * mm, 'Total TTC')
+    pdf.drawRightString(width - 20 * mm, y - 1 * mm, _money(payload['total_amount']))
+
+    pdf.setFont('Helvetica', 8)
+    pdf.drawString(20 * mm, 20 * mm, f"Moyen de paiement : {payload['payment_method']}")
+    pdf.drawString(20 * mm, 15 * mm, f"{SELLER['name']} — merci pour votre commande.")
+    pdf.save()
+
+
+class InvoiceService:
+    """
+    Factures PDF des commandes, rendues dans un pool de processus et mises en cache
+
+    Le rendu reportlab occupe le CPU plusieurs dizaines de millisecondes :
+    il part dans INVOICE_RENDER_WORKERS processus dédiés, comme le hachage
+    des mots de passe. Au-delà de INVOICE_MAX_PENDING rendus en cours,
+    InvoiceBusy est levée. Deux demandes simultanées de la même facture
+    partagent le même rendu.
+
+    Le cache est adressé par contenu : le nom du fichier est un hash de
+    (id de commande, updated_at, version du modèle) dans INVOICE_CACHE_DIR
+    (par défaut instance/invoices). Une commande modifiée obtient donc un
+    nouveau fichier, et un fichier présent est toujours à jour.
+    """
+
+    _executor = None
+    _pending = 0
+    _inflight = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def workers():
+        return int(os.environ.get('INVOICE_RENDER_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+    @classmethod
+    def max_pending(cls):
+        return int(os.environ.get('INVOICE_MAX_PENDING', cls.workers() * 8))
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ProcessPoolExecutor(max_workers=cls.workers())
+        return cls._executor
+
+    # ==================== CACHE ====================
+
+    @staticmethod
+    def cache_dir():
+        return os.environ.get('INVOICE_CACHE_DIR') or os.path.join(current_app.instance_path, 'invoices')
+
+    @staticmethod
+    def cache_key(order):
+        updated_at = (order.updated_at or order.created_at or datetime.min).isoformat()
+        return hashlib.sha256(f"{order.id}:{updated_at}:{TEMPLATE_VERSION}".encode()).hexdigest()
+
+    @classmethod
+    def cache_path(cls, key, cache_dir=None):
+        return os.path.join(cache_dir or cls.cache_dir(), key[:2], f'{key}.pdf')
+
+    # ==================== RENDU ====================
+
+    @classmethod
+    def get_path(cls, order):
+        """
+        Chemin du PDF de la commande, rendu au besoin
+
+        Retourne (chemin, clé de cache) ; la clé sert d'ETag.
+        """
+        key = cls.cache_key(order)
+        path = cls.cache_path(key)
+        if os.path.exists(path):
+            return path, key
+
+        payload = invoice_payload(order)
+        if cls.workers() <= 0:
+            return render_invoice(payload, path), key
+
+        executor = cls._get_executor()
+        submitted = False
+        with cls._lock:
+            future = cls._inflight.get(key)
+            if future is None:
+                if cls._pending >= cls.max_pending():
+                    raise InvoiceBusy('Génération des factures surchargée, réessayez dans un instant')
+                future = executor.submit(render_invoice, payload, path)
+                cls._pending += 1
+                cls._inflight[key] = future
+                submitted = True
+        # Hors du verrou : le callback s'exécute immédiatement si le rendu est déjà terminé
+        if submitted:
+            future.add_done_callback(lambda _, key=key: cls._release(key))
+
+        timeout = float(os.environ.get('INVOICE_RENDER_TIMEOUT', 30))
+        return future.result(timeout=timeout), key
+
+    @classmethod
+    def _release(cls, key):
+        with cls._lock:
+            cls._inflight.pop(key, None)
+            cls._pending -= 1
+
+    # ==================== GÉNÉRATION EN MASSE ====================
+
+    @classmethod
+    def generate_range(cls, start, end, include_cancelled=False, batch_size=500, progress=None):
+        """
+        Rend les factures des commandes créées entre start (inclus) et end (exclu)
+
+        Les commandes sont lues par lots (clé = id, lignes et client chargés
+        par lot) et soumises au pool avec une fenêtre bornée, pour que la
+        mémoire ne dépende pas du nombre de factures. Les factures déjà en
+        cache sont ignorées. Retourne {'rendered', 'cached', 'failed'}.
+        """
+        executor = cls._get_executor() if cls.workers() > 0 else None
+        window = max(cls.workers(), 1) * 4
+        cache_dir = cls.cache_dir()
+        counts = {'rendered': 0, 'cached': 0, 'failed': 0}
+        running = set()
+
+        def collect(block):
+            if block:
+                done = wait(running, return_when=FIRST_COMPLETED).done
+            else:
+                done = {future for future in running if future.done()}
+            running.difference_update(done)
+            for future in done:
+                if future.exception():
+                    counts['failed'] += 1
+                    print(f"❌ Facture en échec: {future.exception()}")
+                else:
+                    counts['rendered'] += 1
+
+        last_id = 0
+        while True:
+            query = Order.query.options(selectinload(Order.order_items), joinedload(Order.user)).filter(
+                Order.created_at >= start, Order.created_at < end, Order.id > last_id
+            )
+            if not include_cancelled:
+                query = query.filter(Order.status != 'cancelled')
+            orders = query.order_by(Order.id).limit(batch_size).all()
+            if not orders:
+                break
+            last_id = orders[-1].id
+
+            for order in orders:
+                path = cls.cache_path(cls.cache_key(order), cache_dir)
+                if os.path.exists(path):
+                    counts['cached'] += 1
+                    continue
+                payload = invoice_payload(order)
+                if executor is None:
+                    render_invoice(payload, path)
+                    counts['rendered'] += 1
+                    continue
+                while len(running) >= window:
+                    collect(block=True)
+                running.add(executor.submit(render_invoice, payload, path))
+
+            # Les commandes du lot ne sont plus utiles : vider la session borne la mémoire
+            db.session.expunge_all()
+            collect(block=False)
+            if progress:
+                progress(counts)
+
+        while running:
+            collect(block=True)
+        return counts
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=True)
+                cls._executor = None
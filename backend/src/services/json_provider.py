@@ -0,0 +1,115 @@
+import json
+import re
+import secrets
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : json de la bibliothèque standard sinon
+    orjson = None
+
+
+class RawJSON:
+    """
+    Fragment JSON déjà encodé, inséré tel quel dans le document
+
+    Permet de garder en cache des sous-documents sérialisés (fiche produit,
+    etc.) et de les assembler sans les réencoder :
+    jsonify({'products': [RawJSON(card) for card in cards]}).
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+    def __repr__(self):
+        return f'RawJSON({self.data[:40]!r}...)'
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Fournisseur JSON de l'application (jsonify, current_app.json)
+
+    Encode avec orjson s'il est installé, sinon avec le module json. Les
+    types suivants sont gérés directement, sans conversion dans les routes :
+    Decimal (nombre), datetime/date/time (ISO 8601), Row SQLAlchemy (objet
+    par nom de colonne) et RawJSON (fragment inséré tel quel).
+
+    Les fragments sont remplacés à l'encodage par un marqueur (chaîne
+    contenant un jeton aléatoire propre au processus), puis substitués
+    dans les octets produits : un seul passage sur le document, quel que
+    soit le nombre de fragments.
+    """
+
+    sort_keys = True
+    mimetype = 'application/json'
+
+    _token = secrets.token_hex(8)
+    _marker = re.compile(rb'"\\u0000' + _token.encode('ascii') + rb'(\d+)\\u0000"')
+
+    # ==================== ENCODAGE ====================
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, Row):
+            return dict(value._mapping)
+        if isinstance(value, (datetime, date, time)):
+            return value.isoformat()
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        raise TypeError(f"Objet de type {type(value).__name__} non sérialisable en JSON")
+
+    def dumps_bytes(self, obj, indent=False):
+        """Encode obj en JSON (bytes UTF-8)"""
+        fragments = []
+
+        def default(value):
+            if isinstance(value, RawJSON):
+                fragments.append(value.data)
+                return f'\x00{self._token}{len(fragments) - 1}\x00'
+            return self._default(value)
+
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            data = orjson.dumps(obj, default=default, option=option)
+        else:
+            data = json.dumps(
+                obj, default=default, ensure_ascii=False, sort_keys=self.sort_keys,
+                indent=2 if indent else None, separators=None if indent else (',', ':')
+            ).encode('utf-8')
+
+        if fragments:
+            data = self._marker.sub(lambda match: fragments[int(match.group(1))], data)
+        return data
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    # ==================== RÉPONSES ====================
+
+    def response(self, *args, **kwargs):
+        """jsonify : le corps est passé en bytes, sans décodage intermédiaire"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj, indent=self._app.debug), mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Remplace le fournisseur JSON par défaut de Flask"""
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    return app.json
@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Bornes de l'histogramme de latence, en secondes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _EndpointStats:
+    __slots__ = ('count', 'duration', 'buckets', 'sql_count', 'sql_time', 'bytes')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # dernière case : +Inf
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.bytes = 0
+
+
+class RequestMetrics:
+    """
+    Métriques par endpoint : latence, requêtes SQL, temps SQL et taille des réponses
+
+    Les compteurs SQL de la requête en cours sont tenus dans flask.g par
+    des écouteurs d'événements SQLAlchemy ; à la fin de la requête, ils
+    sont agrégés par (méthode, route, statut) sous un verrou. Le coût par
+    requête se limite à quelques appels à perf_counter et à une mise à
+    jour de dictionnaire.
+    """
+
+    _stats = {}
+    _lock = threading.Lock()
+    _sql_listeners_installed = False
+
+    @classmethod
+    def init_app(cls, app):
+        cls._install_sql_listeners()
+        app.before_request(cls._before_request)
+        app.after_request(cls._after_request)
+
+    # ==================== SQL ====================
+
+    @classmethod
+    def _install_sql_listeners(cls):
+        if cls._sql_listeners_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', cls._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', cls._after_cursor_execute)
+        cls._sql_listeners_installed = True
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_app_context() and 'metrics_start' in g:
+            context.metrics_query_start = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, 'metrics_query_start', None)
+        if start is not None and has_app_context() and 'metrics_start' in g:
+            g.metrics_sql_time += time.perf_counter() - start
+            g.metrics_sql_count += 1
+
+    # ==================== REQUÊTES ====================
+
+    @staticmethod
+    def _before_request():
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+
+    @classmethod
+    def _after_request(cls, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        duration = time.perf_counter() - start
+        sql_count, sql_time = g.metrics_sql_count, g.metrics_sql_time
+
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        key = (request.method, endpoint, response.status_code)
+        size = 0 if response.is_streamed else (response.content_length or 0)
+
+        with cls._lock:
+            stats = cls._stats.get(key)
+            if stats is None:
+                stats = cls._stats[key] = _EndpointStats()
+            stats.count += 1
+            stats.duration += duration
+            stats.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+            stats.sql_count += sql_count
+            stats.sql_time += sql_time
+            stats.bytes += size
+
+        response.headers['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, db;dur={sql_time * 1000:.1f};desc="{sql_count} queries"'
+        )
+        return response
+
+    # ==================== EXPORT ====================
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._stats.clear()
+
+    @classmethod
+    def render_prometheus(cls):
+        """Toutes les métriques au format texte Prometheus"""
+        with cls._lock:
+            snapshot = [(key, stats.count, stats.duration, list(stats.buckets), stats.sql_count,
+                         stats.sql_time, stats.bytes) for key, stats in sorted(cls._stats.items(), key=str)]
+
+        def labels(method, endpoint, status, **extra):
+            endpoint = endpoint.replace('\\', '\\\\').replace('"', '\\"')
+            pairs = [f'method="{method}"', f'endpoint="{endpoint}"', f'status="{status}"']
+            pairs += [f'{name}="{value}"' for name, value in extra.items()]
+            return '{' + ','.join(pairs) + '}'
+
+        lines = [
+            '# HELP http_request_duration_seconds Latence des requêtes HTTP',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (method, endpoint, status), count, duration, buckets, _, _, _ in snapshot:
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                cumulative += bucket
+                lines.append(f'http_request_duration_seconds_bucket{labels(method, endpoint, status, le=bound)} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{labels(method, endpoint, status)} {duration:.6f}')
+            lines.append(f'http_request_duration_seconds_count{labels(method, endpoint, status)} {count}')
+
+        counters = (
+            ('http_request_sql_queries_total', 'Requêtes SQL exécutées', 4, '{}'),
+            ('http_request_sql_seconds_total', 'Temps passé dans les requêtes SQL', 5, '{:.6f}'),
+            ('http_response_size_bytes_total', 'Octets envoyés dans les réponses', 6, '{}'),
+        )
+        for name, help_text, index, fmt in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for row in snapshot:
+                method, endpoint, status = row[0]
+                lines.append(f'{name}{labels(method, endpoint, status)} {fmt.format(row[index])}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Active la collecte des métriques de requêtes pour l'application"""
+    RequestMetrics.init_app(app)
+    app.extensions['request_metrics'] = RequestMetrics
+    return RequestMetrics
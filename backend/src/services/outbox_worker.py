@@ -0,0 +1,194 @@
+import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text, bindparam, DateTime
+from src.extensions import db
+from src.models.outbox import OutboxMessage
+
+
+# ==================== HANDLERS ====================
+
+def handle_order_created(payload):
+    """Génère un email par administrateur pour une nouvelle commande"""
+    from src.models.order import Order
+    from src.models.user import User
+    from src.services.email_service import EmailService
+
+    order = db.session.get(Order, payload['order_id'])
+    if not order:
+        return
+    subject, body = EmailService.build_new_order_notification(order)
+    for (admin_email,) in db.session.query(User.email).filter(User.role == 'admin').all():
+        OutboxMessage.enqueue('email', {
+            'to': admin_email,
+            'subject': f'[ADMIN] {subject}',
+            'body': body,
+            'is_html': True
+        })
+
+
+def handle_order_status_changed(payload):
+    """Génère l'email de changement de statut destiné au client"""
+    from src.models.order import Order
+    from src.services.email_service import EmailService
+
+    order = db.session.get(Order, payload['order_id'])
+    if not order or not order.user:
+        return
+    subject, body = EmailService.build_order_status_change_notification(
+        order, payload.get('old_status'), payload.get('new_status'), payload.get('comment', '')
+    )
+    OutboxMessage.enqueue('email', {
+        'to': order.user.email,
+        'subject': subject,
+        'body': body,
+        'is_html': True
+    })
+
+
+def handle_email(payload):
+    """Envoie un email ; toute erreur SMTP déclenche une nouvelle tentative"""
+    from src.services.email_service import EmailService
+
+    EmailService.send_email(
+        to_email=payload['to'],
+        subject=payload['subject'],
+        body=payload['body'],
+        is_html=payload.get('is_html', False),
+        raise_errors=True
+    )
+
+
+HANDLERS = {
+    'order_created': handle_order_created,
+    'order_status_changed': handle_order_status_changed,
+    'email': handle_email
+}
+
+
+# ==================== WORKER ====================
+
+class OutboxWorker:
+    """
+    Vide l'outbox des notifications en arrière-plan
+
+    Un thread de dispatch réserve des lots de messages (UPDATE ... RETURNING,
+    sûr même avec plusieurs processus) et les traite dans un pool de threads.
+    Un message en échec est replanifié avec un délai exponentiel, puis passé
+    en statut 'dead' après OUTBOX_MAX_ATTEMPTS tentatives. Un message réservé
+    par un worker arrêté brutalement redevient disponible à la fin de son bail.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.workers = config.get('OUTBOX_WORKERS', 4)
+        self.poll_interval = config.get('OUTBOX_POLL_INTERVAL', 1.0)
+        self.batch_size = config.get('OUTBOX_BATCH_SIZE', 20)
+        self.max_attempts = config.get('OUTBOX_MAX_ATTEMPTS', 5)
+        self.backoff_base = config.get('OUTBOX_BACKOFF_BASE', 2.0)
+        self.lease_seconds = config.get('OUTBOX_LEASE_SECONDS', 60)
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    def claim_batch(self):
+        """Réserve jusqu'à batch_size messages disponibles et les retourne"""
+        now = datetime.utcnow()
+        rows = db.session.execute(text(
+            "UPDATE notification_outbox "
+            "SET status = 'processing', attempts = attempts + 1, available_at = :lease_until "
+            "WHERE id IN ("
+            "  SELECT id FROM notification_outbox "
+            "  WHERE status IN ('pending', 'processing') AND available_at <= :now "
+            "  ORDER BY id LIMIT :limit"
+            ") RETURNING id, kind, payload, attempts"
+        ).bindparams(bindparam('now', type_=DateTime), bindparam('lease_until', type_=DateTime)), {
+            'now': now,
+            'lease_until': now + timedelta(seconds=self.lease_seconds),
+            'limit': self.batch_size
+        }).fetchall()
+        db.session.commit()
+        return [(row.id, row.kind, json.loads(row.payload) if isinstance(row.payload, str) else row.payload,
+                 row.attempts) for row in rows]
+
+    def _backoff(self, attempts):
+        delay = self.backoff_base * (2 ** (attempts - 1))
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    def process_message(self, message_id, kind, payload, attempts):
+        """Traite un message réservé (dans un contexte d'application)"""
+        with self.app.app_context():
+            message = db.session.get(OutboxMessage, message_id)
+            try:
+                handler = HANDLERS.get(kind)
+                if handler is None:
+                    raise ValueError(f'Type de message inconnu: {kind}')
+                handler(payload)
+                message.status = 'sent'
+                message.processed_at = datetime.utcnow()
+                message.last_error = None
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                message = db.session.get(OutboxMessage, message_id)
+                message.last_error = str(e)
+                if attempts >= self.max_attempts:
+                    message.status = 'dead'
+                    message.processed_at = datetime.utcnow()
+                    print(f"Outbox: message {message_id} ({kind}) abandonné après {attempts} tentatives: {e}")
+                else:
+                    message.status = 'pending'
+                    message.available_at = datetime.utcnow() + self._backoff(attempts)
+                db.session.commit()
+
+    def process_pending(self):
+        """Traite de façon synchrone tous les messages disponibles ; retourne leur nombre"""
+        processed = 0
+        while True:
+            with self.app.app_context():
+                batch = self.claim_batch()
+            if not batch:
+                return processed
+            for message in batch:
+                self.process_message(*message)
+            processed += len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    batch = self.claim_batch()
+                if batch:
+                    list(self._executor.map(lambda m: self.process_message(*m), batch))
+                    continue
+            except Exception as e:
+                print(f"Outbox: erreur du worker: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Démarre le thread de dispatch et le pool de traitement"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='outbox')
+        self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Arrête le worker après le lot en cours"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+
+def init_outbox_worker(app):
+    """Crée et démarre le worker de l'outbox pour l'application"""
+    worker = OutboxWorker(app)
+    app.extensions['outbox_worker'] = worker
+    return worker.start()
@@ -0,0 +1,214 @@
+import base64
+import json
+import math
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import func, select, tuple_
+
+
+def encode_cursor(values):
+    """Encode une liste de valeurs de tri en curseur opaque (base64 url-safe)"""
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append({'dt': value.isoformat()})
+        elif isinstance(value, Decimal):
+            payload.append({'dec': str(value)})
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_value(value):
+    """Valeur de tri décodée ; ValueError si son type ne peut pas venir d'encode_cursor"""
+    if isinstance(value, dict):
+        if len(value) != 1 or not isinstance(next(iter(value.values())), str):
+            raise ValueError('Curseur invalide')
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'dec' in value:
+            try:
+                number = Decimal(value['dec'])
+            except ArithmeticError:
+                raise ValueError('Curseur invalide')
+            if not number.is_finite():
+                raise ValueError('Curseur invalide')
+            return number
+        raise ValueError('Curseur invalide')
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if isinstance(value, float) and math.isfinite(value):
+        return value
+    raise ValueError('Curseur invalide')
+
+
+def decode_cursor(cursor, size=None):
+    """
+    Décode un curseur produit par encode_cursor
+
+    ValueError si le curseur est illisible, si une valeur n'a pas l'un des
+    types produits par encode_cursor ou si le nombre de valeurs n'est pas
+    `size` : les routes répondent alors 400.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Curseur invalide')
+    if not isinstance(payload, list) or (size is not None and len(payload) != size):
+        raise ValueError('Curseur invalide')
+
+    try:
+        return [_decode_value(value) for value in payload]
+    except ValueError:
+        raise ValueError('Curseur invalide')
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=20, descending=False):
+    """
+    Pagination par clé (keyset) sur le couple (sort_column, id_column)
+
+    Contrairement à OFFSET, le coût d'une page ne dépend pas de sa
+    profondeur : la base reprend directement après la dernière clé vue,
+    via l'index couvrant (sort_column, id). Retourne (éléments, curseur
+    suivant ou None).
+    """
+    keys = tuple_(sort_column, id_column)
+    if cursor:
+        sort_value, id_value = decode_cursor(cursor, size=2)
+        if not isinstance(id_value, int) or isinstance(id_value, bool):
+            raise ValueError('Curseur invalide')
+        bound = tuple_(sort_value, id_value)
+        query = query.filter(keys < bound if descending else keys > bound)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, sort_column.key), getattr(last, id_column.key)])
+    return items, next_cursor
+
+
+# Paramètres de pagination, exclus de la clé de cache des totaux
+PAGE_ARGS = ('page', 'per_page', 'cursor', 'limit')
+
+
+class CountCache:
+    """
+    Cache par processus des totaux des listes paginées
+
+    Un COUNT(*) filtré coûte autant qu'un parcours de la table : il est
+    calculé une fois par jeu de filtres, puis réutilisé pendant
+    PAGINATION_COUNT_TTL secondes (30 par défaut). Le total affiché peut
+    donc avoir jusqu'à ce délai de retard ; les pages, elles, sont
+    toujours lues en base.
+    """
+
+    MAX_ENTRIES = 1024
+
+    _entries = {}   # clé -> (total, expiration)
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, compute):
+        now = time.monotonic()
+        entry = cls._entries.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        total = compute()
+        ttl = current_app.config.get('PAGINATION_COUNT_TTL', 30)
+        with cls._lock:
+            if len(cls._entries) >= cls.MAX_ENTRIES:
+                for stale in [k for k, e in cls._entries.items() if e[1] <= now]:
+                    del cls._entries[stale]
+                if len(cls._entries) >= cls.MAX_ENTRIES:
+                    cls._entries.clear()
+            cls._entries[key] = (total, now + ttl)
+        return total
+
+    @classmethod
+    def invalidate(cls, name):
+        """Oublie les totaux d'une liste (tous filtres confondus)"""
+        with cls._lock:
+            for key in [k for k in cls._entries if k[0] == name]:
+                del cls._entries[key]
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+
+def paginate_list(query, sort_column, id_column, args, count_key, per_page=20, max_per_page=100,
+                  descending=True, options=()):
+    """
+    Page d'une liste triée par (sort_column, id_column), pour les routes de liste
+
+    Deux modes, selon les paramètres de la requête (args) :
+    - cursor/limit : pagination par clé (keyset_page), coût constant quelle
+      que soit la profondeur ;
+    - page/per_page : numéros de page (comportement historique). L'OFFSET
+      est appliqué à une sous-requête qui ne lit que les ids dans l'index
+      (sort_column, id), puis seules les lignes de la page sont chargées.
+
+    Le total vient de CountCache, sous la clé (count_key, filtres). options
+    sont les options de chargement, appliquées à la lecture des lignes
+    seulement. Retourne (éléments, dict de pagination) ; ValueError si le
+    curseur est invalide.
+    """
+    filters = tuple(sorted((k, v) for k, v in args.items(multi=True) if k not in PAGE_ARGS))
+    total = CountCache.get(
+        (count_key, filters),
+        lambda: query.order_by(None).with_entities(func.count(id_column)).scalar()
+    )
+
+    if 'cursor' in args or 'limit' in args:
+        limit = min(max(args.get('limit', per_page, type=int), 1), max_per_page)
+        items, next_cursor = keyset_page(
+            query.options(*options), sort_column, id_column,
+            cursor=args.get('cursor'), limit=limit, descending=descending
+        )
+        return items, {
+            'limit': limit,
+            'total': total,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+
+    page = max(args.get('page', 1, type=int), 1)
+    per_page = min(max(args.get('per_page', per_page, type=int), 1), max_per_page)
+    if descending:
+        ordering = (sort_column.desc(), id_column.desc())
+    else:
+        ordering = (sort_column.asc(), id_column.asc())
+
+    # Une ligne de plus que la page : indique s'il existe une page suivante
+    page_ids = query.order_by(None).with_entities(id_column).order_by(*ordering) \
+        .limit(per_page + 1).offset((page - 1) * per_page).subquery()
+    items = query.options(*options).filter(id_column.in_(select(page_ids.c[0]))).order_by(*ordering).all()
+
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([getattr(items[-1], sort_column.key), getattr(items[-1], id_column.key)])
+    return items, {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': math.ceil(total / per_page) if total else 0,
+        'has_next': has_next,
+        'has_prev': page > 1,
+        'next_cursor': next_cursor
+    }
@@ -0,0 +1,151 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class HasherBusy(Exception):
+    """Trop de calculs de mot de passe en attente : la requête doit être refusée (503)"""
+
+
+# Paramètres par défaut de werkzeug, pour comparer un hash stocké à la méthode configurée
+_DEFAULT_PARAMS = {
+    'scrypt': 'scrypt:32768:8:1',
+    'pbkdf2': f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}',
+    'pbkdf2:sha256': f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}',
+}
+
+
+def normalize_method(method):
+    """Forme complète d'une méthode werkzeug ('scrypt' -> 'scrypt:32768:8:1')"""
+    return _DEFAULT_PARAMS.get(method, method)
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """
+    Hachage des mots de passe dans un pool de processus borné
+
+    scrypt et pbkdf2 occupent le CPU (et le GIL) pendant des dizaines de
+    millisecondes : exécutés dans le thread de la requête, une rafale de
+    connexions affame tout le reste du trafic. Les calculs partent donc
+    dans PASSWORD_HASH_WORKERS processus dédiés ; au-delà de
+    PASSWORD_HASH_MAX_PENDING calculs en cours ou en attente, HasherBusy
+    est levée immédiatement au lieu d'allonger la file. Un appelant qui
+    attend plus de PASSWORD_HASH_TIMEOUT secondes reçoit aussi HasherBusy
+    (503), mais le calcul garde sa place jusqu'à ce qu'il se termine ; un
+    pool cassé (worker tué) est remplacé.
+
+    PASSWORD_HASH_METHOD choisit l'algorithme et ses paramètres (voir
+    calibrate_password_hash.py). PASSWORD_HASH_WORKERS=0 revient au calcul
+    dans le thread de la requête.
+    """
+
+    _executor = None
+    _pending = 0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def method():
+        return normalize_method(os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'))
+
+    @staticmethod
+    def workers():
+        return int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+    @classmethod
+    def max_pending(cls):
+        return int(os.environ.get('PASSWORD_HASH_MAX_PENDING', cls.workers() * 4))
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ProcessPoolExecutor(max_workers=cls.workers())
+        return cls._executor
+
+    @classmethod
+    def _discard_executor(cls, executor):
+        """Abandonne un pool cassé (worker tué) : le suivant est recréé à la demande"""
+        with cls._lock:
+            if cls._executor is executor:
+                cls._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _release(cls, future):
+        with cls._lock:
+            cls._pending -= 1
+
+    @classmethod
+    def _submit(cls, fn, *args):
+        """Soumet un calcul ; un pool cassé est remplacé une fois avant d'abandonner"""
+        executor = cls._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            cls._discard_executor(executor)
+            executor = cls._get_executor()
+            return executor, executor.submit(fn, *args)
+
+    @classmethod
+    def _run(cls, fn, *args, retry=True):
+        if cls.workers() <= 0:
+            return fn(*args)
+
+        with cls._lock:
+            if cls._pending >= cls.max_pending():
+                raise HasherBusy('Service d\'authentification surchargé, réessayez dans un instant')
+            cls._pending += 1
+        try:
+            executor, future = cls._submit(fn, *args)
+        except BaseException:
+            cls._release(None)
+            raise
+        # La place est rendue quand le calcul se termine (ou est annulé), pas quand l'appelant abandonne
+        future.add_done_callback(cls._release)
+
+        timeout = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Encore en file d'attente : retiré du pool ; déjà en cours : garde sa place jusqu'à la fin
+            future.cancel()
+            raise HasherBusy('Service d\'authentification surchargé, réessayez dans un instant')
+        except BrokenProcessPool:
+            # Worker tué pendant le calcul : nouveau pool, et un seul nouvel essai
+            cls._discard_executor(executor)
+            if not retry:
+                raise
+            return cls._run(fn, *args, retry=False)
+
+    @classmethod
+    def hash(cls, password):
+        """Hache un mot de passe avec la méthode configurée"""
+        return cls._run(_hash, password, cls.method())
+
+    @classmethod
+    def verify(cls, password_hash, password):
+        """Vérifie un mot de passe contre son hash"""
+        return cls._run(_verify, password_hash, password)
+
+    @classmethod
+    def needs_rehash(cls, password_hash):
+        """Vrai si le hash stocké n'utilise pas la méthode et les paramètres actuels"""
+        return password_hash.split('$', 1)[0] != cls.method()
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=True)
+                cls._executor = None
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from flask import current_app
+from src.models.product import Product
+from src.services.json_provider import RawJSON
+
+
+class ProductCardCache:
+    """
+    Cache par processus des fiches produit déjà encodées en JSON
+
+    Deux variantes par produit : 'full' (PUBLIC_FIELDS, fiche détaillée et
+    catalogue complet) et 'compact' (LIST_FIELDS, listes paginées). Une
+    entrée est valide pour un (product_id, updated_at) donné : une fiche
+    dont le produit a été modifié depuis n'est jamais resservie, même si
+    l'invalidation explicite a été manquée. Les écritures connues (routes
+    d'administration des produits, réservation de stock au checkout)
+    appellent en plus invalidate() pour libérer la place aussitôt.
+
+    Les fiches sont rendues sous forme de RawJSON : une liste de N produits
+    est assemblée par concaténation de N fragments, sans réencodage. Le
+    cache est borné à PRODUCT_CARD_CACHE_BYTES octets (64 Mo par défaut),
+    les fiches les moins récemment servies étant évincées en premier.
+    """
+
+    VARIANTS = {
+        'full': Product.PUBLIC_FIELDS,
+        'compact': Product.LIST_FIELDS,
+    }
+
+    # Produits absents du cache chargés par paquets (limite de variables SQLite)
+    LOAD_BATCH = 500
+
+    _entries = OrderedDict()   # (product_id, variante) -> (updated_at, octets)
+    _bytes = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def variant_for(cls, fields):
+        """Variante correspondant exactement à une liste de champs, ou None"""
+        for variant, variant_fields in cls.VARIANTS.items():
+            if tuple(fields) == variant_fields:
+                return variant
+        return None
+
+    # ==================== CACHE ====================
+
+    @classmethod
+    def _get(cls, product_id, updated_at, variant):
+        key = (product_id, variant)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None or entry[0] != updated_at:
+                return None
+            cls._entries.move_to_end(key)
+            return entry[1]
+
+    @classmethod
+    def _put(cls, product_id, updated_at, variant, data):
+        key = (product_id, variant)
+        budget = current_app.config.get('PRODUCT_CARD_CACHE_BYTES', 64 * 1024 * 1024)
+        with cls._lock:
+            previous = cls._entries.pop(key, None)
+            if previous is not None:
+                cls._bytes -= len(previous[1])
+            cls._entries[key] = (updated_at, data)
+            cls._bytes += len(data)
+            while cls._bytes > budget and cls._entries:
+                _, (_, evicted) = cls._entries.popitem(last=False)
+                cls._bytes -= len(evicted)
+
+    @classmethod
+    def _encode(cls, product, variant):
+        data = current_app.json.dumps_bytes(product.to_dict(cls.VARIANTS[variant]))
+        cls._put(product.id, product.updated_at, variant, data)
+        return data
+
+    # ==================== FICHES ====================
+
+    @classmethod
+    def card(cls, product, variant='full'):
+        """Fiche d'un produit chargé (au moins les colonnes de la variante), en RawJSON"""
+        data = cls._get(product.id, product.updated_at, variant)
+        if data is None:
+            data = cls._encode(product, variant)
+        return RawJSON(data)
+
+    @classmethod
+    def cards(cls, query, variant='full'):
+        """
+        Fiches des produits d'une requête, dans l'ordre de la requête
+
+        Seuls (id, updated_at) sont lus pour toute la liste ; les produits
+        absents du cache ou modifiés sont chargés par requêtes IN, avec les
+        seules colonnes de la variante.
+        """
+        keys = query.with_entities(Product.id, Product.updated_at).all()
+
+        found, missing = {}, []
+        for product_id, updated_at in keys:
+            data = cls._get(product_id, updated_at, variant)
+            if data is None:
+                missing.append(product_id)
+            else:
+                found[product_id] = data
+
+        fields = cls.VARIANTS[variant]
+        for start in range(0, len(missing), cls.LOAD_BATCH):
+            batch = missing[start:start + cls.LOAD_BATCH]
+            for product in Product.query.options(Product.load_only_fields(fields)).filter(Product.id.in_(batch)):
+                found[product.id] = cls._encode(product, variant)
+
+        return [RawJSON(found[product_id]) for product_id, _ in keys if product_id in found]
+
+    # ==================== INVALIDATION ====================
+
+    @classmethod
+    def invalidate(cls, *product_ids):
+        """Retire les fiches des produits modifiés (à appeler après le commit)"""
+        with cls._lock:
+            for product_id in product_ids:
+                for variant in cls.VARIANTS:
+                    entry = cls._entries.pop((product_id, variant), None)
+                    if entry is not None:
+                        cls._bytes -= len(entry[1])
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._bytes = 0
@@ -0,0 +1,316 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import and_, or_
+from src.extensions import db
+from src.models.product import Product
+
+
+# Tranches de prix (clé, borne basse incluse, borne haute exclue)
+PRICE_BUCKETS = (
+    ('0-20', 0, 20),
+    ('20-40', 20, 40),
+    ('40-60', 40, 60),
+    ('60-100', 60, 100),
+    ('100+', 100, None),
+)
+PRICE_BUCKET_KEYS = tuple(key for key, _, _ in PRICE_BUCKETS)
+
+# Seuils de note proposés (« 4 étoiles et plus », etc.)
+RATING_THRESHOLDS = (4, 3, 2, 1)
+
+FILTER_ARGS = ('category', 'price', 'in_stock', 'featured', 'min_rating')
+
+
+def price_bucket(price):
+    value = float(price or 0)
+    for key, low, high in PRICE_BUCKETS:
+        if value >= low and (high is None or value < high):
+            return key
+    return PRICE_BUCKETS[0][0]
+
+
+def _flag(value, name):
+    if value in ('1', 'true', 'True'):
+        return True
+    if value in (None, '', '0', 'false', 'False'):
+        return False
+    raise ValueError(f'Valeur invalide pour {name}: {value} (1 ou 0)')
+
+
+class FacetFilters:
+    """
+    Filtres du catalogue lus dans la requête
+
+    category et price acceptent plusieurs valeurs séparées par des
+    virgules (OU entre les valeurs d'une même facette, ET entre facettes).
+    """
+
+    def __init__(self, categories=(), prices=(), in_stock=False, featured=False, min_rating=None):
+        self.categories = tuple(categories)
+        self.prices = tuple(prices)
+        self.in_stock = in_stock
+        self.featured = featured
+        self.min_rating = min_rating
+
+    @classmethod
+    def from_args(cls, args):
+        """Filtres des paramètres de requête (ValueError si un paramètre est invalide)"""
+        categories = [c.strip() for c in args.get('category', '').split(',') if c.strip()]
+        prices = [p.strip() for p in args.get('price', '').split(',') if p.strip()]
+        unknown = [p for p in prices if p not in PRICE_BUCKET_KEYS]
+        if unknown:
+            raise ValueError(f'Tranche de prix invalide: {", ".join(unknown)} '
+                             f'(valeurs acceptées: {", ".join(PRICE_BUCKET_KEYS)})')
+
+        min_rating = args.get('min_rating')
+        if min_rating not in (None, ''):
+            try:
+                min_rating = int(min_rating)
+            except ValueError:
+                min_rating = None
+            if min_rating not in RATING_THRESHOLDS:
+                raise ValueError(f'Note minimale invalide (valeurs acceptées: '
+                                 f'{", ".join(str(t) for t in RATING_THRESHOLDS)})')
+        else:
+            min_rating = None
+
+        return cls(categories, prices, _flag(args.get('in_stock'), 'in_stock'),
+                   _flag(args.get('featured'), 'featured'), min_rating)
+
+    def __bool__(self):
+        return bool(self.categories or self.prices or self.in_stock or self.featured or self.min_rating)
+
+    def apply(self, query):
+        """Mêmes filtres en SQL, pour les listes de produits"""
+        if self.categories:
+            query = query.filter(Product.category.in_(self.categories))
+        if self.prices:
+            ranges = []
+            for key, low, high in PRICE_BUCKETS:
+                if key in self.prices:
+                    condition = Product.price >= low
+                    ranges.append(condition if high is None else and_(condition, Product.price < high))
+            query = query.filter(or_(*ranges))
+        if self.in_stock:
+            query = query.filter(Product.stock_quantity > 0)
+        if self.featured:
+            query = query.filter(Product.featured.is_(True))
+        if self.min_rating:
+            query = query.filter(Product.rating >= self.min_rating)
+        return query
+
+
+class ProductFacetIndex:
+    """
+    Index en mémoire des facettes du catalogue (bitmaps par valeur)
+
+    Chaque valeur de facette (catégorie, tranche de prix, en stock, mis en
+    avant, note minimale) a un bitmap des produits actifs : un entier
+    Python dont le bit n est à 1 si le produit d'id n a cette valeur. Le
+    nombre de produits d'une combinaison de filtres est le nombre de bits
+    à 1 de l'intersection des bitmaps : aucune requête SQL.
+
+    Les comptes de chaque facette appliquent les filtres des autres
+    facettes seulement, pour afficher ce que donnerait chaque choix.
+
+    L'index est construit à la première utilisation, puis mis à jour
+    produit par produit par refresh() après chaque écriture (routes
+    d'administration, réservation de stock au checkout). Il est propre au
+    processus : il est reconstruit entièrement toutes les
+    FACET_INDEX_MAX_AGE secondes (300 par défaut) pour reprendre les
+    écritures faites par les autres workers.
+    """
+
+    _lock = threading.Lock()
+    _built_at = None
+    _products = {}       # id -> (actif, catégorie, tranche, en stock, mis en avant, note)
+    _active = 0
+    _category = {}       # catégorie -> bitmap
+    _price = {}          # tranche -> bitmap
+    _in_stock = 0
+    _featured = 0
+    _rating = {}         # seuil -> bitmap (note >= seuil)
+    _category_totals = {}  # catégorie -> nombre de produits, actifs ou non
+
+    COLUMNS = (Product.id, Product.is_active, Product.category, Product.price,
+               Product.stock_quantity, Product.featured, Product.rating)
+
+    # ==================== CONSTRUCTION ====================
+
+    @staticmethod
+    def _entry(row):
+        rating = float(row.rating or 0)
+        return (bool(row.is_active), row.category, price_bucket(row.price), (row.stock_quantity or 0) > 0,
+                bool(row.featured), rating)
+
+    @classmethod
+    def ensure(cls):
+        max_age = current_app.config.get('FACET_INDEX_MAX_AGE', 300)
+        if cls._built_at is None or time.monotonic() - cls._built_at > max_age:
+            cls.rebuild()
+
+    @classmethod
+    def rebuild(cls):
+        """Reconstruit l'index à partir de la table products"""
+        products = {row.id: cls._entry(row) for row in db.session.query(*cls.COLUMNS)}
+
+        # Bits positionnés dans des tableaux d'octets, convertis en entiers une seule fois
+        size = (max(products, default=0) >> 3) + 1
+        buffers = {}
+
+        def mark(key, product_id):
+            buffer = buffers.get(key)
+            if buffer is None:
+                buffer = buffers[key] = bytearray(size)
+            buffer[product_id >> 3] |= 1 << (product_id & 7)
+
+        category_totals = {}
+        for product_id, (active, category, bucket, in_stock, featured, rating) in products.items():
+            if category:
+                category_totals[category] = category_totals.get(category, 0) + 1
+            if not active:
+                continue
+            mark(('active',), product_id)
+            if category:
+                mark(('category', category), product_id)
+            mark(('price', bucket), product_id)
+            if in_stock:
+                mark(('in_stock',), product_id)
+            if featured:
+                mark(('featured',), product_id)
+            for threshold in RATING_THRESHOLDS:
+                if rating >= threshold:
+                    mark(('rating', threshold), product_id)
+
+        bitmaps = {key: int.from_bytes(buffer, 'little') for key, buffer in buffers.items()}
+        with cls._lock:
+            cls._products = products
+            cls._active = bitmaps.get(('active',), 0)
+            cls._category = {key[1]: bm for key, bm in bitmaps.items() if key[0] == 'category'}
+            cls._price = {key[1]: bm for key, bm in bitmaps.items() if key[0] == 'price'}
+            cls._in_stock = bitmaps.get(('in_stock',), 0)
+            cls._featured = bitmaps.get(('featured',), 0)
+            cls._rating = {key[1]: bm for key, bm in bitmaps.items() if key[0] == 'rating'}
+            cls._category_totals = category_totals
+            cls._built_at = time.monotonic()
+
+    @classmethod
+    def refresh(cls, *product_ids):
+        """Met à jour les produits modifiés, créés ou supprimés (à appeler après le commit)"""
+        if cls._built_at is None or not product_ids:
+            return
+        rows = {row.id: cls._entry(row) for row in
+                db.session.query(*cls.COLUMNS).filter(Product.id.in_(product_ids))}
+        with cls._lock:
+            for product_id in product_ids:
+                cls._set(product_id, cls._products.pop(product_id, None), clear=True)
+                entry = rows.get(product_id)
+                if entry is not None:
+                    cls._products[product_id] = entry
+                    cls._set(product_id, entry)
+
+    @classmethod
+    def _set(cls, product_id, entry, clear=False):
+        """Positionne (ou efface) les bits d'un produit ; appelé sous le verrou"""
+        if entry is None:
+            return
+        active, category, bucket, in_stock, featured, rating = entry
+        if category:
+            cls._category_totals[category] = cls._category_totals.get(category, 0) + (-1 if clear else 1)
+            if not cls._category_totals[category]:
+                del cls._category_totals[category]
+        if not active:
+            return
+
+        bit = 1 << product_id
+
+        def apply(bitmap):
+            return bitmap & ~bit if clear else bitmap | bit
+
+        cls._active = apply(cls._active)
+        if category:
+            cls._category[category] = apply(cls._category.get(category, 0))
+        cls._price[bucket] = apply(cls._price.get(bucket, 0))
+        if in_stock:
+            cls._in_stock = apply(cls._in_stock)
+        if featured:
+            cls._featured = apply(cls._featured)
+        for threshold in RATING_THRESHOLDS:
+            if rating >= threshold:
+                cls._rating[threshold] = apply(cls._rating.get(threshold, 0))
+
+    # ==================== COMPTES ====================
+
+    @classmethod
+    def categories(cls):
+        """Catégories de tous les produits (actifs ou non), triées"""
+        cls.ensure()
+        return sorted(cls._category_totals)
+
+    @classmethod
+    def counts(cls, filters):
+        """
+        Nombre de produits actifs correspondant aux filtres, et comptes de
+        chaque valeur de facette sous les filtres des autres facettes
+        """
+        cls.ensure()
+        with cls._lock:
+            active = cls._active
+            masks = {
+                'category': cls._union(cls._category, filters.categories, active),
+                'price': cls._union(cls._price, filters.prices, active),
+                'in_stock': cls._in_stock if filters.in_stock else active,
+                'featured': cls._featured if filters.featured else active,
+                'min_rating': cls._rating.get(filters.min_rating, 0) if filters.min_rating else active,
+            }
+
+            def others(excluded):
+                result = active
+                for name, mask in masks.items():
+                    if name != excluded:
+                        result &= mask
+                return result
+
+            total = others(None)
+            base = others('category')
+            category_facet = [{
+                'value': category, 'count': (bitmap & base).bit_count(),
+                'selected': category in filters.categories
+            } for category, bitmap in sorted(cls._category.items()) if bitmap]
+
+            base = others('price')
+            price_facet = [{
+                'value': key, 'min': low, 'max': high,
+                'count': (cls._price.get(key, 0) & base).bit_count(),
+                'selected': key in filters.prices
+            } for key, low, high in PRICE_BUCKETS]
+
+            base = others('min_rating')
+            rating_facet = [{
+                'value': threshold, 'count': (cls._rating.get(threshold, 0) & base).bit_count(),
+                'selected': filters.min_rating == threshold
+            } for threshold in RATING_THRESHOLDS]
+
+            in_stock_count = (cls._in_stock & others('in_stock')).bit_count()
+            featured_count = (cls._featured & others('featured')).bit_count()
+
+        return {
+            'total': total.bit_count(),
+            'facets': {
+                'category': category_facet,
+                'price': price_facet,
+                'in_stock': {'count': in_stock_count, 'selected': filters.in_stock},
+                'featured': {'count': featured_count, 'selected': filters.featured},
+                'min_rating': rating_facet,
+            }
+        }
+
+    @staticmethod
+    def _union(bitmaps, values, default):
+        if not values:
+            return default
+        result = 0
+        for value in values:
+            result |= bitmaps.get(value, 0)
+        return result
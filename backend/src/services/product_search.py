@@ -0,0 +1,123 @@
+import re
+from sqlalchemy import text
+from src.extensions import db
+
+
+class ProductSearchIndex:
+    """
+    Index de recherche plein texte des produits, stocké dans SQLite (FTS5)
+
+    L'index est une table virtuelle dont le rowid est l'id du produit.
+    Seuls les produits actifs y figurent. Les écritures passent par
+    db.session : elles sont donc validées ou annulées avec la transaction
+    de la route d'administration qui les déclenche.
+    """
+
+    TABLE = 'products_fts'
+
+    # Poids BM25 par colonne, dans l'ordre de COLUMNS
+    COLUMNS = ('name', 'description', 'category', 'sku', 'ingredients')
+    WEIGHTS = (10.0, 1.0, 4.0, 8.0, 2.0)
+
+    _ready = False
+
+    @classmethod
+    def ensure_schema(cls):
+        """
+        Crée la table FTS5 si elle n'existe pas encore et la remplit
+
+        Retourne True si la table vient d'être créée : l'appelant doit
+        alors valider la transaction pour la rendre persistante.
+        """
+        if cls._ready:
+            return False
+
+        exists = db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name=:name"
+        ), {'name': cls.TABLE}).fetchone()
+        if exists:
+            cls._ready = True
+            return False
+
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {cls.TABLE} USING fts5("
+            f"{', '.join(cls.COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+        ))
+        cls._populate()
+        return True
+
+    @classmethod
+    def rebuild(cls):
+        """Reconstruit entièrement l'index à partir de la table products"""
+        cls.ensure_schema()
+        db.session.execute(text(f"DELETE FROM {cls.TABLE}"))
+        cls._populate()
+
+    @classmethod
+    def _populate(cls):
+        columns = ', '.join(cls.COLUMNS)
+        values = ', '.join(f"COALESCE({c}, '')" for c in cls.COLUMNS)
+        db.session.execute(text(
+            f"INSERT INTO {cls.TABLE}(rowid, {columns}) "
+            f"SELECT id, {values} FROM products WHERE is_active = 1"
+        ))
+
+    @classmethod
+    def index_product(cls, product):
+        """Ajoute ou met à jour un produit dans l'index (le retire s'il est inactif)"""
+        cls.ensure_schema()
+        cls.remove_product(product.id)
+        if not product.is_active:
+            return
+
+        params = {c: getattr(product, c) or '' for c in cls.COLUMNS}
+        params['id'] = product.id
+        db.session.execute(text(
+            f"INSERT INTO {cls.TABLE}(rowid, {', '.join(cls.COLUMNS)}) "
+            f"VALUES (:id, {', '.join(':' + c for c in cls.COLUMNS)})"
+        ), params)
+
+    @classmethod
+    def remove_product(cls, product_id):
+        """Retire un produit de l'index"""
+        cls.ensure_schema()
+        db.session.execute(text(
+            f"DELETE FROM {cls.TABLE} WHERE rowid = :id"
+        ), {'id': product_id})
+
+    @staticmethod
+    def build_match_query(query):
+        """
+        Transforme une saisie utilisateur en requête FTS5
+
+        Chaque mot devient un préfixe entre guillemets (pas d'injection de
+        syntaxe FTS5 possible) et tous les mots doivent être présents.
+        """
+        terms = re.findall(r'\w+', query or '', flags=re.UNICODE)
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    @classmethod
+    def search(cls, query, page=1, per_page=20):
+        """
+        Recherche les produits correspondant à la requête
+
+        Retourne (liste d'ids triés par pertinence, nombre total de résultats).
+        """
+        match = cls.build_match_query(query)
+        if not match:
+            return [], 0
+
+        if cls.ensure_schema():
+            db.session.commit()
+
+        total = db.session.execute(text(
+            f"SELECT count(*) FROM {cls.TABLE} WHERE {cls.TABLE} MATCH :match"
+        ), {'match': match}).scalar()
+
+        weights = ', '.join(str(w) for w in cls.WEIGHTS)
+        rows = db.session.execute(text(
+            f"SELECT rowid, bm25({cls.TABLE}, {weights}) AS score FROM {cls.TABLE} "
+            f"WHERE {cls.TABLE} MATCH :match ORDER BY score LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'limit': per_page, 'offset': (page - 1) * per_page}).fetchall()
+
+        return [row[0] for row in rows], total
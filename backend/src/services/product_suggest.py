@@ -0,0 +1,227 @@
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import func
+from src.extensions import db
+from src.models.product import Product
+from src.models.stats import DailyProductSales
+
+
+# Ligatures non décomposées par NFKD
+_LIGATURES = str.maketrans({'œ': 'oe', 'æ': 'ae'})
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+@lru_cache(maxsize=65536)
+def _fold_word(word):
+    if not word.isascii():
+        decomposed = unicodedata.normalize('NFKD', word.translate(_LIGATURES))
+        word = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(part for part in _SEPARATORS.split(word) if part)
+
+
+def fold(text):
+    """
+    Forme de comparaison d'un texte : minuscules, sans accents, mots
+    séparés par une seule espace (« Protéine Pré-Entraînement » →
+    « proteine pre entrainement »)
+
+    Les noms du catalogue partagent peu de mots : chaque mot est replié
+    une fois, puis relu dans un cache.
+    """
+    words = (_fold_word(word) for word in (text or '').casefold().split())
+    return ' '.join(word for word in words if word)
+
+
+def word_suffixes(folded):
+    """Le texte à partir de chacun de ses mots : un préfixe peut commencer à n'importe quel mot"""
+    words = folded.split(' ')
+    return [' '.join(words[start:]) for start in range(len(words)) if words[start]]
+
+
+class PrefixTable:
+    """
+    Table de préfixes : clés triées et meilleurs propriétaires par intervalle
+
+    Chaque clé appartient à un propriétaire identifié par son rang (0 = le
+    plus populaire). Les clés commençant par un préfixe forment un
+    intervalle contigu du tableau trié, trouvé par deux recherches
+    dichotomiques. Pour ne pas parcourir tout l'intervalle (« s » couvre
+    une bonne partie du catalogue), les clés sont regroupées en blocs de
+    FANOUT, puis les blocs en blocs de blocs, etc. ; chaque bloc garde les
+    `depth` meilleurs rangs distincts qu'il contient. Un intervalle se
+    décompose en au plus 2 × FANOUT blocs par niveau : le coût d'une
+    recherche est logarithmique, quelle que soit sa largeur.
+    """
+
+    FANOUT = 16
+
+    def __init__(self, pairs, depth):
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.depth = depth
+        # levels[0] : rang de chaque clé ; levels[n] : meilleurs rangs de chaque bloc
+        self.levels = [[rank for _, rank in pairs]]
+
+        layer, merge = self.levels[0], set
+        while len(layer) > self.FANOUT:
+            layer = [
+                tuple(heapq.nsmallest(depth, merge(layer[start:start + self.FANOUT])))
+                for start in range(0, len(layer), self.FANOUT)
+            ]
+            self.levels.append(layer)
+            merge = lambda blocks: set().union(*blocks)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def top(self, prefix, limit):
+        """Rangs des `limit` meilleurs propriétaires d'une clé commençant par prefix"""
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\U0010ffff', lo)
+
+        ranks = set()
+        fanout = self.FANOUT
+        for level, layer in enumerate(self.levels):
+            # Niveau 0 : un rang par clé ; niveaux supérieurs : meilleurs rangs du bloc
+            add = ranks.add if level == 0 else ranks.update
+            if level == len(self.levels) - 1 or hi - lo < fanout:
+                for position in range(lo, hi):
+                    add(layer[position])
+                break
+            while lo < hi and lo % fanout:
+                add(layer[lo])
+                lo += 1
+            while lo < hi and hi % fanout:
+                hi -= 1
+                add(layer[hi])
+            lo //= fanout
+            hi //= fanout
+        return heapq.nsmallest(limit, ranks)
+
+
+class ProductSuggestIndex:
+    """
+    Index en mémoire de l'autocomplétion du catalogue (/api/products/suggest)
+
+    Les produits actifs sont indexés sur leur nom (à partir de chaque mot)
+    et leur SKU (avec et sans séparateurs), les catégories sur leur nom.
+    Les textes sont comparés sans accents ni majuscules (fold()) :
+    « proteine » trouve « Protéine Whey ». Les suggestions sont classées
+    par popularité : unités vendues (rollups daily_product_sales), puis
+    nom. Une catégorie a la popularité cumulée de ses produits.
+
+    L'index est reconstruit à la demande suivante après invalidate()
+    (création, modification ou suppression d'un produit par les routes
+    d'administration) et toutes les SUGGEST_INDEX_MAX_AGE secondes (600
+    par défaut), pour reprendre les ventes récentes et les écritures des
+    autres workers. Pendant une reconstruction, les autres requêtes
+    continuent d'utiliser l'index précédent.
+    """
+
+    # Nombre maximal de suggestions par type
+    MAX_LIMIT = 10
+
+    _lock = threading.Lock()
+    _rebuilding = threading.Lock()
+    _built_at = None
+    _generation = 0        # incrémenté par invalidate()
+    _built_generation = 0  # génération au début de la dernière construction
+    _products = None     # PrefixTable des produits
+    _product_entries = ()  # rang -> Row (id, name, sku, category, price, image_url)
+    _categories = None   # PrefixTable des catégories
+    _category_entries = ()
+
+    # ==================== CONSTRUCTION ====================
+
+    @staticmethod
+    def _units_sold():
+        rows = db.session.query(
+            DailyProductSales.product_id, func.sum(DailyProductSales.units_sold)
+        ).group_by(DailyProductSales.product_id)
+        return {product_id: int(units or 0) for product_id, units in rows}
+
+    @classmethod
+    def rebuild(cls):
+        """Reconstruit l'index à partir des produits actifs et des ventes"""
+        generation = cls._generation
+        units_sold = cls._units_sold()
+        products = db.session.query(
+            Product.id, Product.name, Product.sku, Product.category, Product.price, Product.image_url
+        ).filter(Product.is_active.is_(True)).all()
+        products.sort(key=lambda row: (-units_sold.get(row.id, 0), row.name or '', row.id))
+
+        product_entries, product_keys = [], []
+        category_units = {}
+        for rank, row in enumerate(products):
+            product_entries.append(row)
+            keys = set(word_suffixes(fold(row.name)))
+            if row.sku:
+                sku = fold(row.sku)
+                keys.update(word_suffixes(sku))
+                keys.add(sku.replace(' ', ''))
+            product_keys.extend((key, rank) for key in keys if key)
+            if row.category:
+                category_units[row.category] = category_units.get(row.category, 0) + units_sold.get(row.id, 0)
+
+        categories = sorted(category_units, key=lambda name: (-category_units[name], name))
+        category_entries = [{'name': name, 'units_sold': category_units[name]} for name in categories]
+        category_keys = [(key, rank) for rank, name in enumerate(categories)
+                         for key in set(word_suffixes(fold(name))) if key]
+
+        product_table = PrefixTable(product_keys, cls.MAX_LIMIT)
+        category_table = PrefixTable(category_keys, cls.MAX_LIMIT)
+        with cls._lock:
+            cls._products, cls._product_entries = product_table, product_entries
+            cls._categories, cls._category_entries = category_table, category_entries
+            cls._built_at = time.monotonic()
+            cls._built_generation = generation
+
+    @classmethod
+    def ensure(cls):
+        if cls._built_at is None:
+            with cls._rebuilding:
+                if cls._built_at is None:
+                    cls.rebuild()
+            return
+
+        max_age = current_app.config.get('SUGGEST_INDEX_MAX_AGE', 600)
+        if cls._built_generation == cls._generation and time.monotonic() - cls._built_at <= max_age:
+            return
+        # Une seule reconstruction à la fois : les autres requêtes servent l'index précédent
+        if cls._rebuilding.acquire(blocking=False):
+            try:
+                cls.rebuild()
+            finally:
+                cls._rebuilding.release()
+
+    @classmethod
+    def invalidate(cls):
+        """Marque l'index comme périmé (à appeler après le commit d'une écriture du catalogue)"""
+        with cls._lock:
+            cls._generation += 1
+
+    # ==================== SUGGESTIONS ====================
+
+    @classmethod
+    def suggest(cls, prefix, limit=8):
+        """Produits et catégories dont un mot (ou le SKU) commence par prefix, les plus vendus d'abord"""
+        limit = min(max(limit, 1), cls.MAX_LIMIT)
+        folded = fold(prefix)
+        if not folded:
+            return {'products': [], 'categories': []}
+
+        cls.ensure()
+        with cls._lock:
+            products, product_entries = cls._products, cls._product_entries
+            categories, category_entries = cls._categories, cls._category_entries
+
+        return {
+            'products': [dict(product_entries[rank]._mapping) for rank in products.top(folded, limit)],
+            'categories': [category_entries[rank] for rank in categories.top(folded, limit)],
+        }
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrence du passage de commande (POST /api/orders)
+
+Lance de nombreux clients en parallèle sur une base SQLite temporaire et
+vérifie qu'aucune unité n'est vendue deux fois : pour chaque produit, le
+stock final plus les quantités commandées doit égaler le stock initial,
+et le stock ne doit jamais devenir négatif.
+
+Usage: python test_checkout_concurrency.py [--threads 64] [--orders 40] [--products 5] [--stock 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix='checkout_bench_'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+from src.main_fixed import app, db
+from src.models.user import User
+from src.models.product import Product
+from src.models.order import Order, OrderItem
+
+
+def setup_database(user_count, product_count, stock):
+    with app.app_context():
+        db.create_all()
+        users = []
+        for i in range(user_count):
+            user = User(email=f'bench{i}@example.com', first_name='Bench', last_name=str(i), role='user')
+            # Hash factice : le benchmark ne passe pas par /auth/login
+            user.password_hash = 'pbkdf2:sha256:1$bench$0'
+            users.append(user)
+        db.session.add_all(users)
+        for i in range(product_count):
+            db.session.add(Product(name=f'Bench product {i}', price=10 + i, category='Bench',
+                                   stock_quantity=stock, sku=f'BENCH{i:03d}'))
+        db.session.commit()
+        return [create_access_token(identity=user.id) for user in users]
+
+
+def worker(token, orders, product_count, results, lock, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(orders):
+        items = [{'product_id': pid, 'quantity': rng.randint(1, 3)}
+                 for pid in rng.sample(range(1, product_count + 1), rng.randint(1, min(3, product_count)))]
+        started = time.perf_counter()
+        response = client.post('/api/orders', headers=headers, json={
+            'items': items,
+            'shipping_address': '1 rue du Test',
+            'billing_address': '1 rue du Test',
+            'payment_method': 'card'
+        })
+        elapsed = time.perf_counter() - started
+        with lock:
+            results['latencies'].append(elapsed)
+            results['status'][response.status_code] = results['status'].get(response.status_code, 0) + 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--orders', type=int, default=40, help='commandes par thread')
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=200)
+    args = parser.parse_args()
+
+    tokens = setup_database(args.threads, args.products, args.stock)
+    results = {'latencies': [], 'status': {}}
+    lock = threading.Lock()
+
+    threads = [threading.Thread(target=worker, args=(tokens[i], args.orders, args.products, results, lock, i))
+               for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    ok = True
+    with app.app_context():
+        sold = dict(db.session.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+                    .group_by(OrderItem.product_id).all())
+        print(f"\n{'Produit':<20}{'Initial':>10}{'Vendu':>10}{'Final':>10}")
+        for product in Product.query.order_by(Product.id).all():
+            sold_quantity = sold.get(product.id, 0) or 0
+            print(f"{product.name:<20}{args.stock:>10}{sold_quantity:>10}{product.stock_quantity:>10}")
+            if product.stock_quantity < 0 or product.stock_quantity + sold_quantity != args.stock:
+                ok = False
+        created = Order.query.count()
+
+    total = len(results['latencies'])
+    print(f"\nRequêtes: {total} en {duration:.2f}s ({total / duration:.1f} req/s)")
+    print(f"Statuts: {results['status']}  commandes créées: {created}")
+    print(f"Latence p50={percentile(results['latencies'], 50) * 1000:.1f}ms "
+          f"p95={percentile(results['latencies'], 95) * 1000:.1f}ms "
+          f"p99={percentile(results['latencies'], 99) * 1000:.1f}ms")
+
+    if created != results['status'].get(201, 0):
+        ok = False
+    print("\n✅ Aucune survente" if ok else "\n❌ Incohérence de stock détectée")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Vérifie que les listes et détails de commandes s'exécutent en un nombre
+fixe de requêtes SQL, quel que soit le nombre de commandes affichées.
+
+Le script crée une base temporaire, mesure chaque endpoint avec 5 puis
+40 commandes par utilisateur et échoue si le nombre de requêtes change
+(N+1 sur order_items, status_history ou user).
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix='order_queries_'), 'orders.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from src.main_fixed import app, db
+from src.models.user import User
+from src.models.product import Product
+from src.models.order import Order, OrderItem, OrderStatusHistory
+from src.services.identity import token_claims
+from src.services.admin_search import AdminSearchIndex
+from src.services.pagination import CountCache
+
+# Endpoints paginés ou listes complètes : le nombre de requêtes ne doit pas dépendre du volume
+LIST_ENDPOINTS = [
+    ('customer', '/api/orders-all'),
+    ('admin', '/api/admin/orders?per_page=100'),
+    ('admin', '/api/admin/orders?per_page=100&search=client'),
+    ('admin', '/api/admin/dashboard/recent-orders?limit=100'),
+]
+
+# Endpoints de détail : nombre maximal de requêtes attendu
+DETAIL_ENDPOINTS = [
+    ('customer', '/api/orders/{order_id}/history', 2),
+    ('admin', '/api/admin/orders/{order_id}', 3),
+]
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed_orders(user_id, product_ids, count):
+    for i in range(count):
+        order = Order(user_id=user_id, order_number=f'ORD-{user_id}-{Order.query.count()}',
+                      total_amount=20, shipping_address='1 rue du Test', billing_address='1 rue du Test',
+                      payment_method='card')
+        db.session.add(order)
+        db.session.flush()
+        for product_id in product_ids:
+            db.session.add(OrderItem(order_id=order.id, product_id=product_id, product_name='Produit',
+                                     product_sku='SKU', quantity=1, unit_price=10, total_price=10))
+        db.session.add(OrderStatusHistory(order_id=order.id, status='pending', comment='Commande créée',
+                                          created_by=user_id))
+        db.session.add(OrderStatusHistory(order_id=order.id, status='processing', created_by=user_id))
+    db.session.commit()
+
+
+def measure(client, counter, headers, url):
+    # Totaux de pagination recalculés à chaque mesure : le COUNT est compté dans les deux tailles
+    CountCache.clear()
+    counter.count = 0
+    response = client.get(url, headers=headers)
+    if response.status_code != 200:
+        raise AssertionError(f'{url}: statut HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+    return counter.count
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        # Comme au démarrage de l'application : index de recherche admin créés hors des requêtes mesurées
+        if AdminSearchIndex.ensure_schema():
+            db.session.commit()
+        customer = User(email='client@example.com', first_name='Jean', last_name='Client', role='user',
+                        password_hash='x')
+        admin = User(email='admin@example.com', first_name='Admin', last_name='Test', role='admin',
+                     password_hash='x')
+        db.session.add_all([customer, admin])
+        products = [Product(name=f'Produit {i}', price=10, category='Protéines', stock_quantity=100, sku=f'P{i}')
+                    for i in range(3)]
+        db.session.add_all(products)
+        db.session.commit()
+        product_ids = [p.id for p in products]
+        customer_id = customer.id
+        headers = {
+            'customer': {'Authorization': f'Bearer {create_access_token(identity=customer.id, additional_claims=token_claims(customer))}'},
+            'admin': {'Authorization': f'Bearer {create_access_token(identity=admin.id, additional_claims=token_claims(admin))}'},
+        }
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    # Caches par processus chauffés avant les mesures (relecture périodique des révocations d'identité)
+    for who, url in LIST_ENDPOINTS:
+        measure(client, counter, headers[who], url)
+
+    results = {}
+    for size in (5, 40):
+        with app.app_context():
+            already = Order.query.filter_by(user_id=customer_id).count()
+            seed_orders(customer_id, product_ids, size - already)
+            # Un client distinct par commande pour que le chargement de order.user soit visible
+            for i in range(already, size):
+                buyer = User(email=f'acheteur{i}@example.com', first_name='Client', last_name=str(i),
+                             role='user', password_hash='x')
+                db.session.add(buyer)
+                db.session.flush()
+                seed_orders(buyer.id, product_ids, 1)
+        results[size] = {url: measure(client, counter, headers[who], url) for who, url in LIST_ENDPOINTS}
+
+    ok = True
+    print(f"{'endpoint':<55} {'5 cmd':>6} {'40 cmd':>7}")
+    for who, url in LIST_ENDPOINTS:
+        small, large = results[5][url], results[40][url]
+        status = '✅' if small == large else '❌'
+        ok &= small == large
+        print(f"{status} {url:<53} {small:>6} {large:>7}")
+
+    with app.app_context():
+        order_id = Order.query.filter_by(user_id=customer_id).first().id
+    for who, url, expected in DETAIL_ENDPOINTS:
+        url = url.format(order_id=order_id)
+        count = measure(client, counter, headers[who], url)
+        status = '✅' if count <= expected else '❌'
+        ok &= count <= expected
+        print(f"{status} {url:<53} {count:>6} (max {expected})")
+
+    print("\n✅ Nombre de requêtes constant" if ok else "\n❌ Requêtes N+1 détectées")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
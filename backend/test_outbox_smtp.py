@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test de l'outbox des notifications avec un serveur SMTP local (aiosmtpd)
+
+1. Une commande créée via POST /api/orders écrit un message d'outbox
+   dans la même transaction, sans envoyer d'email pendant la requête.
+2. Le worker génère un email par administrateur et les envoie au serveur
+   aiosmtpd local.
+3. Avec un serveur SMTP injoignable, les messages sont replanifiés puis
+   passent en 'dead' après OUTBOX_MAX_ATTEMPTS tentatives.
+
+Prérequis: pip install aiosmtpd
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DB_FILE = os.path.join(tempfile.mkdtemp(prefix='outbox_test_'), 'outbox.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_FILE}'
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    print("aiosmtpd n'est pas installé (pip install aiosmtpd), test ignoré")
+    sys.exit(0)
+
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from src.main_fixed import app, db
+from src.models.user import User
+from src.models.product import Product
+from src.models.outbox import OutboxMessage
+from src.services.outbox_worker import OutboxWorker
+
+SMTP_PORT = 8025
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content))
+        return '250 Message accepted for delivery'
+
+
+def setup_database():
+    with app.app_context():
+        db.create_all()
+        customer = User(email='client@example.com', first_name='Jean', last_name='Client', role='user',
+                        password_hash='x')
+        db.session.add(customer)
+        for i in range(3):
+            db.session.add(User(email=f'admin{i}@example.com', first_name='Admin', last_name=str(i),
+                                role='admin', password_hash='x'))
+        db.session.add(Product(name='Whey', price=30, category='Protéines', stock_quantity=10, sku='W1'))
+        db.session.commit()
+        return create_access_token(identity=customer.id)
+
+
+def place_order(client, token):
+    return client.post('/api/orders', headers={'Authorization': f'Bearer {token}'}, json={
+        'items': [{'product_id': 1, 'quantity': 1}],
+        'shipping_address': '1 rue du Test',
+        'billing_address': '1 rue du Test',
+        'payment_method': 'card'
+    })
+
+
+def main():
+    token = setup_database()
+    client = app.test_client()
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=SMTP_PORT)
+    controller.start()
+    ok = True
+
+    try:
+        app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=SMTP_PORT,
+                          OUTBOX_MAX_ATTEMPTS=3, OUTBOX_BACKOFF_BASE=0)
+        worker = OutboxWorker(app)
+
+        print("1. Création de commande")
+        response = place_order(client, token)
+        with app.app_context():
+            pending = OutboxMessage.query.filter_by(status='pending').count()
+        print(f"   statut HTTP {response.status_code}, messages en attente: {pending}, emails reçus: {len(handler.messages)}")
+        ok &= response.status_code == 201 and pending == 1 and not handler.messages
+
+        print("2. Traitement par le worker")
+        worker.process_pending()
+        recipients = sorted(r for rcpts, _ in handler.messages for r in rcpts)
+        print(f"   destinataires: {recipients}")
+        ok &= recipients == ['admin0@example.com', 'admin1@example.com', 'admin2@example.com']
+
+        print("3. Serveur SMTP injoignable : nouvelles tentatives puis dead-letter")
+        controller.stop()
+        app.config['MAIL_PORT'] = SMTP_PORT + 1
+        place_order(client, token)
+        for _ in range(5):
+            worker.process_pending()
+            with app.app_context():
+                # Rendre immédiatement disponibles les messages replanifiés
+                OutboxMessage.query.filter_by(status='pending').update({'available_at': datetime.utcnow()})
+                db.session.commit()
+        with app.app_context():
+            dead = OutboxMessage.query.filter_by(status='dead').all()
+            print(f"   messages dead: {len(dead)}, tentatives: {[m.attempts for m in dead]}")
+            ok &= len(dead) == 3 and all(m.attempts == 3 and m.last_error for m in dead)
+    finally:
+        try:
+            controller.stop()
+        except Exception:
+            pass
+
+    print("\n✅ Outbox OK" if ok else "\n❌ Échec du test de l'outbox")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
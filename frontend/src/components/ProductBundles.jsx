@@ -59,25 +59,29 @@ const ProductBundles = () => {
   const [adding, setAdding] = useState({});
   const { toast } = useToast();
   const [bundleDefs, setBundleDefs] = useState([]);
+  const [resolvedBundles, setResolvedBundles] = useState(null);
 
   useEffect(() => {
     let active = true;
-    const loadBundleDefs = async () => {
+    // Bundles already resolved server-side: a single cheap call, no product download
+    const loadResolvedBundles = async () => {
       try {
-        const res = await fetch('/api/bundles');
+        const res = await fetch('/api/bundles?resolved=1');
         if (res.ok) {
           const data = await res.json();
-          if (active && Array.isArray(data) && data.length) {
-            setBundleDefs(data);
-            return;
+          if (Array.isArray(data) && data.length) {
+            if (active) {
+              setResolvedBundles(data);
+              setLoading(false);
+            }
+            return true;
           }
         }
       } catch {
         void 0;
       }
-      if (active) setBundleDefs(DEFAULT_BUNDLE_DEFS);
+      return false;
     };
-    loadBundleDefs();
     const fetchProducts = async () => {
       try {
         setLoading(true);
@@ -113,13 +117,19 @@ const ProductBundles = () => {
         if (active) setLoading(false);
       }
     };
-    fetchProducts();
+    loadResolvedBundles().then((resolved) => {
+      if (resolved || !active) return;
+      // No bundles defined server-side: resolve the defaults client-side
+      setBundleDefs(DEFAULT_BUNDLE_DEFS);
+      fetchProducts();
+    });
     return () => {
       active = false;
     };
   }, []);
 
   const bundles = useMemo(() => {
+    if (resolvedBundles) return resolvedBundles;
     const productById = new Map(products.map((p) => [p.id, p]));
     const pickByKeyword = (list, kw, exclude) => {
       const k = (kw || '').toLowerCase();
@@ -174,7 +184,7 @@ const ProductBundles = () => {
         bundlePrice
       };
     });
-  }, [products, bundleDefs]);
+  }, [products, bundleDefs, resolvedBundles]);
 
           const handleAddBundle = async (bundleId, itemIds, _EVENT) => {
             _EVENT?.stopPropagation?.();
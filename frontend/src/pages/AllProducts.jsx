@@ -42,6 +42,7 @@ const AllProducts = () => {
   const [filteredProducts, setFilteredProducts] = useState([]);
   const [allProducts, setAllProducts] = useState([]);
   const [categories, setCategories] = useState([]);
+  const [categoryCounts, setCategoryCounts] = useState({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
@@ -72,10 +73,13 @@ const AllProducts = () => {
 
     const fetchCategories = async () => {
       try {
-        const response = await fetch('http://localhost:5000/api/products/categories');
+        // Catégories et nombre de produits par catégorie, calculés par l'index des facettes
+        const response = await fetch('http://localhost:5000/api/products/facets');
         if (response.ok) {
-          const cats = await response.json();
-          setCategories(cats);
+          const data = await response.json();
+          const facet = data.facets.category;
+          setCategories(facet.map((entry) => entry.value));
+          setCategoryCounts(Object.fromEntries(facet.map((entry) => [entry.value, entry.count])));
         }
       } catch (err) {
         console.error('Erreur lors de la récupération des catégories:', err);
@@ -392,6 +396,9 @@ const AllProducts = () => {
                         className="mr-2"
                       />
                       {category}
+                      {categoryCounts[category] !== undefined && (
+                        <span className="ml-auto text-sm text-gray-500">{categoryCounts[category]}</span>
+                      )}
                     </label>
                   ))}
                 </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -153,28 +153,49 @@ const CheckoutPage = () => {
     fetchCart();
   }, [navigate, toast]);
 
-  const updateQuantity = async (productId, newQuantity) => {
-    if (newQuantity < 1) {
-      removeItem(productId);
-      return;
+  // Modifications du panier en attente : regroupées et envoyées en un seul PATCH /api/cart
+  const pendingCartOps = useRef({});
+  const cartFlushTimer = useRef(null);
+
+  const reloadCart = async () => {
+    const token = localStorage.getItem('token');
+    const response = await fetch('http://localhost:5000/api/cart', {
+      headers: {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json'
+      }
+    });
+    if (response.ok) {
+      const data = await response.json();
+      setCartItems(data.items || []);
     }
+  };
+
+  const flushCartOperations = async () => {
+    const operations = Object.entries(pendingCartOps.current).map(([productId, quantity]) => (
+      quantity > 0
+        ? { op: 'set', product_id: Number(productId), quantity }
+        : { op: 'remove', product_id: Number(productId) }
+    ));
+    pendingCartOps.current = {};
+    if (operations.length === 0) return;
 
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`http://localhost:5000/api/cart/update_quantity/${productId}`, {
-        method: 'PUT',
+      const response = await fetch('http://localhost:5000/api/cart', {
+        method: 'PATCH',
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json'
         },
-        body: JSON.stringify({ quantity: newQuantity })
+        body: JSON.stringify({ operations })
       });
+      const data = await response.json();
 
       if (response.ok) {
-        const data = await response.json();
         setCartItems(data.cart.items || []);
       } else {
-        throw new Error('Impossible de mettre à jour la quantité');
+        throw new Error(data.errors?.[0]?.error || data.message || 'Impossible de mettre à jour le panier');
       }
     } catch (err) {
       toast({
@@ -182,32 +203,38 @@ const CheckoutPage = () => {
         description: err.message,
         variant: "destructive"
       });
+      // Revenir à l'état du panier côté serveur
+      reloadCart();
     }
   };
 
-  const removeItem = async (productId) => {
-    try {
-      const token = localStorage.getItem('token');
-      const response = await fetch(`http://localhost:5000/api/cart/remove/${productId}`, {
-        method: 'DELETE',
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      });
+  const queueCartOperation = (productId, quantity) => {
+    pendingCartOps.current[productId] = quantity;
+    clearTimeout(cartFlushTimer.current);
+    cartFlushTimer.current = setTimeout(flushCartOperations, 400);
+  };
 
-      if (response.ok) {
-        setCartItems(items => items.filter(item => item.product_id !== productId));
-      } else {
-        throw new Error('Impossible de supprimer l\'article du panier');
-      }
-    } catch (err) {
-      toast({
-        title: "Erreur",
-        description: err.message,
-        variant: "destructive"
-      });
+  // Envoyer les modifications en attente en quittant la page
+  useEffect(() => () => {
+    clearTimeout(cartFlushTimer.current);
+    flushCartOperations();
+  }, []);
+
+  const updateQuantity = (productId, newQuantity) => {
+    if (newQuantity < 1) {
+      removeItem(productId);
+      return;
     }
+
+    setCartItems(items => items.map(item => (
+      item.product_id === productId ? { ...item, quantity: newQuantity } : item
+    )));
+    queueCartOperation(productId, newQuantity);
+  };
+
+  const removeItem = (productId) => {
+    setCartItems(items => items.filter(item => item.product_id !== productId));
+    queueCartOperation(productId, 0);
   };
 
   const calculateSubtotal = () => {
@@ -314,7 +341,9 @@ const CheckoutPage = () => {
           description: `Votre commande ${data.order.order_number} a été créée avec succès.`
         });
         
-        // Vider le panier
+        // Vider le panier (les modifications en attente sont devenues sans objet)
+        clearTimeout(cartFlushTimer.current);
+        pendingCartOps.current = {};
         try {
           const emptyCartResponse = await fetch('http://localhost:5000/api/cart/empty', {
             method: 'DELETE',
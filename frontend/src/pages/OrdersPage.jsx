@@ -9,7 +9,7 @@ import { Textarea } from '@/components/ui/textarea';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, DialogTrigger } from '@/components/ui/dialog';
 import { AlertDialog, AlertDialogAction, AlertDialogCancel, AlertDialogContent, AlertDialogDescription, AlertDialogFooter, AlertDialogHeader, AlertDialogTitle, AlertDialogTrigger } from '@/components/ui/alert-dialog';
-import { Package, Clock, Truck, CheckCircle, XCircle, Eye, CreditCard, MapPin, Calendar, Hash } from 'lucide-react';
+import { Package, Clock, Truck, CheckCircle, XCircle, Eye, CreditCard, MapPin, Calendar, Hash, FileText } from 'lucide-react';
 import { useToast } from '@/components/ui/use-toast';
 
 const OrdersPage = () => {
@@ -119,6 +119,36 @@ const OrdersPage = () => {
 
   // La fonction createOrder a été supprimée car le bouton "Passer Commande" a été supprimé
 
+  const downloadInvoice = async (order) => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await fetch(`http://localhost:5000/api/orders/${order.id}/invoice?download=1`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Erreur lors du téléchargement de la facture');
+      }
+
+      // Le PDF est protégé par le token : téléchargement via un blob plutôt qu'un simple lien
+      const url = URL.createObjectURL(await response.blob());
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `facture-${order.order_number}.pdf`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      toast({
+        title: "Erreur",
+        description: error.message,
+        variant: "destructive"
+      });
+    }
+  };
+
   const cancelOrder = async (orderId, reason) => {
     try {
       const token = localStorage.getItem('token');
@@ -264,6 +294,17 @@ const OrdersPage = () => {
                       Détails
                     </Button>
                     
+                    {order.status !== 'cancelled' && (
+                      <Button
+                        variant="outline"
+                        size="sm"
+                        onClick={() => downloadInvoice(order)}
+                      >
+                        <FileText className="w-4 h-4 mr-1" />
+                        Facture
+                      </Button>
+                    )}
+                    
                     {canCancelOrder(order.status) && (
                       <AlertDialog>
                         <AlertDialogTrigger asChild>